@@ -1,5 +1,5 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
@@ -46,3 +46,25 @@ def get_current_user(
         
     return user
 
+
+def get_client_key(request: Request) -> str:
+    """
+    Identity used for per-user limits on endpoints that don't require login:
+    the token subject if a valid bearer token is sent, otherwise the client IP
+    (X-Forwarded-For is only honored behind TRUSTED_PROXY_HOPS configured proxies).
+    """
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(auth[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    host = request.client.host if request.client else "unknown"
+    # X-Forwarded-For is client-controlled except for the entries our own proxies appended: with
+    # TRUSTED_PROXY_HOPS proxies in front, the right-most untrusted hop is the real client
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    if settings.TRUSTED_PROXY_HOPS > 0 and len(hops) >= settings.TRUSTED_PROXY_HOPS:
+        host = hops[-settings.TRUSTED_PROXY_HOPS]
+    return f"ip:{host}"
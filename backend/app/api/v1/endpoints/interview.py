@@ -1,8 +1,12 @@
+import json
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, Body, Header, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, UploadFile, File, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from app.core.database import get_db
 from app.services.ai_interview import ai_interview_service
 from app.services.resume_parser import resume_parser_service
+from app.services.interview_memory import interview_memory, history_for_ai
+from app.services.llm_scheduler import RateLimited
 from datetime import datetime
 from bson import ObjectId
 from app.api.v1 import deps
@@ -107,20 +111,7 @@ async def start_interview(
         "context": opening.get("context")
     }
 
-@router.post("/{session_id}/reply")
-async def reply_to_interview(
-    session_id: str,
-    body: dict = Body(...),
-    x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
-    db: Any = Depends(get_db),
-    current_user: dict = Depends(deps.get_current_user)
-) -> Any:
-    """
-    Process user answer and get next question.
-    """
-    user_answer = body.get("answer")
-    
-    # 1. Retrieve Session
+def _load_session(db: Any, session_id: str) -> dict:
     try:
         session = db.interview_sessions.find_one({"_id": ObjectId(session_id)})
     except:
@@ -128,33 +119,21 @@ async def reply_to_interview(
         
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-        
-    # 2. Append User Answer to History
-    current_turns = session.get("turns", [])
-    
-    # Structure for AI Service
-    history_for_ai = []
-    for t in current_turns:
-        if t["role"] == "assistant":
-            history_for_ai.append({"question": t["question"], "user_answer": ""})
-        elif t["role"] == "user":
-            if history_for_ai:
-                history_for_ai[-1]["user_answer"] = t["answer"]
-                
-    # 3. Call AI Service
-    try:
-        ai_response = await ai_interview_service.process_turn(
-            history=history_for_ai,
-            last_answer=user_answer,
-            role=session["role"],
-            company=session["company"],
-            api_key=x_groq_api_key,
-            resume_context=session.get("resume_context") # Pass persisted context
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-        
-    # 4. Update DB (Push User Answer AND New Question)
+    return session
+
+def _turn_args(session: dict, user_answer: str, api_key: str | None) -> dict:
+    return {
+        "history": history_for_ai(session),
+        "last_answer": user_answer,
+        "role": session["role"],
+        "company": session["company"],
+        "api_key": api_key,
+        "resume_context": session.get("resume_context"), # Pass persisted context
+        "memory": session.get("memory") # Rolling summary of the earlier exchanges
+    }
+
+def _save_turn(db: Any, session_id: str, user_answer: str, ai_response: dict):
+    # Push User Answer AND New Question
     new_user_turn = {
         "role": "user",
         "answer": user_answer,
@@ -172,12 +151,104 @@ async def reply_to_interview(
         {"_id": ObjectId(session_id)},
         {"$push": {"turns": {"$each": [new_user_turn, new_ai_turn]}}}
     )
+
+@router.post("/{session_id}/reply")
+async def reply_to_interview(
+    session_id: str,
+    body: dict = Body(...),
+    x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    db: Any = Depends(get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Process user answer and get next question.
+    """
+    user_answer = body.get("answer")
+    session = _load_session(db, session_id)
+                
+    try:
+        ai_response = await ai_interview_service.process_turn(**_turn_args(session, user_answer, x_groq_api_key))
+    except RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    _save_turn(db, session_id, user_answer, ai_response)
+    interview_memory.schedule(session_id, x_groq_api_key)
     
     return {
         "next_question": ai_response["next_question"],
         "feedback_snapshot": ai_response.get("feedback_snapshot")
     }
 
+async def _stream_reply(db: Any, session_id: str, session: dict, user_answer: str, api_key: str | None):
+    """
+    Turn events for the streaming endpoints: {"type": "token", "text"} while the question is generated,
+    then {"type": "done", "next_question", "feedback_snapshot"} once the turn is saved, or {"type": "error"}.
+    """
+    try:
+        async for event in ai_interview_service.stream_turn(**_turn_args(session, user_answer, api_key)):
+            if event["type"] == "token":
+                yield event
+            else:
+                turn = event["turn"]
+                _save_turn(db, session_id, user_answer, turn)
+                interview_memory.schedule(session_id, api_key)
+                yield {
+                    "type": "done",
+                    "next_question": turn["next_question"],
+                    "feedback_snapshot": turn.get("feedback_snapshot")
+                }
+    except RateLimited as e:
+        yield {"type": "error", "detail": str(e), "retry_after": e.retry_after}
+    except Exception as e:
+        yield {"type": "error", "detail": str(e)}
+
+@router.post("/{session_id}/reply/stream")
+async def stream_reply_to_interview(
+    session_id: str,
+    body: dict = Body(...),
+    x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    db: Any = Depends(get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Same as /reply, but streams the next question as Server-Sent Events while it is generated
+    (one `data:` JSON line per event; see _stream_reply). The turn is saved when the stream completes.
+    """
+    user_answer = body.get("answer")
+    session = _load_session(db, session_id)
+
+    async def event_stream():
+        async for event in _stream_reply(db, session_id, session, user_answer, x_groq_api_key):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/{session_id}/ws")
+async def interview_websocket(websocket: WebSocket, session_id: str, token: str = Query(...), db: Any = Depends(get_db)):
+    """
+    One socket for a whole interview. Each client message {"answer", "api_key"} is answered
+    with the same events as /reply/stream.
+    """
+    await websocket.accept()
+    try:
+        deps.get_current_user(db=db, token=token)
+        _load_session(db, session_id)
+    except HTTPException as e:
+        await websocket.close(code=4000 + e.status_code, reason=str(e.detail))
+        return
+    try:
+        while True:
+            message = await websocket.receive_json()
+            # Re-read per turn: the history grows with every saved turn
+            session = _load_session(db, session_id)
+            async for event in _stream_reply(db, session_id, session, message.get("answer"), message.get("api_key")):
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
 @router.get("/history")
 def get_interview_history(
     db: Any = Depends(get_db),
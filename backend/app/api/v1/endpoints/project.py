@@ -1,14 +1,29 @@
+import json
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, Body, Header
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from app.core.database import get_db
-from app.services.project_intelligence import project_intelligence_service
+from app.services.project_intelligence import project_intelligence_service, PIPELINE_STAGES
+from app.services.job_runner import job_runner
+from app.services.admission import admission_controller, AdmissionRejected
+from app.services.repo_loader import CloneError
+from app.services.llm_cache import llm_cache
+from app.services.llm_client import llm_registry
+from app.services.llm_scheduler import llm_scheduler
+from app.services.single_flight import single_flight
+from app.services.telemetry import telemetry
+from app.api.v1.deps import get_client_key
 
 router = APIRouter()
 
+def _too_busy(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 @router.post("/visualize")
 async def project_visualize(
     body: dict = Body(...),
     x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    client_key: str = Depends(get_client_key),
     db: Any = Depends(get_db)
 ) -> Any:
     """
@@ -19,8 +34,13 @@ async def project_visualize(
         raise HTTPException(status_code=400, detail="Repo URL is required")
         
     try:
-        result = await project_intelligence_service.analyze_project_structure(repo_url, x_groq_api_key)
+        async with admission_controller.admit(client_key):
+            result = await project_intelligence_service.analyze_project_structure(repo_url, x_groq_api_key)
         return result
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except CloneError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -28,6 +48,7 @@ async def project_visualize(
 async def project_docs(
     body: dict = Body(...),
     x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    client_key: str = Depends(get_client_key),
     db: Any = Depends(get_db)
 ) -> Any:
     """
@@ -38,8 +59,11 @@ async def project_docs(
         raise HTTPException(status_code=400, detail="Job ID required (from visualize step)")
         
     try:
-        result = await project_intelligence_service.generate_docs(job_id, x_groq_api_key)
+        async with admission_controller.admit(client_key):
+            result = await project_intelligence_service.generate_docs(job_id, x_groq_api_key)
         return result
+    except AdmissionRejected as e:
+        raise _too_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -47,20 +71,149 @@ async def project_docs(
 async def generate_openapi(
     body: dict = Body(...),
     x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    client_key: str = Depends(get_client_key),
     db: Any = Depends(get_db)
 ) -> Any:
     """
-    Step 3 (Optional): AI OpenAPI Generation.
+    Step 3 (Optional): OpenAPI Generation from source routes.
+    AI only enriches route summaries, when an API key is supplied.
     """
     repo_url = body.get("repo_url")
     if not repo_url:
         raise HTTPException(status_code=400, detail="Repo URL is required")
 
     try:
-        if not x_groq_api_key:
-             raise HTTPException(status_code=400, detail="API Key required for generation")
-             
-        result = await project_intelligence_service.generate_ai_openapi_for_repo(repo_url, x_groq_api_key)
+        async with admission_controller.admit(client_key):
+            result = await project_intelligence_service.generate_ai_openapi_for_repo(
+                repo_url, x_groq_api_key, enrich=body.get("enrich_summaries", True)
+            )
         return result
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except CloneError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/graph/{job_id}")
+async def project_graph(job_id: str, prefix: str = "") -> Any:
+    """
+    Drill-down: clustered subgraph of the files under `prefix` (e.g. "backend/app/services"),
+    for a checkout returned by /visualize (`repo_path_id`).
+    """
+    try:
+        result = await project_intelligence_service.drill_down(job_id, prefix)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@router.get("/routes/{job_id}")
+async def project_routes(
+    job_id: str,
+    tag: str | None = None,
+    method: str | None = None,
+    prefix: str | None = None,
+    cursor: str | None = None,
+    limit: int = 200,
+) -> Any:
+    """
+    OpenAPI route table of an analyzed checkout, filtered by tag / method / path prefix.
+    Pass the returned `next_cursor` to get the next page.
+    """
+    try:
+        result = await project_intelligence_service.query_routes(
+            job_id, tag=tag, method=method, prefix=prefix, cursor=cursor, limit=max(1, min(limit, 1000))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@router.post("/jobs", status_code=202)
+async def submit_project_job(
+    body: dict = Body(...),
+    x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    client_key: str = Depends(get_client_key),
+) -> Any:
+    """
+    Queue a background analysis. Returns immediately; follow progress via /jobs/{job_id}/events (SSE),
+    the /jobs/{job_id}/ws WebSocket, or by polling /jobs/{job_id}.
+    Optional `stages`: any of "graph", "readme", "spec" (default: all). Clone & index always run.
+    """
+    repo_url = body.get("repo_url")
+    if not repo_url:
+        raise HTTPException(status_code=400, detail="Repo URL is required")
+
+    requested = body.get("stages") or ["graph", "readme", "spec"]
+    unknown = set(requested) - set(PIPELINE_STAGES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown stages: {', '.join(sorted(unknown))}")
+    stages = [s for s in PIPELINE_STAGES if s in ("clone", "index") or s in requested]
+
+    # Reserve queue space now so a saturated server answers 429 instead of accepting the job
+    try:
+        ticket = admission_controller.reserve(client_key)
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+
+    async def work(job):
+        try:
+            await ticket.acquire()
+            await project_intelligence_service.run_pipeline(job, repo_url, x_groq_api_key)
+        finally:
+            ticket.release()
+
+    job = job_runner.submit("project_analysis", stages, work)
+    return job.snapshot()
+
+@router.get("/jobs/{job_id}")
+async def get_project_job(job_id: str) -> Any:
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_project_job(job_id: str) -> Any:
+    """
+    Server-Sent Events: one `data:` line per stage transition (finished stages carry their result),
+    ending with the job's final status.
+    """
+    if not job_runner.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for event in job_runner.subscribe(job_id):
+            yield f"id: {event['seq']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/jobs/{job_id}/ws")
+async def project_job_websocket(websocket: WebSocket, job_id: str):
+    await websocket.accept()
+    if not job_runner.get(job_id):
+        await websocket.close(code=4404)
+        return
+    try:
+        async for event in job_runner.subscribe(job_id):
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@router.get("/metrics")
+async def project_metrics() -> Any:
+    """Admission queue depth, wait times and rejections; workspace disk usage; LLM cache/client reuse and rate budgets; coalesced requests; per-site call telemetry."""
+    return {
+        "admission": admission_controller.metrics(),
+        "workspace": project_intelligence_service.repo_cache.metrics(),
+        "llm_cache": llm_cache.metrics(),
+        "llm_clients": llm_registry.metrics(),
+        "llm_scheduler": llm_scheduler.metrics(),
+        "single_flight": single_flight.metrics(),
+        "telemetry": telemetry.snapshot()
+    }
@@ -1,5 +1,7 @@
+import json
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, Body, Header
+from fastapi.responses import StreamingResponse
 from app.core import security
 from app.api.v1.endpoints.dashboard import get_user_stats
 from app.core.database import get_db
@@ -108,6 +110,31 @@ async def toggle_bookmark(
 
 from fastapi import APIRouter, Depends, HTTPException, Body, Header, Request
 
+def _save_roadmap(db: Any, user_id: str, target_role: str, days_remaining: int, roadmap_data: dict) -> dict:
+    roadmap_doc = {
+        "user_id": user_id,
+        "target_role": target_role,
+        "days_remaining": days_remaining,
+        "created_at": datetime.utcnow(),
+        "roadmap": roadmap_data, # Store the whole JSON structure
+        # Flattened fields for easy access if needed
+        "title": roadmap_data["title"]
+    }
+    
+    # Upsert (Replace if exists for this role, or insert new)
+    db.roadmaps.update_one(
+        {"user_id": user_id, "target_role": target_role},
+        {"$set": roadmap_doc},
+        upsert=True
+    )
+    
+    # Return the FULL roadmap structure so frontend can render immediately
+    # Also include the DB ID for reference/bookmarking
+    final_doc = db.roadmaps.find_one({"user_id": user_id, "target_role": target_role})
+    roadmap_data["_id"] = str(final_doc["_id"])
+    roadmap_data["is_bookmarked"] = final_doc.get("is_bookmarked", False)
+    return roadmap_data
+
 @router.post("/generate")
 async def generate_roadmap(
     request: Request,
@@ -155,35 +182,41 @@ async def generate_roadmap(
         roadmap_data = await ai_service.generate_roadmap(target_role, days_remaining, weak_patterns, api_key=x_groq_api_key)
         
         # 3. Persist to DB
-        roadmap_doc = {
-            "user_id": user_id,
-            "target_role": target_role,
-            "days_remaining": days_remaining,
-            "created_at": datetime.utcnow(),
-            "roadmap": roadmap_data, # Store the whole JSON structure
-            # Flattened fields for easy access if needed
-            "title": roadmap_data["title"]
-        }
-        
-        # Upsert (Replace if exists for this role, or insert new)
-        db.roadmaps.update_one(
-            {"user_id": user_id, "target_role": target_role},
-            {"$set": roadmap_doc},
-            upsert=True
-        )
-        
-        # Return the FULL roadmap structure so frontend can render immediately
-        # Also include the DB ID for reference/bookmarking
-        final_doc = db.roadmaps.find_one({"user_id": user_id, "target_role": target_role})
-        roadmap_data["_id"] = str(final_doc["_id"])
-        roadmap_data["is_bookmarked"] = final_doc.get("is_bookmarked", False)
-        return roadmap_data
+        return _save_roadmap(db, user_id, target_role, days_remaining, roadmap_data)
     except Exception as e:
         import traceback
         print(f"ERROR IN GENERATE ROADMAP: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate/stream")
+async def stream_roadmap(
+    body: dict = Body(...),
+    x_groq_api_key: str | None = Header(default=None, alias="x-groq-api-key"),
+    db: Any = Depends(get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Same as /generate, but pushed level by level as Server-Sent Events (one `data:` JSON line per
+    event, see AIRoadmapService.stream_roadmap). The final `done` event carries the saved roadmap.
+    """
+    target_role = body.get("target_role", "Backend")
+    days_remaining = body.get("days_remaining", 45)
+    weak_patterns = body.get("weak_patterns", [])
+    user_id = str(current_user["_id"])
+
+    async def event_stream():
+        try:
+            async for event in ai_service.stream_roadmap(target_role, days_remaining, weak_patterns, api_key=x_groq_api_key):
+                if event["type"] == "done":
+                    event["roadmap"] = _save_roadmap(db, user_id, target_role, days_remaining, event["roadmap"])
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.delete("/cleanup")
 async def cleanup_non_bookmarked(
     db: Any = Depends(get_db),
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict
 import os
 class Settings(BaseSettings):
     PROJECT_NAME: str = "CodeAtlas API"
@@ -22,6 +22,97 @@ class Settings(BaseSettings):
     # OpenAI/Gemini
     AI_API_KEY: Optional[str] = None
 
+    # LLM Clients (shared connection pool)
+    LLM_MODEL: str = "llama-3.3-70b-versatile"
+    LLM_CLIENT_MAX_ENTRIES: int = 64 # Distinct (key, model, params) clients kept
+    LLM_CLIENT_IDLE_SECONDS: int = 900 # Clients unused this long are dropped
+    LLM_HTTP_MAX_CONNECTIONS: int = 50
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_SECONDS: float = 60.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    LLM_MAX_RETRIES: int = 3 # Retries of a 429/5xx/connection failure, with jittered exponential backoff
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    LLM_RETRY_MAX_SECONDS: float = 20.0
+    LLM_QUEUE_MAX_WAIT_SECONDS: float = 60.0 # Calls that would wait longer for their key's rate budget fail fast
+    INTERVIEW_HEDGE_AFTER_SECONDS: float = 6.0 # A turn slower than this gets a duplicate request; 0 disables
+    LLM_RECORD_DIR: str = "" # If set, raw model outputs are saved here per call site (replay benchmark corpus)
+    LLM_PRICES_PER_MILLION: Dict[str, List[float]] = { # USD per 1M [prompt, completion] tokens, for cost counters
+        "llama-3.3-70b-versatile": [0.59, 0.79],
+        "llama-3.1-8b-instant": [0.05, 0.08],
+    }
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600 # Default lifetime of a cached response (Mongo TTL index)
+    LLM_CACHE_MEMORY_ENTRIES: int = 256
+    LLM_CACHE_DISABLED_SITES: List[str] = [] # Call sites that bypass the cache, e.g. ["roadmap"]
+
+    # Single-flight (identical AI requests in flight at once share one generation)
+    SINGLE_FLIGHT_BACKEND: str = "memory" # "mongo" to also coalesce across worker processes
+    SINGLE_FLIGHT_LEASE_SECONDS: int = 300 # A claim older than this is presumed dead and taken over
+    SINGLE_FLIGHT_RESULT_SECONDS: int = 30 # Shared results stay readable this long for slow pollers
+    SINGLE_FLIGHT_POLL_SECONDS: float = 0.5
+
+    # Offline providers (load testing without Groq / DuckDuckGo; see app/services/fake_providers.py)
+    LLM_PROVIDER: str = "groq" # "fake" answers every prompt locally
+    SEARCH_PROVIDER: str = "ddgs" # "fake" resolves roadmap resource searches locally
+    FAKE_SEED: int = 0
+    FAKE_LLM_TTFT_MEDIAN_SECONDS: float = 0.4 # Time to first token is log-normal between median and p99
+    FAKE_LLM_TTFT_P99_SECONDS: float = 2.5
+    FAKE_LLM_TOKENS_PER_SECOND: float = 250.0 # Output pace after the first token; 0 = instant
+    FAKE_LLM_ERROR_RATE: float = 0.0 # Share of calls failing with a 429, 503 or timeout
+    FAKE_SEARCH_MEDIAN_SECONDS: float = 0.3
+    FAKE_SEARCH_P99_SECONDS: float = 1.5
+    FAKE_SEARCH_ERROR_RATE: float = 0.0
+
+    # Interview memory (rolling summary of earlier exchanges, kept on the session document)
+    INTERVIEW_MEMORY_ENABLED: bool = True
+    INTERVIEW_RECENT_TURNS: int = 3 # Exchanges sent verbatim with each turn; older ones via the summary
+    INTERVIEW_MEMORY_LAG_TURNS: int = 2 # Extra verbatim exchanges allowed while a summary update is behind
+    INTERVIEW_MEMORY_SUMMARY_WORDS: int = 150
+    INTERVIEW_MEMORY_MAX_FACTS: int = 12
+    INTERVIEW_MEMORY_FACT_CHARS: int = 160 # Longer facts are cut, so the notes stay bounded
+    INTERVIEW_MEMORY_FOLD_BATCH: int = 6 # Most exchanges folded per model call (catching up older sessions)
+
+    # Roadmap
+    ROADMAP_ENRICH_CONCURRENCY: int = 4 # Skills whose resource links are resolved (web search) at once
+
+    # Project Intelligence (Repo Cloning)
+    REPO_BASE_DIR: str = "temp_repos"
+    CLONE_DEPTH: int = 1
+    CLONE_BLOB_LIMIT: str = "1m" # Skip blobs larger than this (git --filter syntax), empty to disable
+    CLONE_TIMEOUT_SECONDS: int = 120
+    CLONE_MAX_BYTES: int = 500 * 1024 * 1024
+    CLONE_POLL_SECONDS: float = 1.0
+    REPO_CACHE_DIR: str = "temp_repos/cache"
+    REPO_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+    REPO_CACHE_REF_TTL_SECONDS: int = 60 # Reuse a resolved HEAD without hitting the remote again
+    REPO_CACHE_TTL_SECONDS: int = 6 * 3600 # Idle checkouts are removed after this
+    REPO_MIN_FREE_BYTES: int = 1024 * 1024 * 1024 # Evict before a clone would leave less free disk than this
+    REPO_ORPHAN_GRACE_SECONDS: int = 3600 # Unmanaged dirs under REPO_BASE_DIR older than this are swept
+    REPO_JANITOR_INTERVAL_SECONDS: int = 300
+    REPO_LEASE_STALE_SECONDS: int = 900 # Lease markers not refreshed by their worker's janitor for this long are ignored
+
+    # Project Intelligence (Import Graph)
+    IMPORT_WORKERS: int = 0 # 0 = one per CPU core
+    IMPORT_PARALLEL_MIN_FILES: int = 2000 # Smaller repos are scanned serially
+    IMPORT_MIN_CHUNK_SIZE: int = 256
+    IMPORT_POOL_START_METHOD: str = "spawn" # fork is unsafe with the server's threads
+    ANALYSIS_STATE_DIR: str = "temp_repos/state" # Per-file results of the last analyzed commit per repo
+    ANALYSIS_STATE_TTL_SECONDS: int = 14 * 24 * 3600
+    README_CONTEXT_TOKENS: int = 6000 # Prompt budget for structure + dependencies + code snippets
+    ANALYSIS_STORE_RETRY_SECONDS: int = 60 # After a Mongo error, skip the results store this long
+
+    # Project Intelligence (Background Jobs)
+    JOB_MAX_CONCURRENCY: int = 2 # Pipelines running at once; the rest wait in order
+    JOB_TTL_SECONDS: int = 3600 # Finished jobs stay queryable this long
+    JOB_MAX_RETAINED: int = 200
+
+    # Project Intelligence (Admission Control)
+    ADMISSION_MAX_ACTIVE: int = 4 # Clone/analysis workloads running at once
+    ADMISSION_MAX_PER_USER: int = 2
+    ADMISSION_MAX_QUEUE: int = 16 # Beyond this, requests get 429 + Retry-After immediately
+    ADMISSION_MAX_WAIT_SECONDS: float = 30.0 # Max time a synchronous request waits for a slot
+    TRUSTED_PROXY_HOPS: int = 0 # Reverse proxies in front of the app (e.g. 1 on Render); 0 ignores X-Forwarded-For
+
     class Config:
         env_file = ".env"
         
@@ -4,10 +4,12 @@ import os
 # Force current directory to be first in sys.path to avoid importing 'app' from other projects
 sys.path.insert(0, os.getcwd())
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
 from app.api.v1.router import api_router
+from app.services.telemetry import telemetry
 # from app.core.database import engine, Base
 
 # Create tables
@@ -28,6 +30,18 @@ async def startup_db_client():
     except Exception as e:
         print(f"ERROR:    ❌ MongoDB Connection Failed: {e}")
 
+@app.on_event("startup")
+async def start_workspace_janitor():
+    # Sweeps temp_repos on startup and periodically: TTLs, disk budget, orphaned checkouts
+    import asyncio
+    from app.services.project_intelligence import project_intelligence_service
+    app.state.janitor = asyncio.create_task(project_intelligence_service.run_janitor())
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    from app.services.llm_client import llm_registry
+    await llm_registry.close()
+
 # CORS Configuration
 # origins = [
 #     "http://localhost:5173",
@@ -44,8 +58,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    # Per-request LLM/search/Mongo breakdown. Streamed responses send their headers before the
+    # model runs, so only the work done up to that point is listed; /metrics has the full picture.
+    breakdown, token = telemetry.begin_request()
+    try:
+        response = await call_next(request)
+    finally:
+        telemetry.end_request(token)
+    header = breakdown.server_timing()
+    if header:
+        response.headers["Server-Timing"] = header
+    return response
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
@@ -55,3 +84,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Prometheus text format: LLM calls, tokens, cost, cache hits, searches and Mongo commands per site
+    return PlainTextResponse(telemetry.prometheus(), media_type="text/plain; version=0.0.4")
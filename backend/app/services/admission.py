@@ -0,0 +1,176 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a workload can't be admitted; `retry_after` is a hint in seconds."""
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A reserved place in the admission queue. acquire() waits for a slot; release() frees it."""
+    def __init__(self, controller: "AdmissionController", user: str):
+        self.controller = controller
+        self.user = user
+        self.reserved_at = time.monotonic()
+        self.active = False
+        self.done = False
+        self._granted: Optional[asyncio.Future] = None
+
+    async def acquire(self, timeout: Optional[float] = None):
+        await self.controller._acquire(self, timeout)
+
+    def release(self):
+        self.controller._release(self)
+
+
+# --- Component 6: Admission Control ---
+class AdmissionController:
+    """
+    Global and per-user concurrency governor for clone/analysis workloads.
+    At most `max_active` workloads run at once (`max_per_user` per user); others wait in a FIFO
+    queue bounded at `max_queue`. A request that can't even be queued is rejected immediately
+    with a Retry-After estimate, so a burst degrades into fast 429s instead of piling up clones.
+    """
+    def __init__(self, max_active: Optional[int] = None, max_per_user: Optional[int] = None,
+                 max_queue: Optional[int] = None, max_wait: Optional[float] = None):
+        self.max_active = max_active or settings.ADMISSION_MAX_ACTIVE
+        self.max_per_user = max_per_user or settings.ADMISSION_MAX_PER_USER
+        self.max_queue = max_queue if max_queue is not None else settings.ADMISSION_MAX_QUEUE
+        self.max_wait = max_wait if max_wait is not None else settings.ADMISSION_MAX_WAIT_SECONDS
+        self._active: Dict[str, int] = {}
+        self._reserved: Dict[str, int] = {}  # Queued + active, per user
+        self._queue: Deque[Ticket] = deque()
+        self._avg_hold = 10.0  # EWMA of seconds a slot is held; seeds the Retry-After estimate
+        self._stats = {"admitted": 0, "rejected": 0, "timed_out": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+    @property
+    def active(self) -> int:
+        return sum(self._active.values())
+
+    def retry_after(self) -> int:
+        waves = (len(self._queue) + self.active) / self.max_active
+        return max(1, int(round(waves * self._avg_hold)))
+
+    def reserve(self, user: str) -> Ticket:
+        """Fast, synchronous check: returns a queued ticket or raises AdmissionRejected."""
+        if len(self._queue) >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise AdmissionRejected("Analysis capacity exhausted, try again later", self.retry_after())
+        # A user may hold max_per_user slots plus as many queued requests again
+        if self._reserved.get(user, 0) >= 2 * self.max_per_user:
+            self._stats["rejected"] += 1
+            raise AdmissionRejected("Too many concurrent analyses for this user", self.retry_after())
+        self._reserved[user] = self._reserved.get(user, 0) + 1
+        ticket = Ticket(self, user)
+        self._queue.append(ticket)
+        return ticket
+
+    def _can_run(self, ticket: Ticket) -> bool:
+        return self.active < self.max_active and self._active.get(ticket.user, 0) < self.max_per_user
+
+    def _grant(self, ticket: Ticket):
+        self._queue.remove(ticket)
+        ticket.active = True
+        self._active[ticket.user] = self._active.get(ticket.user, 0) + 1
+        waited = time.monotonic() - ticket.reserved_at
+        self._stats["admitted"] += 1
+        self._stats["wait_total"] += waited
+        self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        ticket.reserved_at = time.monotonic()
+
+    def _dispatch(self):
+        # First eligible ticket in FIFO order; a user at their limit doesn't block others
+        for ticket in list(self._queue):
+            if self.active >= self.max_active:
+                break
+            if ticket._granted is not None and not ticket._granted.done() and self._can_run(ticket):
+                self._grant(ticket)
+                ticket._granted.set_result(True)
+
+    async def _acquire(self, ticket: Ticket, timeout: Optional[float]):
+        ahead = list(self._queue)[:self._queue.index(ticket)]
+        if self._can_run(ticket) and not any(t._granted is not None and self._can_run(t) for t in ahead):
+            self._grant(ticket)
+            return
+        ticket._granted = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket._granted), timeout)
+        except asyncio.TimeoutError:
+            if ticket.active:
+                return
+            self._stats["timed_out"] += 1
+            self._abandon(ticket)
+            raise AdmissionRejected("Timed out waiting for analysis capacity", self.retry_after())
+        except asyncio.CancelledError:
+            if ticket.active:
+                self._release(ticket)
+            else:
+                self._abandon(ticket)
+            raise
+
+    def _abandon(self, ticket: Ticket):
+        if ticket.done:
+            return
+        ticket.done = True
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+        self._reserved[ticket.user] -= 1
+        if not self._reserved[ticket.user]:
+            del self._reserved[ticket.user]
+        self._dispatch()
+
+    def _release(self, ticket: Ticket):
+        if not ticket.active:
+            self._abandon(ticket)
+            return
+        if ticket.done:
+            return
+        ticket.done = True
+        ticket.active = False
+        held = time.monotonic() - ticket.reserved_at
+        self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+        self._active[ticket.user] -= 1
+        self._reserved[ticket.user] -= 1
+        if not self._active[ticket.user]:
+            del self._active[ticket.user]
+        if not self._reserved[ticket.user]:
+            del self._reserved[ticket.user]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, user: str, timeout: Optional[float] = -1):
+        """reserve() + acquire() + release(); `timeout` defaults to ADMISSION_MAX_WAIT_SECONDS."""
+        ticket = self.reserve(user)
+        try:
+            await ticket.acquire(self.max_wait if timeout == -1 else timeout)
+            yield ticket
+        finally:
+            ticket.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        admitted = self._stats["admitted"]
+        return {
+            "active": self.active,
+            "queued": len(self._queue),
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": admitted,
+            "rejected": self._stats["rejected"],
+            "timed_out": self._stats["timed_out"],
+            "avg_wait_seconds": round(self._stats["wait_total"] / admitted, 3) if admitted else 0.0,
+            "max_wait_seconds": round(self._stats["wait_max"], 3),
+            "avg_hold_seconds": round(self._avg_hold, 3),
+        }
+
+
+admission_controller = AdmissionController()
@@ -1,12 +1,100 @@
 import json
 import logging
-from typing import List, Dict, Any
-from langchain_groq import ChatGroq
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from app.core.config import settings
+from app.services.llm_client import llm_registry
+from app.services.llm_scheduler import llm_scheduler
+from app.services.interview_memory import recent_turns, exchanges_text, memory_text
 from langchain_core.prompts import PromptTemplate
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Output formats for a turn (PromptTemplate syntax: literal braces are doubled)
+TURN_JSON_FORMAT = """Output Format: JSON
+        {{
+            "feedback_snapshot": "Brief internal rating (e.g. 'Good understanding of HashMaps')",
+            "next_question": "The next question text",
+            "type": "Follow-up/New Topic",
+            "difficulty": "Easy/Medium/Hard"
+        }}"""
+
+META_MARKER = "###META###"
+TURN_STREAM_FORMAT = f"""Output Format: plain text in exactly two parts, nothing before or after.
+        First the next question text, exactly as you would say it to the candidate (no label, no quotes).
+        Then a line containing only {META_MARKER}, followed by one line of JSON:
+        {{{{"feedback_snapshot": "Brief internal rating (e.g. 'Good understanding of HashMaps')", "type": "Follow-up/New Topic", "difficulty": "Easy/Medium/Hard"}}}}"""
+
+
+class TurnStreamParser:
+    """
+    Incrementally splits a streamed TURN_STREAM_FORMAT response: question text is released as it
+    arrives (holding back just enough to never leak a partial marker), the metadata is parsed at the end.
+    Models that answer in JSON anyway are buffered and parsed as a whole.
+    """
+    def __init__(self):
+        self._question: List[str] = []
+        self._pending = ""
+        self._meta: Optional[str] = None
+        self._json: Optional[str] = None
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        if self._json is not None:
+            self._json += chunk
+            return ""
+        if self._meta is not None:
+            self._meta += chunk
+            return ""
+
+        text = self._pending + chunk
+        self._pending = ""
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+            if text[0] in "{`":
+                self._json = text
+                return ""
+
+        idx = text.find(META_MARKER)
+        if idx != -1:
+            self._meta = text[idx + len(META_MARKER):]
+            out = text[:idx]
+        else:
+            keep = next((k for k in range(min(len(text), len(META_MARKER) - 1), 0, -1)
+                         if META_MARKER.startswith(text[-k:])), 0)
+            out, self._pending = text[:len(text) - keep], text[len(text) - keep:]
+        self._question.append(out)
+        return out
+
+    def finish(self) -> Tuple[str, Dict[str, Any]]:
+        """(text not yet released, turn dict shaped like process_turn()'s result)."""
+        if self._json is not None:
+            content = self._json.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+            turn = json.loads(content)
+            return turn.get("next_question", ""), turn
+
+        tail, self._pending = self._pending, ""
+        self._question.append(tail)
+        meta: Dict[str, Any] = {}
+        if self._meta and "{" in self._meta:
+            try:
+                meta = json.loads(self._meta[self._meta.find("{"):self._meta.rfind("}") + 1])
+            except ValueError:
+                logger.warning("Unparseable turn metadata; keeping the question only")
+        question = "".join(self._question).strip()
+        if not question:
+            raise ValueError("Empty question in streamed turn")
+        return tail, {
+            "feedback_snapshot": meta.get("feedback_snapshot"),
+            "next_question": question,
+            "type": meta.get("type"),
+            "difficulty": meta.get("difficulty"),
+        }
+
+
 class AIInterviewService:
     def __init__(self):
         # We will initialize LLM dynamically with the user's key
@@ -60,13 +148,9 @@ class AIInterviewService:
             input_variables=["role", "company", "type"]
         )
         
-        chain = prompt | llm
         try:
-            response = await chain.ainvoke({
-                "role": role,
-                "company": company,
-                "type": type
-            })
+            response = await llm_scheduler.ainvoke(llm, prompt.format(role=role, company=company, type=type),
+                                                   site="interview_start")
             content = self._clean_json(response.content)
             return json.loads(content)
         except Exception as e:
@@ -79,26 +163,70 @@ class AIInterviewService:
                            role: str,
                            company: str,
                            api_key: str,
-                           resume_context: Dict[str, Any] = None) -> Dict[str, Any]:
+                           resume_context: Dict[str, Any] = None,
+                           memory: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Analyzes the user's answer and generates the NEXT question or follow-up.
+        `memory` is the session's rolling summary of the exchanges before the recent ones.
         """
-        llm = self._get_llm(api_key)
-        
+        prompt, variables = self._turn_prompt(history, last_answer, role, company, resume_context, memory, TURN_JSON_FORMAT)
+        try:
+            # Latency-critical: a turn stuck behind a slow upstream replica gets a second request
+            response = await llm_scheduler.ainvoke(self._get_llm(api_key), prompt.format(**variables),
+                                                   site="interview_turn", hedge_after=settings.INTERVIEW_HEDGE_AFTER_SECONDS)
+            content = self._clean_json(response.content)
+            return json.loads(content)
+        except Exception as e:
+            logger.error(f"Failed to process turn: {e}")
+            raise e
+
+    async def stream_turn(self,
+                          history: List[Dict],
+                          last_answer: str,
+                          role: str,
+                          company: str,
+                          api_key: str,
+                          resume_context: Dict[str, Any] = None,
+                          memory: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming version of process_turn(). The model writes the question first and the feedback
+        metadata after it, so the question can be shown as it is generated.
+        Yields {"type": "token", "text"} events, then {"type": "done", "turn": <process_turn() shape>}.
+        """
+        prompt, variables = self._turn_prompt(history, last_answer, role, company, resume_context, memory, TURN_STREAM_FORMAT)
+        parser = TurnStreamParser()
+        try:
+            async for chunk in llm_scheduler.astream(self._get_llm(api_key), prompt.format(**variables),
+                                                     site="interview_turn", hedge_after=settings.INTERVIEW_HEDGE_AFTER_SECONDS):
+                text = parser.feed(chunk.content)
+                if text:
+                    yield {"type": "token", "text": text}
+            tail, turn = parser.finish()
+        except Exception as e:
+            logger.error(f"Failed to stream turn: {e}")
+            raise e
+        if tail:
+            yield {"type": "token", "text": tail}
+        yield {"type": "done", "turn": turn}
+
+    def _turn_prompt(self, history: List[Dict], last_answer: str, role: str, company: str,
+                     resume_context: Dict[str, Any], memory: Optional[Dict[str, Any]],
+                     output_format: str) -> Tuple[PromptTemplate, Dict[str, Any]]:
         resume_instruction = ""
         if resume_context:
             resume_instruction = "Verify their claims against their resume. If they struggle, point out the discrepancy with what they claimed."
 
-        # Construct simplified history for context
-        history_text = ""
-        for turn in history[-3:]: # Keep last 3 turns for context
-            history_text += f"Interviewer: {turn.get('question')}\nCandidate: {turn.get('user_answer')}\n"
+        # Recent exchanges verbatim, everything earlier through the rolling summary: constant-size prompt
+        history_text = exchanges_text(recent_turns(history, memory))
 
         prompt_template = f"""
         You are a Senior {{role}} Interviewer at a {{company}} company.
         {resume_instruction}
         
-        Conversation History:
+        Earlier in this interview (your notes):
+        {{memory_text}}
+        
+        Recent Conversation:
         {{history_text}}
         
         Candidate's Last Answer: "{{last_answer}}"
@@ -110,41 +238,24 @@ class AIInterviewService:
            - If answer is vauge: Ask for clarification.
            - If answer is wrong: corrections? No, in an interview you typically probe or move on.
            
-        Output Format: JSON
-        {{{{
-            "feedback_snapshot": "Brief internal rating (e.g. 'Good understanding of HashMaps')",
-            "next_question": "The next question text",
-            "type": "Follow-up/New Topic",
-            "difficulty": "Easy/Medium/Hard"
-        }}}}
+        {output_format}
         """
         
         prompt = PromptTemplate(
             template=prompt_template,
-            input_variables=["role", "company", "history_text", "last_answer"]
+            input_variables=["role", "company", "memory_text", "history_text", "last_answer"]
         )
-        
-        chain = prompt | llm
-        try:
-            response = await chain.ainvoke({
-                "role": role,
-                "company": company,
-                "history_text": history_text,
-                "last_answer": last_answer
-            })
-            content = self._clean_json(response.content)
-            return json.loads(content)
-        except Exception as e:
-            logger.error(f"Failed to process turn: {e}")
-            raise e
+        return prompt, {
+            "role": role,
+            "company": company,
+            "memory_text": memory_text(memory),
+            "history_text": history_text,
+            "last_answer": last_answer
+        }
 
     def _get_llm(self, api_key: str):
-        return ChatGroq(
-            temperature=0.7,
-            groq_api_key=api_key,
-            model_name="llama-3.3-70b-versatile",
-            max_tokens=2000
-        )
+        # Shared per (key, params): no new HTTP client/TLS handshake per turn
+        return llm_registry.get(api_key, temperature=0.7, max_tokens=2000)
         
     def _clean_json(self, content: str) -> str:
         """Helper to clean LLM markdown response"""
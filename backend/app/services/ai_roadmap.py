@@ -1,8 +1,15 @@
+import re
 import json
+import asyncio
 import logging
-from langchain_groq import ChatGroq
+from app.core.config import settings
+from app.services.llm_client import llm_registry, key_fingerprint
+from app.services.llm_cache import llm_cache, normalize_prompt
+from app.services.single_flight import single_flight, flight_key
+from app.services.json_stream import JsonStreamParser
+from app.services.telemetry import telemetry
 from langchain_core.prompts import PromptTemplate
-from typing import Optional
+from typing import AsyncIterator, Dict, Optional
 try:
     from ddgs import DDGS
 except ImportError:
@@ -10,6 +17,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Values of the streamed roadmap JSON that are acted on as soon as they are complete
+ROADMAP_STREAM_PATHS = [(), ("title",), ("description",), ("levels", "*"), ("levels", "*", "tracks", "*", "skills", "*")]
+
 class AIRoadmapService:
     def __init__(self):
         pass
@@ -19,7 +29,34 @@ class AIRoadmapService:
         Generates a NeetCode-style roadmap.
         If api_key is provided, uses Groq.
         Otherwise, falls back to simulation.
+        Identical requests already in flight (double clicks, several tabs) share one generation.
+        """
+        key = flight_key("roadmap", **self._flight_inputs(role, days, weak_patterns, api_key))
+        return await single_flight.do(key, lambda: self._generate_roadmap(role, days, weak_patterns, api_key))
+
+    async def stream_roadmap(self, role: str, days: int, weak_patterns: list[str],
+                             api_key: Optional[str] = None) -> AsyncIterator[dict]:
+        """
+        Streaming version of generate_roadmap(). Events:
+          {"type": "field", "name", "value"}   top-level fields (title, description) as soon as generated
+          {"type": "level", "index", "level"}  each level, resources enriched, in order
+          {"type": "reset"}                    generation failed midway; discard levels, a simulation follows
+          {"type": "done", "roadmap"}          the complete roadmap
+        A duplicate stream joins the one in flight and first receives the events it missed.
         """
+        key = flight_key("roadmap-stream", **self._flight_inputs(role, days, weak_patterns, api_key))
+        async for event in single_flight.stream(key, lambda: self._stream_roadmap(role, days, weak_patterns, api_key)):
+            yield event
+
+    def _flight_inputs(self, role: str, days: int, weak_patterns: list[str], api_key: Optional[str]) -> dict:
+        return {
+            "role": normalize_prompt(role).casefold(),
+            "days": days,
+            "weak_patterns": sorted({normalize_prompt(p).casefold() for p in weak_patterns if p.strip()}),
+            "api_key": key_fingerprint(api_key) if api_key else None,
+        }
+
+    async def _generate_roadmap(self, role: str, days: int, weak_patterns: list[str], api_key: Optional[str]) -> dict:
         if api_key:
             try:
                 print(f"DEBUG: Attempting Real AI Generation for {role} using Groq. Key Length: {len(api_key)}")
@@ -41,16 +78,134 @@ class AIRoadmapService:
             logger.info("No API Key provided. Using simulation mode.")
             return self._get_simulated_response(role, weak_patterns)
 
+    async def _stream_roadmap(self, role: str, days: int, weak_patterns: list[str],
+                              api_key: Optional[str]) -> AsyncIterator[dict]:
+        emitted = False
+        if api_key:
+            try:
+                logger.info(f"Streaming real AI roadmap for role: {role}")
+                async for event in self._stream_real_ai(role, days, weak_patterns, api_key):
+                    emitted = True
+                    yield event
+                return
+            except Exception as e:
+                logger.error(f"AI Generation failed: {e}")
+                logger.info("Falling back to simulation.")
+                if emitted:
+                    yield {"type": "reset"}
+        else:
+            logger.info("No API Key provided. Using simulation mode.")
+
+        roadmap = self._get_simulated_response(role, weak_patterns)
+        for name in ("title", "description"):
+            yield {"type": "field", "name": name, "value": roadmap[name]}
+        for index, level in enumerate(roadmap["levels"]):
+            yield {"type": "level", "index": index, "level": level}
+        yield {"type": "done", "roadmap": roadmap}
+
     async def _generate_real_ai(self, role, days, weak_patterns, api_key):
-        print(f"DEBUG: Entering _generate_real_ai with Groq model llama-3.3-70b-versatile")
-        
-        llm = ChatGroq(
+        async for event in self._stream_real_ai(role, days, weak_patterns, api_key):
+            if event["type"] == "done":
+                return event["roadmap"]
+        raise ValueError("Roadmap stream ended without a result")
+
+    async def _stream_real_ai(self, role, days, weak_patterns, api_key) -> AsyncIterator[dict]:
+        """
+        Parses the model's JSON while it streams. Each skill's resources are enriched as soon as the
+        skill is complete, so by the time a level closes most of its lookups are already done; levels
+        are then emitted in order while generation of the next ones continues.
+        """
+        llm = llm_registry.get(
+            api_key,
             temperature=0.7,
-            groq_api_key=api_key,
-            model_name="llama-3.3-70b-versatile",
             max_tokens=8000 # Increase token limit for long JSONs
         )
-        
+        prompt = self._build_prompt(role, weak_patterns)
+        slots = asyncio.Semaphore(settings.ROADMAP_ENRICH_CONCURRENCY)
+        parser = JsonStreamParser(ROADMAP_STREAM_PATHS)
+        queue: asyncio.Queue = asyncio.Queue()
+        skill_tasks: Dict[tuple, asyncio.Task] = {}
+
+        async def produce():
+            try:
+                # Popular roles without weak patterns repeat the exact prompt; cached for a day so answers still vary
+                async for chunk in llm_cache.astream(llm, prompt, site="roadmap", validate=self._parse_roadmap,
+                                                     ttl_seconds=24 * 3600):
+                    for path, value in parser.feed(chunk):
+                        if path == ():
+                            await queue.put(("root", value))
+                        elif len(path) == 1:
+                            await queue.put(("field", path[0], value))
+                        elif len(path) == 2:
+                            level_tasks = {p: t for p, t in skill_tasks.items() if p[1] == path[1]}
+                            await queue.put(("level", path[1], asyncio.create_task(
+                                self._finish_level(value, level_tasks))))
+                        else:
+                            skill_tasks[path] = asyncio.create_task(self._enrich_skill(value, slots))
+                await queue.put(("end",))
+            except Exception as e:
+                await queue.put(("error", e))
+
+        producer = asyncio.create_task(produce())
+        root, fields, emitted = None, {}, {}
+        try:
+            while True:
+                item = await queue.get()
+                if item[0] == "error":
+                    raise item[1]
+                if item[0] == "end":
+                    break
+                if item[0] == "root":
+                    root = item[1]
+                elif item[0] == "field":
+                    fields[item[1]] = item[2]
+                    yield {"type": "field", "name": item[1], "value": item[2]}
+                else:
+                    emitted[item[1]] = await item[2]
+                    yield {"type": "level", "index": item[1], "level": emitted[item[1]]}
+        finally:
+            producer.cancel()
+            for task in skill_tasks.values():
+                task.cancel()
+
+        lost_level = any(len(path) == 2 and path[0] == "levels" for path in parser.skipped)
+        if root is None and emitted and not lost_level:
+            # Every level arrived intact but the document around them didn't (e.g. a trailing comma)
+            root = {"is_simulated": False, **fields}
+        if root is None or not emitted:
+            # Not streamable (e.g. malformed JSON): parse the whole response, keeping the levels already sent
+            root = self._parse_roadmap(parser.text)
+            if root and "levels" in root:
+                missing = [i for i in range(len(root["levels"])) if i not in emitted]
+                await self._enrich_resources({"levels": [root["levels"][i] for i in missing]}, slots)
+                self._ensure_skill_ids(root["levels"])
+                for index in missing:
+                    yield {"type": "level", "index": index, "level": root["levels"][index]}
+                for index, level in emitted.items():
+                    if index < len(root["levels"]):
+                        root["levels"][index] = level
+        else:
+            root["levels"] = [emitted[i] for i in sorted(emitted)]
+        yield {"type": "done", "roadmap": root}
+
+    async def _finish_level(self, level: dict, skill_tasks: Dict[tuple, asyncio.Task]) -> dict:
+        # The level was decoded separately from its skills: swap in the enriched copies
+        for path, task in skill_tasks.items():
+            _, _, _, track_index, _, skill_index = path
+            level["tracks"][track_index]["skills"][skill_index] = await task
+        self._ensure_skill_ids([level])
+        return level
+
+    def _ensure_skill_ids(self, levels: list):
+        # ENFORCE IDs
+        for level in levels:
+            for track in level.get("tracks", []):
+                for skill in track.get("skills", []):
+                    if "id" not in skill or not skill["id"]:
+                        slug = skill.get("name", "unknown").lower().replace(" & ", "-").replace(" ", "-")
+                        skill["id"] = slug
+
+    def _build_prompt(self, role: str, weak_patterns: list[str]) -> str:
         # NOTE: We use double curly braces {{ }} for JSON structure to escape them in f-strings/PromptTemplate
         prompt_template = """
         You are an expert Software Engineering Placement Mentor with experience in backend, AI/ML, data, and full-stack roles.
@@ -141,14 +296,10 @@ class AIRoadmapService:
             template=prompt_template,
             input_variables=["role"]
         )
-        
-        chain = prompt | llm
-        
-        response = await chain.ainvoke({
-            "role": role
-        })
-        
-        content = response.content.strip()
+        return prompt.format(role=role)
+
+    def _parse_roadmap(self, content: str) -> dict:
+        content = content.strip()
         print(f"DEBUG: Raw LLM Response: {content[:500]}...")
         
         import re
@@ -158,7 +309,7 @@ class AIRoadmapService:
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
             if json_match:
                 json_str = json_match.group(0)
-                data = json.loads(json_str)
+                data = self._loads_lenient(json_str)
             else:
                 raise ValueError("No JSON found in response")
         except json.JSONDecodeError:
@@ -166,105 +317,117 @@ class AIRoadmapService:
                 content = content[7:]
              if content.endswith("```"):
                 content = content[:-3]
-             data = json.loads(content)
-             
-        # ENFORCE IDs
-        if data and "levels" in data:
-            data = await self._enrich_resources(data) # Changed name to generic enrichment
-            for level in data["levels"]:
-                for track in level.get("tracks", []):
-                    for skill in track.get("skills", []):
-                        if "id" not in skill or not skill["id"]:
-                            slug = skill.get("name", "unknown").lower().replace(" & ", "-").replace(" ", "-")
-                            skill["id"] = slug
-                            
+             data = self._loads_lenient(content)
         return data
 
-    async def _enrich_resources(self, data):
+    @staticmethod
+    def _loads_lenient(text: str):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            # Models often leave trailing commas; only retried once strict parsing has failed
+            return json.loads(re.sub(r',\s*([}\]])', r'\1', text))
+
+    async def _enrich_resources(self, data, slots: Optional[asyncio.Semaphore] = None):
         """
         Scans the roadmap for 'SEARCH:' (YouTube) and 'GITHUB:' (DuckDuckGo) URLs and resolves them.
         """
-        import asyncio
         logger.info("Starting Resource Enrichment...")
+        slots = slots or asyncio.Semaphore(settings.ROADMAP_ENRICH_CONCURRENCY)
         
         try:
-            for level in data.get("levels", []):
-                for track in level.get("tracks", []):
-                    for skill in track.get("skills", []):
-                        for resource in skill.get("resources", []):
-                            url = resource.get("url", "")
-                            
-                            # 1. YouTube Handler
-                            if url.startswith("SEARCH:"):
-                                query = url.replace("SEARCH:", "").strip()
-                                print(f"DEBUG: Resolving YouTube: {query}")
-                                try:
-                                    # Use DDGS for Video Search (Replacing broken youtube-search-python)
-                                    loop = asyncio.get_event_loop()
-                                    def _yt_search():
-                                        with DDGS() as ddgs:
-                                            # Search for videos
-                                            results = list(ddgs.videos(query, max_results=1))
-                                            return results
-                                    
-                                    results = await loop.run_in_executor(None, _yt_search)
-                                    
-                                    if results:
-                                        # DDGS video result usually has 'content' as URL or 'json' data
-                                        # Looking at the test output, it seems to return a dict with 'content' as the link
-                                        video_link = results[0].get('content') 
-                                        if not video_link:
-                                             video_link = results[0].get('embed_url') # Fallback
-                                        
-                                        if video_link:
-                                            resource['url'] = video_link
-                                            print(f"DEBUG: Resolved to {video_link}")
-                                        else:
-                                            resource['url'] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
-                                    else:
-                                        resource['url'] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
-                                        
-                                except Exception as e:
-                                    print(f"YouTube Error: {e}")
-                                    resource['url'] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
-                                    
-                            # 2. GitHub Handler
-                            elif url.startswith("GITHUB:"):
-                                query = url.replace("GITHUB:", "").strip()
-                                print(f"DEBUG: Resolving GitHub: {query}")
-                                try:
-                                    # Run DDGS in executor to avoid blocking loop
-                                    loop = asyncio.get_event_loop()
-                                    def _gh_search():
-                                        # Search filtering for github.com
-                                        with DDGS() as ddgs:
-                                            # site:github.com "query"
-                                            # We try to get top 2 results and pick the best non-official-looking one if possible,
-                                            # or just the top result.
-                                            results = list(ddgs.text(f"site:github.com {query}", max_results=1))
-                                            return results
-                                    
-                                    results = await loop.run_in_executor(None, _gh_search)
-                                    if results:
-                                        found_url = results[0]['href']
-                                        resource['url'] = found_url
-                                        print(f"DEBUG: GitHub Resolved: {found_url}")
-                                    else:
-                                        # Fallback to general search
-                                        resource['url'] = f"https://github.com/search?q={query.replace(' ', '+')}"
-                                        
-                                except Exception as e:
-                                    print(f"GitHub Search Error: {e}")
-                                    resource['url'] = f"https://github.com/search?q={query.replace(' ', '+')}"
-
-                            # 3. Validation & Sanitization (Final Pass)
-                            resource['url'] = self._sanitize_url(resource['url'])
-
+            skills = [skill for level in data.get("levels", [])
+                      for track in level.get("tracks", [])
+                      for skill in track.get("skills", [])]
+            await asyncio.gather(*(self._enrich_skill(skill, slots) for skill in skills))
             return data
         except Exception as e:
             logger.error(f"Enrichment Error: {e}")
             return data
 
+    async def _enrich_skill(self, skill: dict, slots: asyncio.Semaphore) -> dict:
+        """Resolves one skill's resources; `slots` bounds concurrent web searches across skills."""
+        async with slots:
+            for resource in skill.get("resources", []):
+                try:
+                    await self._enrich_resource(resource)
+                except Exception as e:
+                    logger.error(f"Enrichment Error: {e}")
+        return skill
+
+    async def _enrich_resource(self, resource: dict):
+        url = resource.get("url", "")
+
+        # 1. YouTube Handler
+        if url.startswith("SEARCH:"):
+            query = url.replace("SEARCH:", "").strip()
+            print(f"DEBUG: Resolving YouTube: {query}")
+            try:
+                # Use DDGS for Video Search (Replacing broken youtube-search-python)
+                def _yt_search():
+                    with self._search_client() as ddgs:
+                        # Search for videos
+                        results = list(ddgs.videos(query, max_results=1))
+                        return results
+
+                results = await telemetry.track_search("youtube", asyncio.to_thread(_yt_search))
+
+                if results:
+                    # DDGS video result usually has 'content' as URL or 'json' data
+                    # Looking at the test output, it seems to return a dict with 'content' as the link
+                    video_link = results[0].get('content') 
+                    if not video_link:
+                         video_link = results[0].get('embed_url') # Fallback
+
+                    if video_link:
+                        resource['url'] = video_link
+                        print(f"DEBUG: Resolved to {video_link}")
+                    else:
+                        resource['url'] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
+                else:
+                    resource['url'] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
+
+            except Exception as e:
+                print(f"YouTube Error: {e}")
+                resource['url'] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
+
+        # 2. GitHub Handler
+        elif url.startswith("GITHUB:"):
+            query = url.replace("GITHUB:", "").strip()
+            print(f"DEBUG: Resolving GitHub: {query}")
+            try:
+                # Run DDGS in executor to avoid blocking loop
+                def _gh_search():
+                    # Search filtering for github.com
+                    with self._search_client() as ddgs:
+                        # site:github.com "query"
+                        # We try to get top 2 results and pick the best non-official-looking one if possible,
+                        # or just the top result.
+                        results = list(ddgs.text(f"site:github.com {query}", max_results=1))
+                        return results
+
+                results = await telemetry.track_search("github", asyncio.to_thread(_gh_search))
+                if results:
+                    found_url = results[0]['href']
+                    resource['url'] = found_url
+                    print(f"DEBUG: GitHub Resolved: {found_url}")
+                else:
+                    # Fallback to general search
+                    resource['url'] = f"https://github.com/search?q={query.replace(' ', '+')}"
+
+            except Exception as e:
+                print(f"GitHub Search Error: {e}")
+                resource['url'] = f"https://github.com/search?q={query.replace(' ', '+')}"
+
+        # 3. Validation & Sanitization (Final Pass)
+        resource['url'] = self._sanitize_url(resource['url'])
+
+    def _search_client(self):
+        if settings.SEARCH_PROVIDER == "fake":
+            from app.services.fake_providers import FakeSearch
+            return FakeSearch()
+        return DDGS()
+
     def _sanitize_url(self, url: str) -> str:
         """
         Ensures strict HTTP/HTTPS formatting to preventing local file access behavior.
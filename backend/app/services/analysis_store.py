@@ -0,0 +1,104 @@
+import json
+import time
+import zlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+from bson.binary import Binary
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.database import db
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever analysis output changes shape or meaning; older results are then ignored
+ANALYZER_VERSION = 1
+COMPRESS_MIN_BYTES = 4096
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """Stage values are stored inline when small, as zlib-compressed JSON otherwise."""
+    raw = json.dumps(value, separators=(',', ':')).encode()
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return {"v": value}
+    return {"z": Binary(zlib.compress(raw, 6)), "n": len(raw)}
+
+
+def decode_value(stored: Dict[str, Any]) -> Any:
+    if "z" in stored:
+        return json.loads(zlib.decompress(stored["z"]))
+    return stored.get("v")
+
+
+# --- Component 7: Analysis Store ---
+class AnalysisStore:
+    """
+    Mongo-backed store of per-commit analysis results (`project_analyses`), one document per
+    (repo URL, commit SHA, analyzer version). Each pipeline stage writes its own field, so a
+    partially analyzed commit still serves the stages that are done.
+    Mongo being unreachable never fails an analysis: the store goes quiet for a while instead.
+    """
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else db.project_analyses
+        self._disabled_until = 0.0
+        self._indexed = False
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _failed(self, action: str, e: Exception):
+        logger.warning(f"Analysis store {action} failed, disabling for {settings.ANALYSIS_STORE_RETRY_SECONDS}s: {e}")
+        self._disabled_until = time.monotonic() + settings.ANALYSIS_STORE_RETRY_SECONDS
+
+    def _ensure_indexes(self):
+        if not self._indexed:
+            self.collection.create_index([("repo_url", 1), ("commit", 1), ("analyzer_version", 1)], unique=True)
+            self._indexed = True
+
+    @staticmethod
+    def _doc_id(cache_key: str) -> str:
+        # The cache key already pins (normalized URL, commit)
+        return f"{cache_key}:v{ANALYZER_VERSION}"
+
+    def get(self, cache_key: str, stages: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """{"repo_url", "commit", "stages": {name: value}} with only the requested stages that are stored."""
+        if not self._available():
+            return None
+        stages = list(stages)
+        try:
+            doc = self.collection.find_one(
+                {"_id": self._doc_id(cache_key)},
+                {"repo_url": 1, "commit": 1, **{f"stages.{s}": 1 for s in stages}},
+            )
+        except PyMongoError as e:
+            self._failed("read", e)
+            return None
+        if not doc:
+            return None
+        stored = doc.get("stages", {})
+        return {
+            "repo_url": doc.get("repo_url"),
+            "commit": doc.get("commit"),
+            "stages": {s: decode_value(stored[s]) for s in stages if s in stored},
+        }
+
+    def put(self, cache_key: str, repo_url: str, commit: str, stage: str, value: Any):
+        if not self._available():
+            return
+        now = datetime.utcnow()
+        try:
+            self._ensure_indexes()
+            self.collection.update_one(
+                {"_id": self._doc_id(cache_key)},
+                {
+                    "$set": {f"stages.{stage}": encode_value(value), "updated_at": now},
+                    "$setOnInsert": {"repo_url": repo_url, "commit": commit,
+                                     "analyzer_version": ANALYZER_VERSION, "created_at": now},
+                },
+                upsert=True,
+            )
+        except PyMongoError as e:
+            self._failed("write", e)
+
+
+analysis_store = AnalysisStore()
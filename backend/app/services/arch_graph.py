@@ -0,0 +1,202 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_CLUSTERS = 40  # Nodes per rendered view; beyond this, files are collapsed into packages
+
+
+def build_graph(paths: Iterable[str], import_edges: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Compact, JSON-ready file graph. Node ids are list positions; arrays are columnar so that
+    10k+ node graphs stay small on the wire:
+      nodes: {"path": [...], "dir": [dir id, ...]}
+      dirs:  {"path": [...], "parent": [dir id or -1, ...]}   (id 0 is the repo root "")
+      edges: [[source id, target id], ...]
+    """
+    node_paths = sorted(set(paths))
+    node_ids = {p: i for i, p in enumerate(node_paths)}
+
+    dir_paths: List[str] = [""]
+    dir_parents: List[int] = [-1]
+    dir_ids = {"": 0}
+
+    def dir_id(path: str) -> int:
+        if path in dir_ids:
+            return dir_ids[path]
+        parent = dir_id(path.rpartition('/')[0])
+        dir_ids[path] = len(dir_paths)
+        dir_paths.append(path)
+        dir_parents.append(parent)
+        return dir_ids[path]
+
+    node_dirs = [dir_id(p.rpartition('/')[0]) for p in node_paths]
+    edges = sorted({(node_ids[s], node_ids[t]) for s, t in import_edges
+                    if s in node_ids and t in node_ids and s != t})
+    return {
+        "nodes": {"path": node_paths, "dir": node_dirs},
+        "dirs": {"path": dir_paths, "parent": dir_parents},
+        "edges": [list(e) for e in edges],
+    }
+
+
+def _normalize_prefix(prefix: str) -> str:
+    prefix = (prefix or "").strip('/')
+    return prefix + '/' if prefix else ""
+
+
+def _group_key(path: str, prefix: str, depth: int) -> Tuple[str, str]:
+    """(key, kind): the first `depth` directory levels below `prefix`, or the file itself if shallower."""
+    rest = path[len(prefix):]
+    parts = rest.split('/')
+    if len(parts) - 1 < depth:
+        return path, "file"
+    return prefix + '/'.join(parts[:depth]) + '/', "dir"
+
+
+def _name_ranges(keys: List[str], prefix: str, buckets: int) -> Dict[str, str]:
+    """Sorted keys split into at most `buckets` contiguous runs, each keyed by its first and last name."""
+    keys = sorted(keys)
+    size = -(-len(keys) // max(1, buckets))
+    out = {}
+    for start in range(0, len(keys), size):
+        run = keys[start:start + size]
+        first, last = (k[len(prefix):].rstrip('/') for k in (run[0], run[-1]))
+        label = prefix + (first if first == last else f"{first} … {last}")
+        out.update((k, label) for k in run)
+    return out
+
+
+def _fit_groups(groups: Set[Tuple[str, str]], prefix: str, max_clusters: int) -> Dict[str, Tuple[str, str]]:
+    """
+    Maps each group key to the cluster it is drawn as. Groups that already fit are kept; otherwise the
+    loose files (a large flat directory) are bucketed by extension, or by name range if even that is too
+    many, and directories get name-range buckets too when they alone overflow the view.
+    """
+    fitted = {key: (key, kind) for key, kind in groups}
+    if len(groups) <= max_clusters:
+        return fitted
+    dirs = [key for key, kind in groups if kind == "dir"]
+    files = [key for key, kind in groups if kind == "file"]
+    if len(dirs) >= max_clusters:
+        return {key: (label, "group") for key, label in _name_ranges(dirs + files, prefix, max_clusters).items()}
+
+    room = max_clusters - len(dirs)
+    by_ext: Dict[str, List[str]] = {}
+    for key in files:
+        name = key.rpartition('/')[2]
+        ext = name[name.rfind('.'):] if '.' in name.lstrip('.') else ""
+        by_ext.setdefault(f"{key.rpartition('/')[0]}/*{ext}".lstrip('/'), []).append(key)
+    if len(by_ext) <= room:
+        fitted.update((key, (label, "group")) for label, keys in by_ext.items() for key in keys)
+    else:
+        fitted.update((key, (label, "group")) for key, label in _name_ranges(files, prefix, room).items())
+    return fitted
+
+
+def cluster_view(graph: Dict[str, Any], prefix: str = "", max_clusters: int = MAX_CLUSTERS) -> Dict[str, Any]:
+    """
+    Collapses the files under `prefix` into package clusters, as deep as fits in `max_clusters`.
+    Too many entries at the top level (e.g. a flat directory of 10k files) are bucketed, so a view never
+    has more than `max_clusters` internal and `max_clusters` external nodes. Every import edge is kept, aggregated into weighted cluster edges; edges that leave the prefix
+    point at "external" clusters (their top-level package), so nothing is dropped silently.
+    """
+    prefix = _normalize_prefix(prefix)
+    paths: List[str] = graph["nodes"]["path"]
+    inside = [i for i, p in enumerate(paths) if p.startswith(prefix)]
+
+    # Deepest grouping that still fits; stop once deeper levels no longer change anything
+    depth = 1
+    while True:
+        groups = {_group_key(paths[i], prefix, depth + 1) for i in inside}
+        if len(groups) > max_clusters or groups == {_group_key(paths[i], prefix, depth) for i in inside}:
+            break
+        depth += 1
+    fitted = _fit_groups({_group_key(paths[i], prefix, depth) for i in inside}, prefix, max_clusters)
+
+    clusters: List[Dict[str, Any]] = []
+    cluster_ids: Dict[str, int] = {}
+
+    def cluster(key: str, kind: str) -> int:
+        if key not in cluster_ids:
+            cluster_ids[key] = len(clusters)
+            clusters.append({"id": len(clusters), "key": key, "kind": kind, "size": 0, "internal_edges": 0})
+        return cluster_ids[key]
+
+    node_cluster: Dict[int, int] = {}
+    for i in inside:
+        cid = cluster(*fitted[_group_key(paths[i], prefix, depth)[0]])
+        clusters[cid]["size"] += 1
+        node_cluster[i] = cid
+
+    weights: Dict[Tuple[int, int], int] = {}
+    external = 0
+    external_keys: Set[str] = set()
+    for source, target in graph["edges"]:
+        s_in, t_in = source in node_cluster, target in node_cluster
+        if not s_in and not t_in:
+            continue
+        if s_in and t_in:
+            a, b = node_cluster[source], node_cluster[target]
+            if a == b:
+                clusters[a]["internal_edges"] += 1
+                continue
+        else:
+            other = target if s_in else source
+            top = paths[other].split('/')[0]
+            key = f"{top}/" if '/' in paths[other] else paths[other]
+            if key not in external_keys and len(external_keys) >= max_clusters - 1:
+                key = "(other)"
+            external_keys.add(key)
+            ext = cluster(key, "external")
+            a, b = (node_cluster[source], ext) if s_in else (ext, node_cluster[target])
+            external += 1
+        weights[(a, b)] = weights.get((a, b), 0) + 1
+
+    return {
+        "prefix": prefix,
+        "depth": depth,
+        "clusters": clusters,
+        "edges": [[a, b, w] for (a, b), w in sorted(weights.items())],
+        "total_nodes": len(inside),
+        "total_edges": sum(weights.values()) + sum(c["internal_edges"] for c in clusters),
+        "external_edges": external,
+    }
+
+
+def _label(cluster: Dict[str, Any], prefix: str) -> str:
+    key = cluster["key"]
+    text = key[len(prefix):] if key.startswith(prefix) and key != prefix else key
+    text = (text or key).replace('"', "'")
+    if cluster["kind"] == "dir":
+        return f'["{text} ({cluster["size"]})"]'
+    if cluster["kind"] == "group":
+        return f'[["{text} ({cluster["size"]})"]]'
+    if cluster["kind"] == "external":
+        return f'(["{text}"])'
+    return f'["{text}"]'
+
+
+def render_mermaid(view: Dict[str, Any]) -> str:
+    """
+    Mermaid rendering of a cluster view. Edge labels carry the number of imports they aggregate.
+    When imports are too sparse to show structure, clusters hang off the root directory instead.
+    """
+    lines = ["graph TD", "    subgraph Architecture"]
+    for c in view["clusters"]:
+        lines.append(f"    c{c['id']}{_label(c, view['prefix'])}")
+
+    edges = view["edges"]
+    if len(edges) >= 3:
+        for a, b, weight in edges:
+            lines.append(f"    c{a} -->|{weight}| c{b}" if weight > 1 else f"    c{a} --> c{b}")
+    else:
+        root = (view["prefix"] or "Root").replace('"', "'")
+        lines.append(f'    root["{root}"]')
+        for c in view["clusters"]:
+            if c["kind"] != "external":
+                lines.append(f"    root {'-->' if c['kind'] in ('dir', 'group') else '-.->'} c{c['id']}")
+        for a, b, weight in edges:
+            lines.append(f"    c{a} --> c{b}")
+    lines.append("    end")
+    return "\n".join(lines)
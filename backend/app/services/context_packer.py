@@ -0,0 +1,203 @@
+import os
+import math
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.file_index import FileIndex, FileRecord, TEST_DIRS
+
+logger = logging.getLogger(__name__)
+
+ENTRY_FILES = {
+    'main.py', 'app.py', 'index.js', 'server.js', 'app.js', 'index.ts', 'server.ts', 'main.ts',
+    'routes.py', 'urls.py', 'api.py', 'schema.graphql', 'docker-compose.yml', 'main.go', 'application.java',
+}
+INTERESTING_DIRS = {'api', 'routes', 'controllers', 'services', 'models', 'core', 'lib'}
+CODE_EXTS = {'.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.go', '.kt', '.rs', '.rb', '.graphql', '.yml', '.yaml'}
+MANIFEST_FILES = ['package.json', 'requirements.txt', 'pyproject.toml', 'pom.xml', 'build.gradle', 'go.mod', 'Cargo.toml']
+
+CHARS_PER_TOKEN = 4  # Rough average for code; no tokenizer dependency
+TOKEN_STEP = 25      # Knapsack granularity
+MAX_CANDIDATES = 200
+SNIPPET_TOKENS = (150, 400)  # Short (imports + signatures) and long variants per file
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def read_head(abs_path: str, max_chars: int) -> str:
+    """Reads at most `max_chars` bytes from the start of a file, cut back to a line boundary."""
+    try:
+        with open(abs_path, 'rb') as f:
+            data = f.read(max_chars)
+    except OSError:
+        return ""
+    text = data.decode('utf-8', errors='ignore')
+    if len(data) == max_chars and '\n' in text:
+        text = text[:text.rfind('\n')]
+    return text
+
+
+@dataclass
+class PackedContext:
+    structure: str
+    deps: str
+    code: str
+    tokens: int
+    files: List[str] = field(default_factory=list)
+
+
+# --- Component 4b: Context Packer ---
+class ContextPacker:
+    """
+    Builds the README prompt context under a fixed token budget.
+    Files are ranked by import-graph centrality plus entry-point/directory heuristics, and the
+    code budget is filled by a multiple-choice knapsack over per-file snippet sizes, so the most
+    informative set of snippets is chosen rather than whatever the directory walk reaches first.
+    Only bounded byte ranges are ever read.
+    """
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget or settings.README_CONTEXT_TOKENS
+
+    def score(self, index: FileIndex, import_edges: Iterable[Tuple[str, str]]) -> Dict[str, float]:
+        in_degree: Dict[str, int] = {}
+        out_degree: Dict[str, int] = {}
+        for source, target in import_edges:
+            if source != target:
+                in_degree[target] = in_degree.get(target, 0) + 1
+                out_degree[source] = out_degree.get(source, 0) + 1
+
+        scores = {}
+        for record in index.query(exts=CODE_EXTS, exclude_dirs=TEST_DIRS):
+            name = record.name.lower()
+            if name.startswith(('test_', 'conftest')) or '.test.' in name or '.spec.' in name:
+                continue
+            score = 1.0
+            # Widely imported modules define the project's core concepts
+            score += 2.0 * math.log1p(in_degree.get(record.path, 0))
+            # Entry points import much but are imported by little
+            if out_degree.get(record.path, 0) and not in_degree.get(record.path):
+                score += math.log1p(out_degree[record.path])
+            if name in ENTRY_FILES:
+                score += 3.0
+            if set(record.path.lower().split('/')[:-1]) & INTERESTING_DIRS:
+                score += 1.0
+            score -= 0.25 * record.depth
+            if record.size > 200 * 1024:  # Likely generated or vendored
+                score -= 2.0
+            if score > 0:
+                scores[record.path] = score
+        return scores
+
+    def _structure(self, index: FileIndex, budget_chars: int) -> str:
+        lines: List[str] = []
+        used = 0
+        for rel_dir, dirs, files in index.walk():
+            level = rel_dir.count('/') + 1 if rel_dir else 0
+            if level > 2: continue # Limit depth
+            indent = ' ' * 4 * level
+            block = [f"{indent}{os.path.basename(rel_dir) if rel_dir else os.path.basename(index.root)}/"]
+            shown = files[:15]
+            block += [f"{indent}    {record.name}" for record in shown]
+            if len(files) > len(shown):
+                block.append(f"{indent}    ... ({len(files) - len(shown)} more files)")
+            size = sum(len(line) + 1 for line in block)
+            if used + size > budget_chars:
+                lines.append("...")
+                break
+            lines.extend(block)
+            used += size
+        return "\n".join(lines) + "\n"
+
+    def _deps(self, index: FileIndex, budget_chars: int) -> str:
+        manifests = [r for name in MANIFEST_FILES for r in index.find(name) if r.depth <= 1]
+        manifests.sort(key=lambda r: r.depth)
+        if not manifests:
+            return ""
+        per_file = max(200, budget_chars // len(manifests))
+        parts = []
+        used = 0
+        for record in manifests:
+            if used >= budget_chars:
+                break
+            text = read_head(index.abs_path(record), min(per_file, budget_chars - used))
+            parts.append(f"--- {record.path} ---\n{text}\n")
+            used += len(parts[-1])
+        return "".join(parts)
+
+    def _knapsack(self, options: List[List[Tuple[int, float]]], capacity: int) -> List[int]:
+        """
+        Multiple-choice 0/1 knapsack: for each group pick at most one (cost, value) option.
+        Costs are in TOKEN_STEP units. Returns the chosen option index per group (-1 = none).
+        """
+        best = [0.0] * (capacity + 1)
+        choice: List[List[int]] = []
+        for group in options:
+            new_best = best[:]
+            picked = [-1] * (capacity + 1)
+            for i, (cost, value) in enumerate(group):
+                for c in range(cost, capacity + 1):
+                    candidate = best[c - cost] + value
+                    if candidate > new_best[c]:
+                        new_best[c] = candidate
+                        picked[c] = i
+            best = new_best
+            choice.append(picked)
+
+        # Walk back from the full capacity
+        selected = [-1] * len(options)
+        c = capacity
+        for g in range(len(options) - 1, -1, -1):
+            i = choice[g][c]
+            if i >= 0:
+                selected[g] = i
+                c -= options[g][i][0]
+        return selected
+
+    def pack(self, index: FileIndex, import_edges: Optional[Set[Tuple[str, str]]] = None) -> PackedContext:
+        budget = self.token_budget
+        structure = self._structure(index, budget * CHARS_PER_TOKEN * 15 // 100)
+        deps = self._deps(index, budget * CHARS_PER_TOKEN * 15 // 100)
+        code_budget = max(0, budget - estimate_tokens(structure) - estimate_tokens(deps))
+
+        scores = self.score(index, import_edges or set())
+        ranked = sorted(scores, key=lambda p: (-scores[p], p))[:MAX_CANDIDATES]
+        records = {r.path: r for r in index.files}
+
+        # Read each candidate once, at the largest snippet size; smaller variants are prefixes
+        snippets: Dict[str, str] = {}
+        options: List[List[Tuple[int, float]]] = []
+        variants: List[List[str]] = []
+        for path in ranked:
+            head = read_head(index.abs_path(records[path]), SNIPPET_TOKENS[-1] * CHARS_PER_TOKEN)
+            if not head.strip():
+                continue
+            snippets[path] = head
+            group, texts = [], []
+            for tokens in SNIPPET_TOKENS:
+                text = head[:tokens * CHARS_PER_TOKEN]
+                cost = math.ceil((estimate_tokens(text) + 12) / TOKEN_STEP)  # +12: file header line
+                # Diminishing returns: the first lines (imports, signatures) say the most
+                value = scores[path] * math.sqrt(len(text) / (SNIPPET_TOKENS[-1] * CHARS_PER_TOKEN))
+                group.append((cost, value))
+                texts.append(text)
+                if len(text) == len(head):
+                    break  # File is shorter than the next variant
+            options.append(group)
+            variants.append(texts)
+
+        chosen_paths = [p for p in ranked if p in snippets]
+        selected = self._knapsack(options, code_budget // TOKEN_STEP)
+
+        parts, files = [], []
+        for path, texts, pick in zip(chosen_paths, variants, selected):
+            if pick < 0:
+                continue
+            parts.append(f"\n--- File: {path} ---\n{texts[pick]}\n")
+            files.append(path)
+        code = "".join(parts)
+
+        tokens = estimate_tokens(structure) + estimate_tokens(deps) + estimate_tokens(code)
+        logger.info(f"Packed README context: {len(files)} files, ~{tokens} tokens (budget {budget})")
+        return PackedContext(structure=structure, deps=deps, code=code, tokens=tokens, files=files)
@@ -0,0 +1,276 @@
+import re
+import math
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List
+import httpx
+import groq
+from app.core.config import settings
+from app.services.ai_interview import META_MARKER
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = 8  # Tokens per streamed chunk
+_Z99 = 2.326  # z-score of the 99th percentile
+
+TOPICS = ["Arrays & Strings", "Hashing", "Two Pointers", "Sliding Window", "Linked Lists", "Stacks & Queues",
+          "Binary Search", "Trees", "Graphs", "Dynamic Programming", "Heaps", "Tries", "Greedy", "Backtracking"]
+CORE = ["HTTP & REST", "SQL & Indexing", "Caching", "Concurrency", "Operating Systems", "Networking",
+        "System Design Basics", "Message Queues", "Docker", "Testing", "Authentication", "Observability"]
+PROJECTS = ["URL Shortener", "E-commerce API", "Chat App", "Job Scheduler", "Blog Platform", "Expense Tracker"]
+CREATORS = ["NeetCode", "Striver", "Abdul Bari", "Gaurav Sen", "Traversy Media", "Hitesh Choudhary", "Telusko"]
+SKILLS = ["Python", "Java", "JavaScript", "React", "Node.js", "FastAPI", "PostgreSQL", "MongoDB", "Docker",
+          "AWS", "Redis", "Kafka", "Git", "TypeScript", "Spring Boot"]
+LEVELS = [("Beginner (Foundational)", "Building the bedrock."),
+          ("Intermediate (Interview Ready)", "Patterns and depth interviewers probe."),
+          ("Advanced (Stand Out)", "Depth that separates offers from rejections.")]
+
+
+class LatencyModel:
+    """Log-normal latency from a median and a p99, the usual shape of remote API latency."""
+    def __init__(self, median: float, p99: float):
+        self.median = max(median, 0.0)
+        self.sigma = math.log(p99 / median) / _Z99 if median > 0 and p99 > median else 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median * math.exp(rng.gauss(0, self.sigma)) if self.median else 0.0
+
+
+class _Faults:
+    """Shared seeded RNG for latencies and injected errors, so a load test run is reproducible."""
+    def __init__(self):
+        self.rng = random.Random(settings.FAKE_SEED)
+        self.lock = threading.Lock()
+
+    def latency(self, model: LatencyModel) -> float:
+        with self.lock:
+            return model.sample(self.rng)
+
+    def fails(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def choice(self, options: List[Any]) -> Any:
+        with self.lock:
+            return self.rng.choice(options)
+
+
+faults = _Faults()
+
+
+def _status_error(cls, status: int, headers: Dict[str, str] = None) -> Exception:
+    request = httpx.Request("POST", "https://fake.llm/openai/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls(f"Error code: {status} (injected by fake provider)", response=response, body=None)
+
+
+def _llm_error() -> Exception:
+    """An error shaped like the Groq SDK's, so retry/fallback paths behave as in production."""
+    kind = faults.choice(["rate_limit", "server", "timeout"])
+    if kind == "rate_limit":
+        return _status_error(groq.RateLimitError, 429, {"retry-after": "1"})
+    if kind == "server":
+        return _status_error(groq.InternalServerError, 503)
+    return groq.APITimeoutError(request=httpx.Request("POST", "https://fake.llm/openai/v1/chat/completions"))
+
+
+# --- Payloads (deterministic per prompt) ---
+def _rng_for(text: str) -> random.Random:
+    return random.Random(f"{settings.FAKE_SEED}:{hashlib.sha256(text.encode()).hexdigest()}")
+
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _roadmap(prompt: str, rng: random.Random) -> str:
+    match = re.search(r'roadmap for: (.+?)\.\n', prompt)
+    role = match.group(1).strip() if match else "Software Engineer"
+    levels = []
+    for level_name, level_description in LEVELS:
+        tracks = []
+        for category, pool in (("DSA", TOPICS), ("Core Skills", CORE), ("Projects", PROJECTS), ("Interview Signals", CORE)):
+            skills = []
+            for name in rng.sample(pool, rng.randint(2, 4)):
+                creator = rng.choice(CREATORS)
+                if category == "Projects":
+                    resources = [{"title": f"Build {name}", "url": f"SEARCH: Build {name} {role} Playlist"},
+                                 {"title": f"{name} reference", "url": f"GITHUB: {name} {role} implementation"}]
+                else:
+                    resources = [{"title": f"{creator} {name}", "url": f"SEARCH: {creator} {name} Playlist"},
+                                 {"title": f"{name} docs", "url": f"https://developer.mozilla.org/en-US/search?q={_slug(name)}"}]
+                skills.append({
+                    "id": _slug(f"{name}-{level_name.split()[0]}"),
+                    "name": name,
+                    "description": f"{name} for {role} interviews: core patterns, trade-offs and common pitfalls.",
+                    "status": "Not Started",
+                    "resources": resources,
+                })
+            tracks.append({"category": category, "skills": skills})
+        levels.append({"name": level_name, "description": level_description, "tracks": tracks})
+    roadmap = {"title": f"{role} Placement Mastery Roadmap", "is_simulated": False,
+               "description": "A skill-based, tiered roadmap to get you interview-ready.", "levels": levels}
+    return f"```json\n{json.dumps(roadmap, indent=2)}\n```"
+
+
+def _question(rng: random.Random) -> str:
+    topic = rng.choice(TOPICS + CORE)
+    return rng.choice([
+        f"Walk me through how you would approach a problem involving {topic}. What trade-offs would you consider?",
+        f"Can you explain {topic} and describe a time you applied it in one of your projects?",
+        f"How would the complexity of your solution change if the input were 100x larger? Think about {topic}.",
+    ])
+
+
+def _turn_meta(rng: random.Random) -> Dict[str, str]:
+    return {"feedback_snapshot": rng.choice(["Solid fundamentals", "Vague on complexity", "Good trade-off reasoning"]),
+            "type": rng.choice(["Follow-up", "New Topic"]), "difficulty": rng.choice(["Easy", "Medium", "Hard"])}
+
+
+def _resume(rng: random.Random) -> str:
+    return json.dumps({
+        "skills": rng.sample(SKILLS, 8),
+        "projects": [{"name": name, "tech_stack": rng.sample(SKILLS, 3), "description": f"Built a {name.lower()}."}
+                     for name in rng.sample(PROJECTS, 3)],
+        "experience": [{"role": "Software Engineering Intern", "company": "Acme Corp",
+                        "description": "Shipped internal APIs and cut p95 latency by 30%."}],
+    }, indent=2)
+
+
+def _readme(rng: random.Random) -> str:
+    stack = rng.sample(SKILLS, 4)
+    sections = ["# Project\n\nA service inferred from the analyzed source.",
+                "## 🧱 Architecture Overview\n\nAPI layer, services and persistence.",
+                "## 🛠 Tech Stack\n\n" + " ".join(f"![{s}](https://img.shields.io/badge/{_slug(s)}-informational)" for s in stack),
+                "## ✨ Key Features\n\n" + "\n".join(f"- {f}" for f in rng.sample(CORE, 5)),
+                "## 🚀 Setup & Run\n\n```bash\npip install -r requirements.txt\nuvicorn main:app --reload\n```",
+                "## 📄 License\n\nUnspecified."]
+    return "\n\n".join(sections) + "\n"
+
+
+def _route_summaries(prompt: str) -> str:
+    endpoints = re.findall(r'^\s*([A-Z]+) (\S+) \(', prompt.partition("Endpoints:")[2], re.MULTILINE)
+    return json.dumps({f"{method} {path}": f"{method.capitalize()} {path.strip('/').split('/')[-1] or 'root'}"
+                       for method, path in endpoints})
+
+
+def _notes(prompt: str, rng: random.Random) -> str:
+    topics = rng.sample(["hash maps", "graphs", "system design", "SQL indexing", "concurrency", "caching"], 2)
+    folded = prompt.count("Interviewer:")
+    return json.dumps({"summary": f"Covered {' and '.join(topics)} over {folded} more exchange(s); solid fundamentals.",
+                       "facts": [f"Discussed {topic}" for topic in topics]})
+
+
+def fake_completion(prompt: str) -> str:
+    """A response shaped like what the app's prompts ask for, deterministic for a given prompt."""
+    rng = _rng_for(prompt)
+    if '"facts"' in prompt:  # Interview memory; checked first since it quotes earlier turns
+        return _notes(prompt, rng)
+    if META_MARKER in prompt:
+        return f"{_question(rng)}\n{META_MARKER}\n{json.dumps(_turn_meta(rng))}"
+    if '"next_question"' in prompt:
+        return json.dumps({"next_question": _question(rng), **_turn_meta(rng)})
+    if "FIRST opening question" in prompt:
+        return json.dumps({"question": _question(rng), "context": "Opening calibration", "difficulty": "Easy"})
+    if "RESUME TEXT" in prompt:
+        return _resume(rng)
+    if '"levels"' in prompt:
+        return _roadmap(prompt, rng)
+    if "README.md" in prompt:
+        return _readme(rng)
+    if '"METHOD /path"' in prompt:
+        return _route_summaries(prompt)
+    return "This is a fake model response."
+
+
+# --- Fake chat model ---
+class FakeChatModel:
+    """
+    Offline stand-in for ChatGroq (LLM_PROVIDER=fake): same ainvoke()/astream() surface, answers from
+    fake_completion(), time to first token drawn from FAKE_LLM_TTFT_* and output paced at
+    FAKE_LLM_TOKENS_PER_SECOND, failing FAKE_LLM_ERROR_RATE of calls with Groq-shaped errors.
+    """
+    def __init__(self, api_key: str, model: str, **params: Any):
+        self.groq_api_key = api_key
+        self.model_name = model
+        self.params = params
+        self.ttft = LatencyModel(settings.FAKE_LLM_TTFT_MEDIAN_SECONDS, settings.FAKE_LLM_TTFT_P99_SECONDS)
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        # "provider" keeps fake answers out of the real responses' cache entries
+        return {"provider": "fake", "model": self.model_name, **self.params}
+
+    def _chunks(self, content: str) -> List[str]:
+        size = CHUNK_TOKENS * CHARS_PER_TOKEN
+        return [content[i:i + size] for i in range(0, len(content), size)] or [""]
+
+    def _usage(self, prompt: Any, content: str) -> Dict[str, int]:
+        input_tokens, output_tokens = len(str(prompt)) // CHARS_PER_TOKEN, len(content) // CHARS_PER_TOKEN
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _chunk_delay(self) -> float:
+        return CHUNK_TOKENS / settings.FAKE_LLM_TOKENS_PER_SECOND if settings.FAKE_LLM_TOKENS_PER_SECOND > 0 else 0.0
+
+    async def ainvoke(self, prompt: Any) -> SimpleNamespace:
+        content = fake_completion(str(prompt))
+        await asyncio.sleep(faults.latency(self.ttft))
+        if faults.fails(settings.FAKE_LLM_ERROR_RATE):
+            raise _llm_error()
+        await asyncio.sleep(self._chunk_delay() * (len(self._chunks(content)) - 1))
+        return SimpleNamespace(content=content, usage_metadata=self._usage(prompt, content))
+
+    async def astream(self, prompt: Any) -> AsyncIterator[SimpleNamespace]:
+        content = fake_completion(str(prompt))
+        await asyncio.sleep(faults.latency(self.ttft))
+        if faults.fails(settings.FAKE_LLM_ERROR_RATE):
+            raise _llm_error()
+        chunks = self._chunks(content)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(self._chunk_delay())
+            # Like Groq, token usage only arrives with the last chunk
+            usage = self._usage(prompt, content) if i == len(chunks) - 1 else None
+            yield SimpleNamespace(content=chunk, usage_metadata=usage)
+
+
+# --- Fake web search ---
+class FakeSearch:
+    """
+    Offline stand-in for DDGS (SEARCH_PROVIDER=fake). Blocking like the real client, so it occupies
+    an executor thread for FAKE_SEARCH_* latency; fails FAKE_SEARCH_ERROR_RATE of searches.
+    """
+    def __init__(self):
+        self.latency = LatencyModel(settings.FAKE_SEARCH_MEDIAN_SECONDS, settings.FAKE_SEARCH_P99_SECONDS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _search(self, query: str):
+        time.sleep(faults.latency(self.latency))
+        if faults.fails(settings.FAKE_SEARCH_ERROR_RATE):
+            raise RuntimeError("Search failed (injected by fake provider)")
+        return _rng_for(query)
+
+    def videos(self, query: str, max_results: int = 1) -> List[Dict[str, Any]]:
+        rng = self._search(query)
+        return [{"title": f"{query} #{i + 1}", "publisher": "YouTube",
+                 "content": f"https://www.youtube.com/watch?v={rng.getrandbits(64):016x}"}
+                for i in range(max_results)]
+
+    def text(self, query: str, max_results: int = 1) -> List[Dict[str, Any]]:
+        rng = self._search(query)
+        repo = _slug(query.replace("site:github.com", ""))[:60]
+        return [{"title": f"{repo} #{i + 1}", "body": f"Implementation of {query}.",
+                 "href": f"https://github.com/{rng.choice(['octo', 'devhub', 'buildwith'])}{rng.randint(1, 999)}/{repo}"}
+                for i in range(max_results)]
@@ -0,0 +1,231 @@
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Never descended into: vendored deps, build output, VCS metadata
+PRUNED_DIRS = {'node_modules', 'venv', '.venv', 'env', 'dist', 'build', '.git', '__pycache__',
+               '.next', '.tox', '.mypy_cache', '.pytest_cache', 'target', 'vendor'}
+TEST_DIRS = {'test', 'tests', '__tests__'}
+
+LANGUAGE_BY_EXT = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript', '.java': 'java', '.kt': 'kotlin', '.go': 'go',
+    '.rs': 'rust', '.rb': 'ruby', '.php': 'php', '.cs': 'csharp', '.cpp': 'cpp', '.c': 'c',
+    '.h': 'c', '.swift': 'swift', '.json': 'json', '.yml': 'yaml', '.yaml': 'yaml',
+    '.md': 'markdown', '.html': 'html', '.css': 'css', '.scss': 'css', '.sql': 'sql',
+    '.graphql': 'graphql', '.toml': 'toml', '.xml': 'xml', '.sh': 'shell',
+}
+
+BINARY_EXTS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.svgz', '.pdf', '.zip', '.gz',
+    '.tar', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.war', '.class', '.so', '.dll',
+    '.dylib', '.exe', '.bin', '.o', '.a', '.pyc', '.pyo', '.whl', '.mp3', '.mp4', '.mov',
+    '.avi', '.wav', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.db', '.sqlite', '.pkl',
+    '.npy', '.h5', '.onnx', '.pt',
+}
+
+
+@dataclass
+class FileRecord:
+    path: str       # Relative to the repo root, '/' separated
+    name: str
+    ext: str
+    size: int
+    mtime: float
+    language: Optional[str]
+    ignored: bool   # Matched by a .gitignore rule
+    binary: bool
+
+    @property
+    def dir(self) -> str:
+        return self.path.rpartition('/')[0]
+
+    @property
+    def depth(self) -> int:
+        return self.path.count('/')
+
+
+def _translate_glob(pattern: str) -> str:
+    """Converts one gitignore glob to a regex fragment."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+            continue
+        if c == '*':
+            out.append('.*' if pattern.startswith('**', i) else '[^/]*')
+            i += 2 if pattern.startswith('**', i) else 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end + 1
+        elif c == '\\' and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+
+class IgnoreRules:
+    """Minimal .gitignore semantics: nested files, negation, anchoring and directory-only rules."""
+    def __init__(self):
+        self._rules: List[Tuple[str, "re.Pattern", bool, bool]] = []
+
+    def add(self, base: str, text: str):
+        for raw in text.splitlines():
+            line = raw.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            line = line.lstrip('/')
+            regex = _translate_glob(line)
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self._rules.append((base, re.compile(f'^{regex}$'), negate, dir_only))
+
+    def match(self, rel_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for base, regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                candidate = rel_path[len(base) + 1:]
+            else:
+                candidate = rel_path
+            if regex.match(candidate):
+                ignored = not negate
+        return ignored
+
+
+class FileIndex:
+    """
+    In-memory index of a checkout, built with a single scandir pass.
+    Every analyzer queries this instead of walking the tree again.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self.files: List[FileRecord] = []
+        self.subdirs: Dict[str, List[str]] = {}
+        self.files_in: Dict[str, List[FileRecord]] = {}
+        self._by_name: Dict[str, List[FileRecord]] = {}
+
+    @classmethod
+    def build(cls, root: str) -> "FileIndex":
+        index = cls(root)
+        rules = IgnoreRules()
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                logger.warning(f"Index skipped unreadable dir {abs_dir}: {e}")
+                continue
+
+            # Rules must be known before this directory's entries are classified
+            for entry in entries:
+                if entry.name == '.gitignore' and entry.is_file(follow_symlinks=False):
+                    try:
+                        with open(entry.path, 'r', encoding='utf-8', errors='ignore') as f:
+                            rules.add(rel_dir, f.read())
+                    except OSError:
+                        pass
+                    break
+
+            dirs, files = [], []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in PRUNED_DIRS or rules.match(rel_path, True):
+                        continue
+                    dirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    record = FileRecord(
+                        path=rel_path, name=entry.name, ext=ext, size=st.st_size, mtime=st.st_mtime,
+                        language=LANGUAGE_BY_EXT.get(ext), ignored=rules.match(rel_path, False),
+                        binary=ext in BINARY_EXTS,
+                    )
+                    files.append(record)
+                    index.files.append(record)
+                    index._by_name.setdefault(entry.name, []).append(record)
+
+            index.subdirs[rel_dir] = dirs
+            index.files_in[rel_dir] = files
+            # Reverse so directories pop in sorted order
+            stack.extend(f"{rel_dir}/{d}" if rel_dir else d for d in reversed(dirs))
+        return index
+
+    def abs_path(self, record: FileRecord) -> str:
+        return os.path.join(self.root, *record.path.split('/'))
+
+    def exists(self, rel_path: str) -> bool:
+        rel_dir, _, name = rel_path.rpartition('/')
+        return any(r.name == name for r in self.files_in.get(rel_dir, []))
+
+    def find(self, name: str, include_ignored: bool = False) -> List[FileRecord]:
+        return [r for r in self._by_name.get(name, []) if include_ignored or not r.ignored]
+
+    def query(self, exts: Optional[Iterable[str]] = None, exclude_dirs: Iterable[str] = (),
+              include_ignored: bool = False, include_binary: bool = False) -> Iterator[FileRecord]:
+        """Yields files filtered by extension, excluding any path under a directory named in `exclude_dirs`."""
+        ext_set: Optional[Set[str]] = set(exts) if exts is not None else None
+        excluded = set(exclude_dirs)
+        for record in self.files:
+            if record.ignored and not include_ignored:
+                continue
+            if record.binary and not include_binary:
+                continue
+            if ext_set is not None and record.ext not in ext_set:
+                continue
+            if excluded and excluded.intersection(record.path.split('/')[:-1]):
+                continue
+            yield record
+
+    def walk(self, exclude_dirs: Iterable[str] = ()) -> Iterator[Tuple[str, List[str], List[FileRecord]]]:
+        """os.walk-style traversal (top-down) served from memory."""
+        excluded = set(exclude_dirs)
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            dirs = [d for d in self.subdirs.get(rel_dir, []) if d not in excluded]
+            yield rel_dir, dirs, self.files_in.get(rel_dir, [])
+            stack.extend(f"{rel_dir}/{d}" if rel_dir else d for d in reversed(dirs))
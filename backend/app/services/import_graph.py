@@ -0,0 +1,441 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import posixpath
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.file_index import FileIndex, FileRecord
+
+logger = logging.getLogger(__name__)
+
+try:
+    from tree_sitter_languages import get_parser
+except ImportError:
+    get_parser = None
+
+# (module, relative level, imported names). Plain tuples so results pickle cheaply.
+RawImport = Tuple[str, int, Tuple[str, ...]]
+
+PY_EXTS = {'.py'}
+JS_EXTS = {'.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'}
+SOURCE_EXTS = PY_EXTS | JS_EXTS
+TS_LANGUAGE_BY_EXT = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript',
+    '.cjs': 'javascript', '.ts': 'typescript', '.tsx': 'tsx',
+}
+JS_RESOLVE_EXTS = ['.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs', '.d.ts', '.json']
+
+HEADER_MAX_BYTES = 32 * 1024
+PARSE_CACHE_SIZE = 50000
+
+# The header ends where module-level code starts; imports below that are rare and lazy by intent
+PY_BODY_START = re.compile(rb'^(?:async[ \t]+def|def|class)[ \t]|^@|^if[ \t]+__name__', re.M)
+JS_BODY_START = re.compile(rb'^(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?(?:function|class)\b', re.M)
+
+# Regex fallback when tree-sitter isn't installed. Patterns span lines so wrapped imports still match.
+PY_FROM_RE = re.compile(r'^[ \t]*from[ \t]+(\.*)([\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n]*)', re.M)
+PY_IMPORT_RE = re.compile(r'^[ \t]*import[ \t]+([^\n]+)', re.M)
+JS_FROM_RE = re.compile(r'''^[ \t]*(?:import|export)\b[^'"`;]*?\bfrom[ \t\n]*['"]([^'"\n]+)['"]''', re.M)
+JS_SIDE_EFFECT_RE = re.compile(r'''^[ \t]*import[ \t]*['"]([^'"\n]+)['"]''', re.M)
+JS_CALL_RE = re.compile(r'''\b(?:require|import)\s*\(\s*['"]([^'"\n]+)['"]\s*\)''')
+
+_parse_cache: "OrderedDict[Tuple[str, str], List[RawImport]]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def read_header(abs_path: str, ext: str) -> bytes:
+    """Reads at most HEADER_MAX_BYTES and cuts at the first top-level definition."""
+    with open(abs_path, 'rb') as f:
+        data = f.read(HEADER_MAX_BYTES)
+    pattern = PY_BODY_START if ext in PY_EXTS else JS_BODY_START
+    m = pattern.search(data)
+    return data[:m.start()] if m else data
+
+
+@lru_cache(maxsize=None)
+def _parser(language: str):
+    return get_parser(language)
+
+
+def _node_text(source: bytes, node) -> str:
+    return source[node.start_byte:node.end_byte].decode('utf-8', errors='ignore')
+
+
+def _split_names(names: str) -> Tuple[str, ...]:
+    names = names.strip().strip('()').replace('\\', ' ')
+    out = []
+    for part in names.split(','):
+        part = part.strip().split()
+        if part and part[0] != '*':
+            out.append(part[0])
+    return tuple(out)
+
+
+def _extract_python_ts(source: bytes, root) -> List[RawImport]:
+    imports = []
+    stack = list(reversed(root.children))
+    while stack:
+        node = stack.pop()
+        if node.type == 'import_statement':
+            for child in node.children_by_field_name('name'):
+                target = child.child_by_field_name('name') if child.type == 'aliased_import' else child
+                imports.append((_node_text(source, target), 0, ()))
+        elif node.type == 'import_from_statement':
+            module_node = node.child_by_field_name('module_name')
+            if module_node is None:
+                continue
+            level, module = 0, ''
+            if module_node.type == 'relative_import':
+                for child in module_node.children:
+                    if child.type == 'import_prefix':
+                        level = _node_text(source, child).count('.')
+                    elif child.type == 'dotted_name':
+                        module = _node_text(source, child)
+            else:
+                module = _node_text(source, module_node)
+            names = []
+            for child in node.children_by_field_name('name'):
+                target = child.child_by_field_name('name') if child.type == 'aliased_import' else child
+                names.append(_node_text(source, target))
+            imports.append((module, level, tuple(names)))
+        elif node.type in ('if_statement', 'try_statement', 'with_statement', 'block',
+                           'else_clause', 'except_clause', 'finally_clause', 'elif_clause'):
+            # Guarded imports (TYPE_CHECKING, optional deps) still count; definitions don't
+            stack.extend(reversed(node.children))
+    return imports
+
+
+def _extract_js_ts(source: bytes, root) -> List[RawImport]:
+    imports = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.type in ('import_statement', 'export_statement'):
+            src = node.child_by_field_name('source')
+            if src is not None:
+                imports.append((_node_text(source, src).strip('\'"`'), 0, ()))
+                continue
+        elif node.type == 'call_expression':
+            func = node.child_by_field_name('function')
+            args = node.child_by_field_name('arguments')
+            if func is not None and args is not None and func.type in ('import', 'identifier') \
+                    and _node_text(source, func) in ('require', 'import'):
+                strings = [c for c in args.children if c.type == 'string']
+                if strings:
+                    imports.append((_node_text(source, strings[0]).strip('\'"`'), 0, ()))
+        stack.extend(reversed(node.children))
+    return imports
+
+
+def _extract_regex(text: str, ext: str) -> List[RawImport]:
+    imports = []
+    if ext in PY_EXTS:
+        for m in PY_FROM_RE.finditer(text):
+            imports.append((m.group(2), len(m.group(1)), _split_names(m.group(3))))
+        for m in PY_IMPORT_RE.finditer(text):
+            for module in _split_names(m.group(1).split('#')[0]):
+                imports.append((module, 0, ()))
+    else:
+        for regex in (JS_FROM_RE, JS_SIDE_EFFECT_RE, JS_CALL_RE):
+            imports.extend((m.group(1), 0, ()) for m in regex.finditer(text))
+    return imports
+
+
+def parse_imports(header: bytes, ext: str) -> List[RawImport]:
+    language = TS_LANGUAGE_BY_EXT.get(ext)
+    if language and get_parser is not None:
+        try:
+            tree = _parser(language).parse(header)
+            if language == 'python':
+                return _extract_python_ts(header, tree.root_node)
+            return _extract_js_ts(header, tree.root_node)
+        except Exception as e:
+            logger.debug(f"tree-sitter failed for {ext}, using regex: {e}")
+    return _extract_regex(header.decode('utf-8', errors='ignore'), ext)
+
+
+def extract_imports(abs_path: str, ext: str) -> List[RawImport]:
+    """
+    Raw import specifiers for one file. Parses are memoized by header content hash,
+    so unchanged files (and vendored copies of the same file) are parsed once per process.
+    """
+    try:
+        header = read_header(abs_path, ext)
+    except OSError:
+        return []
+    key = (hashlib.sha1(header).hexdigest(), ext)
+    with _parse_cache_lock:
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+            return cached
+    imports = parse_imports(header, ext)
+    with _parse_cache_lock:
+        _parse_cache[key] = imports
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return imports
+
+
+def _load_jsonc(abs_path: str) -> Optional[dict]:
+    try:
+        with open(abs_path, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+        # tsconfig allows comments and trailing commas
+        text = re.sub(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', lambda m: m.group(1) or '', text, flags=re.S)
+        text = re.sub(r',(\s*[}\]])', r'\1', text)
+        return json.loads(text)
+    except Exception:
+        return None
+
+
+class ImportResolver:
+    """
+    Maps raw import specifiers to real files in the index.
+    Holds only plain sets/dicts (no FileIndex reference) so it pickles cheaply into pool workers.
+    """
+    def __init__(self, index: FileIndex):
+        self.paths: Set[str] = {r.path for r in index.files}
+        self.dirs: Set[str] = set(index.subdirs.keys())
+
+        # Every dotted suffix of every module path, e.g. backend/app/core/config.py registers
+        # config, core.config, app.core.config, backend.app.core.config
+        self.py_modules: Dict[str, List[Tuple[str, str]]] = {}
+        for record in index.query(exts=PY_EXTS):
+            parts = record.path[:-3].split('/')
+            if parts[-1] == '__init__':
+                parts = parts[:-1]
+            for i in range(len(parts)):
+                dotted = '.'.join(parts[i:])
+                root = '/'.join(parts[:i])
+                self.py_modules.setdefault(dotted, []).append((root, record.path))
+
+        # JS workspace packages and tsconfig/jsconfig path aliases
+        self.packages: Dict[str, str] = {}
+        self.ts_configs: List[Tuple[str, str, Dict[str, List[str]]]] = []
+        for record in index.files:
+            if record.name == 'package.json':
+                data = _load_jsonc(index.abs_path(record))
+                if data and isinstance(data.get('name'), str):
+                    self.packages[data['name']] = record.dir
+            elif record.name in ('tsconfig.json', 'jsconfig.json'):
+                data = _load_jsonc(index.abs_path(record))
+                options = (data or {}).get('compilerOptions') or {}
+                if 'baseUrl' in options or 'paths' in options:
+                    base = posixpath.normpath(posixpath.join(record.dir, options.get('baseUrl', '.')))
+                    self.ts_configs.append((record.dir, '' if base == '.' else base, options.get('paths') or {}))
+        self.ts_configs.sort(key=lambda c: len(c[0]), reverse=True)
+
+    # --- Python ---
+    def _py_absolute(self, dotted: str, importer_dir: str) -> Optional[str]:
+        best = None
+        for root, path in self.py_modules.get(dotted, []):
+            # Only roots the importer could have on sys.path: its ancestors, or a src/ layout
+            if root and not (importer_dir == root or importer_dir.startswith(root + '/')
+                             or posixpath.basename(root) == 'src'):
+                continue
+            if best is None or len(root) > len(best[0]):
+                best = (root, path)
+        return best[1] if best else None
+
+    def _py_path(self, base: str, dotted: str) -> Optional[str]:
+        stem = posixpath.join(base, *dotted.split('.')) if dotted else base
+        stem = stem.lstrip('/')
+        for candidate in (f"{stem}.py", f"{stem}/__init__.py"):
+            if candidate in self.paths:
+                return candidate
+        return None
+
+    def resolve_python(self, importer: str, raw: RawImport) -> List[str]:
+        module, level, names = raw
+        importer_dir = posixpath.dirname(importer)
+        if level:
+            base = importer_dir
+            for _ in range(level - 1):
+                base = posixpath.dirname(base)
+            lookup = lambda dotted: self._py_path(base, dotted)
+        else:
+            lookup = lambda dotted: self._py_absolute(dotted, importer_dir)
+
+        found = []
+        # `from pkg import mod` may name submodules; fall back to the package itself
+        for name in names:
+            hit = lookup(f"{module}.{name}" if module else name)
+            if hit:
+                found.append(hit)
+        if len(found) < len(names) or not names:
+            hit = lookup(module) if module else None
+            if hit:
+                found.append(hit)
+        return found
+
+    # --- JS / TS ---
+    def _js_file(self, stem: str) -> Optional[str]:
+        stem = posixpath.normpath(stem)
+        if stem.startswith('..'):
+            return None
+        stem = '' if stem == '.' else stem
+        if stem in self.paths:
+            return stem
+        for ext in JS_RESOLVE_EXTS:
+            if stem + ext in self.paths:
+                return stem + ext
+        if stem in self.dirs:
+            for ext in JS_RESOLVE_EXTS:
+                candidate = posixpath.join(stem, 'index' + ext)
+                if candidate in self.paths:
+                    return candidate
+        return None
+
+    def resolve_js(self, importer: str, raw: RawImport) -> List[str]:
+        spec = raw[0].split('?')[0]
+        importer_dir = posixpath.dirname(importer)
+        if spec.startswith('.'):
+            hit = self._js_file(posixpath.join(importer_dir, spec))
+            return [hit] if hit else []
+
+        for config_dir, base, paths in self.ts_configs:
+            if config_dir and not (importer_dir == config_dir or importer_dir.startswith(config_dir + '/')):
+                continue
+            for alias, targets in paths.items():
+                prefix = alias.rstrip('*')
+                if (alias.endswith('*') and spec.startswith(prefix)) or spec == alias:
+                    rest = spec[len(prefix):] if alias.endswith('*') else ''
+                    for target in targets:
+                        hit = self._js_file(posixpath.join(base, target.replace('*', rest)))
+                        if hit:
+                            return [hit]
+            hit = self._js_file(posixpath.join(base, spec))
+            if hit:
+                return [hit]
+
+        # Workspace packages: longest package name that prefixes the specifier
+        parts = spec.split('/')
+        name_len = 2 if spec.startswith('@') else 1
+        pkg_dir = self.packages.get('/'.join(parts[:name_len]))
+        if pkg_dir is not None:
+            rest = '/'.join(parts[name_len:])
+            for candidate in ([posixpath.join(pkg_dir, rest)] if rest else
+                              [pkg_dir, posixpath.join(pkg_dir, 'src', 'index'), posixpath.join(pkg_dir, 'index')]):
+                hit = self._js_file(candidate)
+                if hit:
+                    return [hit]
+
+        # Common bundler alias: '@/x' -> <nearest src>/x
+        if spec.startswith('@/'):
+            d = importer_dir
+            while True:
+                src = posixpath.join(d, 'src') if d else 'src'
+                if src in self.dirs:
+                    hit = self._js_file(posixpath.join(src, spec[2:]))
+                    return [hit] if hit else []
+                if not d:
+                    break
+                d = posixpath.dirname(d)
+        return []
+
+    def resolve(self, importer: str, ext: str, raw: RawImport) -> List[str]:
+        if ext in PY_EXTS:
+            return self.resolve_python(importer, raw)
+        return self.resolve_js(importer, raw)
+
+
+def _resolve_edges(resolver: ImportResolver, known: Set[str], path: str, ext: str,
+                   raw_imports: List[RawImport]) -> Set[Tuple[str, str]]:
+    edges = set()
+    for raw in raw_imports:
+        for target in resolver.resolve(path, ext, raw):
+            if target != path and target in known:
+                edges.add((path, target))
+    return edges
+
+
+def _scan_chunk(root: str, resolver: ImportResolver, known: Set[str],
+                chunk: List[Tuple[str, str]]) -> Tuple[Dict[str, List[RawImport]], Set[Tuple[str, str]]]:
+    imports, edges = {}, set()
+    for path, ext in chunk:
+        raw_imports = extract_imports(os.path.join(root, *path.split('/')), ext)
+        imports[path] = raw_imports
+        edges |= _resolve_edges(resolver, known, path, ext, raw_imports)
+    return imports, edges
+
+
+# Per-process state for pool workers, set once by the initializer so chunks carry only file lists
+_worker_state: Dict[str, object] = {}
+
+
+def _init_worker(root: str, resolver: ImportResolver, known: Set[str]):
+    _worker_state["root"] = root
+    _worker_state["resolver"] = resolver
+    _worker_state["known"] = known
+
+
+def _worker_scan_chunk(chunk: List[Tuple[str, str]]) -> Tuple[Dict[str, List[RawImport]], Set[Tuple[str, str]]]:
+    return _scan_chunk(_worker_state["root"], _worker_state["resolver"], _worker_state["known"], chunk)
+
+
+# --- Component 3a: Import Graph Engine ---
+class ImportGraphEngine:
+    """
+    Builds a file-level dependency graph: tree-sitter (or regex fallback) over each file's
+    import header, then resolution to concrete files in the index.
+    """
+    def __init__(self, index: FileIndex, workers: Optional[int] = None):
+        self.index = index
+        self.resolver = ImportResolver(index)
+        self.workers = workers if workers is not None else (settings.IMPORT_WORKERS or os.cpu_count() or 1)
+
+    def extract_all(self, records: List[FileRecord]) -> Dict[str, List[RawImport]]:
+        return {r.path: extract_imports(self.index.abs_path(r), r.ext) for r in records}
+
+    def build_edges(self, records: List[FileRecord]) -> Set[Tuple[str, str]]:
+        return self.scan(records)[1]
+
+    def scan(self, records: List[FileRecord], known: Optional[Set[str]] = None
+             ) -> Tuple[Dict[str, List[RawImport]], Set[Tuple[str, str]]]:
+        """
+        Parses `records` and resolves their imports against `known` (defaults to `records`).
+        Returns the raw imports per file alongside the edges so callers can persist them.
+        """
+        known = known if known is not None else {r.path for r in records}
+        work = [(r.path, r.ext) for r in records]
+        if self.workers > 1 and len(work) >= settings.IMPORT_PARALLEL_MIN_FILES:
+            try:
+                return self._scan_parallel(work, known)
+            except Exception as e:
+                logger.warning(f"Parallel import scan failed, falling back to serial: {e}")
+        return _scan_chunk(self.index.root, self.resolver, known, work)
+
+    def resolve_all(self, imports: Dict[str, List[RawImport]], known: Set[str]) -> Set[Tuple[str, str]]:
+        """Re-resolves already-parsed imports (no file reads), e.g. after files were added or removed."""
+        edges = set()
+        for path, raw_imports in imports.items():
+            edges |= _resolve_edges(self.resolver, known, path, os.path.splitext(path)[1].lower(), raw_imports)
+        return edges
+
+    def _scan_parallel(self, work: List[Tuple[str, str]], known: Set[str]
+                       ) -> Tuple[Dict[str, List[RawImport]], Set[Tuple[str, str]]]:
+        """
+        Shards files across a process pool. Resolver state ships once per worker via the
+        initializer; chunks are sized to a few per worker so IPC stays small relative to parsing.
+        """
+        workers = min(self.workers, max(1, len(work) // settings.IMPORT_MIN_CHUNK_SIZE))
+        chunk_size = max(settings.IMPORT_MIN_CHUNK_SIZE, -(-len(work) // (workers * 4)))
+        chunks = [work[i:i + chunk_size] for i in range(0, len(work), chunk_size)]
+        logger.info(f"Scanning imports of {len(work)} files with {workers} workers ({len(chunks)} chunks)")
+
+        imports, edges = {}, set()
+        ctx = multiprocessing.get_context(settings.IMPORT_POOL_START_METHOD)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(self.index.root, self.resolver, known)) as pool:
+            for chunk_imports, chunk_edges in pool.map(_worker_scan_chunk, chunks):
+                imports.update(chunk_imports)
+                edges |= chunk_edges
+        return imports, edges
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.file_index import FileIndex, FileRecord
+from app.services.import_graph import ImportGraphEngine
+from app.services.repo_cache import CacheEntry
+from app.services.repo_loader import run_git
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+RESOLVER_CONFIG_FILES = {'package.json', 'tsconfig.json', 'jsconfig.json'}
+
+
+# --- Component 3b: Incremental Analyzer ---
+class IncrementalAnalyzer:
+    """
+    Persists per-file analysis results (keyed by git blob SHA) for the last analyzed commit of
+    each repo. Re-analysis compares blob SHAs between the stored and current trees and re-parses
+    only added or modified files; the stored edge set is patched rather than rebuilt.
+    Each file record holds its blob SHA and parsed imports. Routes are not stored here (see
+    import_edges), and there are no symbols to store: no analyzer in the pipeline extracts them.
+    """
+    def __init__(self, state_dir: Optional[str] = None):
+        self.state_dir = state_dir or settings.ANALYSIS_STATE_DIR
+        os.makedirs(self.state_dir, exist_ok=True)
+
+    def _state_path(self, normalized_url: str) -> str:
+        return os.path.join(self.state_dir, hashlib.sha256(normalized_url.encode()).hexdigest()[:16] + ".json")
+
+    def load(self, normalized_url: str) -> Optional[Dict[str, Any]]:
+        path = self._state_path(normalized_url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable analysis state {path}: {e}")
+            return None
+        if state.get("version") != STATE_VERSION or state.get("url") != normalized_url:
+            return None
+        for record in state["files"].values():
+            record["imports"] = [(m, lvl, tuple(names)) for m, lvl, names in record["imports"]]
+        state["edges"] = {tuple(e) for e in state["edges"]}
+        return state
+
+    def save(self, state: Dict[str, Any]):
+        path = self._state_path(state["url"])
+        payload = {**state, "edges": sorted(state["edges"]), "updated_at": time.time()}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def prune(self, ttl_seconds: Optional[int] = None) -> int:
+        """Drops state for repos that haven't been analyzed within the TTL."""
+        ttl = ttl_seconds if ttl_seconds is not None else settings.ANALYSIS_STATE_TTL_SECONDS
+        removed = 0
+        for name in os.listdir(self.state_dir):
+            full = os.path.join(self.state_dir, name)
+            try:
+                if time.time() - os.path.getmtime(full) > ttl:
+                    os.remove(full)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    async def blob_shas(self, repo_path: str) -> Dict[str, str]:
+        out = await run_git(["ls-tree", "-r", "-z", "HEAD"], cwd=repo_path,
+                            deadline=asyncio.get_running_loop().time() + settings.CLONE_TIMEOUT_SECONDS)
+        blobs = {}
+        for entry in out.split("\0"):
+            if not entry: continue
+            meta, _, path = entry.partition("\t")
+            parts = meta.split()
+            if len(parts) == 3 and parts[1] == "blob":
+                blobs[path] = parts[2]
+        return blobs
+
+    @staticmethod
+    def unchanged(previous: Dict[str, Any], blobs: Dict[str, str], known: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Stored file records still valid at the new commit: same path and same git blob SHA. Files that
+        were added, modified or removed (not in `known`) are left out and get re-parsed or dropped.
+        Comparing blob SHAs from `git ls-tree` needs no history, so nothing is fetched into the checkout.
+        """
+        return {path: record for path, record in previous["files"].items()
+                if path in known and record.get("blob") and record["blob"] == blobs.get(path)}
+
+    @staticmethod
+    def _resolver_key(index: FileIndex, blobs: Dict[str, str]) -> str:
+        """Digest of everything import resolution depends on: the file list and alias/package configs."""
+        digest = hashlib.sha1()
+        for record in index.files:
+            digest.update(record.path.encode())
+            if record.name in RESOLVER_CONFIG_FILES:
+                digest.update((blobs.get(record.path) or str(record.mtime)).encode())
+        return digest.hexdigest()
+
+    def _prepare(self, normalized_url: str, index: FileIndex, engine: Optional[ImportGraphEngine]
+                 ) -> Tuple[Optional[Dict[str, Any]], ImportGraphEngine]:
+        """Stored state and the import resolver tables (JSON decode and a pass over every file). Runs in an executor."""
+        return self.load(normalized_url), engine or ImportGraphEngine(index)
+
+    async def import_edges(self, entry: CacheEntry, index: FileIndex, records: List[FileRecord],
+                           engine: Optional[ImportGraphEngine] = None) -> Set[Tuple[str, str]]:
+        """
+        Import edges of `records` at the entry's commit. Only the import graph is incremental: route
+        extraction resolves router prefixes across files and is cached per commit (analysis_store) instead.
+        """
+        known = {r.path for r in records}
+        previous, engine = await asyncio.to_thread(self._prepare, entry.url, index, engine)
+        blobs = await self.blob_shas(entry.path)
+        resolver_key = await asyncio.to_thread(self._resolver_key, index, blobs)
+
+        if previous and previous["sha"] == entry.sha and previous.get("resolver_key") == resolver_key \
+                and set(previous["files"]) == known:
+            logger.info(f"Reusing stored import graph for {entry.url}@{entry.sha[:12]}")
+            return previous["edges"]
+
+        reuse = self.unchanged(previous, blobs, known) if previous else {}
+
+        to_parse = [r for r in records if r.path not in reuse]
+        parsed, new_edges = await asyncio.to_thread(engine.scan, to_parse, known)
+
+        if previous and previous.get("resolver_key") == resolver_key and set(previous["files"]) == known:
+            # Same file set and resolver config: untouched files resolve the same way, patch in place
+            edges = {e for e in previous["edges"] if e[0] not in parsed} | new_edges
+        else:
+            # Files added/removed or aliases changed: targets may (dis)appear, so re-resolve cached imports too
+            cached_imports = {path: record["imports"] for path, record in reuse.items()}
+            edges = new_edges | await asyncio.to_thread(engine.resolve_all, cached_imports, known)
+
+        logger.info(f"Import graph for {entry.url}@{entry.sha[:12]}: parsed {len(to_parse)}, "
+                    f"reused {len(reuse)} of {len(records)} files")
+
+        files = {path: record for path, record in reuse.items()}
+        for path, raw_imports in parsed.items():
+            files[path] = {"blob": blobs.get(path), "imports": raw_imports}
+        state = {"version": STATE_VERSION, "url": entry.url, "sha": entry.sha, "resolver_key": resolver_key,
+                 "files": files, "edges": edges}
+        try:
+            await asyncio.to_thread(self.save, state)
+        except OSError as e:
+            logger.warning(f"Could not persist analysis state for {entry.url}: {e}")
+        return edges
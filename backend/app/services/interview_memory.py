@@ -0,0 +1,152 @@
+import json
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from bson import ObjectId
+from app.core.config import settings
+from app.core.database import db
+from app.services.llm_client import llm_registry
+from app.services.llm_scheduler import llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+MEMORY_PROMPT = """
+        You keep the interviewer's running notes for an ongoing {role} interview at a {company} company.
+
+        Current summary:
+        {summary}
+
+        Current key facts:
+        {facts}
+
+        New exchanges to fold into the notes:
+        {exchanges}
+
+        Task:
+        Rewrite the notes so they also cover the new exchanges.
+        - summary: at most {words} words. Topics covered so far, how the candidate performed on each, open threads worth revisiting.
+        - facts: at most {max_facts} short (under {fact_chars} characters), concrete statements about the candidate (claims, strengths, mistakes, questions already asked).
+          Merge duplicates and drop the least useful facts to stay within the limit.
+
+        Output Format: JSON
+        {{"summary": "...", "facts": ["...", "..."]}}
+        """
+
+
+def history_for_ai(session: dict) -> List[Dict[str, str]]:
+    """The session's turns as [{"question", "user_answer"}]; the last question is the one awaiting an answer."""
+    history = []
+    for t in session.get("turns", []):
+        if t["role"] == "assistant":
+            history.append({"question": t["question"], "user_answer": ""})
+        elif t["role"] == "user":
+            if history:
+                history[-1]["user_answer"] = t["answer"]
+    return history
+
+
+def exchanges_text(exchanges: List[Dict[str, str]]) -> str:
+    return "".join(f"Interviewer: {turn.get('question')}\nCandidate: {turn.get('user_answer')}\n" for turn in exchanges)
+
+
+def recent_turns(history: List[Dict[str, str]], memory: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Exchanges the turn prompt shows verbatim: those the summary doesn't cover yet, at most
+    INTERVIEW_RECENT_TURNS plus a little slack for a summary update still in flight.
+    """
+    covered = (memory or {}).get("covered_turns", 0)
+    return history[covered:][-(settings.INTERVIEW_RECENT_TURNS + settings.INTERVIEW_MEMORY_LAG_TURNS):]
+
+
+def memory_text(memory: Optional[Dict[str, Any]]) -> str:
+    if not memory or not (memory.get("summary") or memory.get("facts")):
+        return "(nothing yet)"
+    facts = "".join(f"- {fact}\n" for fact in memory.get("facts", []))
+    return f"{memory.get('summary', '')}\nKey facts:\n{facts}"
+
+
+# --- Interview Memory ---
+class InterviewMemory:
+    """
+    Rolling memory of an interview, stored as `memory` on its interview_sessions document:
+    {"summary", "facts", "covered_turns", "updated_at"}. Exchanges leaving the verbatim window of
+    the turn prompt are folded into the summary by a small model call after the turn is saved,
+    so the turn prompt stays the same size however long the session runs.
+    """
+    def __init__(self, collection=None):
+        self._collection = collection
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def collection(self):
+        return self._collection if self._collection is not None else db.interview_sessions
+
+    def schedule(self, session_id: str, api_key: Optional[str]):
+        """Brings the session's memory up to date in the background (called once a turn is saved)."""
+        if not settings.INTERVIEW_MEMORY_ENABLED or session_id in self._refreshing:
+            return
+        self._refreshing.add(session_id)
+        task = asyncio.create_task(self._refresh(session_id, api_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, session_id: str, api_key: Optional[str]):
+        try:
+            while True:
+                session = await asyncio.to_thread(self._load, session_id)
+                if session is None:
+                    return
+                memory = session.get("memory") or {"summary": "", "facts": [], "covered_turns": 0}
+                history = history_for_ai(session)
+                # Everything older than the verbatim window; the last entry is the unanswered question
+                pending = history[memory["covered_turns"]:max(0, len(history) - settings.INTERVIEW_RECENT_TURNS)]
+                if not pending:
+                    return
+                batch = pending[:settings.INTERVIEW_MEMORY_FOLD_BATCH]
+                updated = await self._fold(memory, batch, session, api_key)
+                stored = await asyncio.to_thread(self._store, session_id, memory["covered_turns"], updated)
+                if not stored:
+                    logger.info(f"Memory of interview {session_id} was updated elsewhere; re-reading")
+        except Exception as e:
+            # Best effort: the next saved turn tries again, and the turn prompt still has the recent exchanges
+            logger.warning(f"Could not update memory of interview {session_id}: {e}")
+        finally:
+            self._refreshing.discard(session_id)
+
+    async def _fold(self, memory: Dict[str, Any], batch: List[Dict[str, str]], session: dict,
+                    api_key: Optional[str]) -> Dict[str, Any]:
+        facts = "".join(f"- {fact}\n" for fact in memory["facts"]) or "(none)"
+        prompt = MEMORY_PROMPT.format(role=session["role"], company=session["company"],
+                                      summary=memory["summary"] or "(empty)", facts=facts,
+                                      exchanges=exchanges_text(batch),
+                                      words=settings.INTERVIEW_MEMORY_SUMMARY_WORDS,
+                                      max_facts=settings.INTERVIEW_MEMORY_MAX_FACTS,
+                                      fact_chars=settings.INTERVIEW_MEMORY_FACT_CHARS)
+        llm = llm_registry.get(api_key, temperature=0.2, max_tokens=600)
+        response = await llm_scheduler.ainvoke(llm, prompt, site="interview_memory")
+        content = response.content.strip()
+        notes = json.loads(content[content.find("{"):content.rfind("}") + 1])
+        # The model is asked to respect the limits; enforce them so the turn prompt stays bounded
+        summary = " ".join(str(notes.get("summary", "")).split()[:settings.INTERVIEW_MEMORY_SUMMARY_WORDS])
+        facts = [str(fact).strip()[:settings.INTERVIEW_MEMORY_FACT_CHARS] for fact in notes.get("facts", [])
+                 if str(fact).strip()]
+        return {
+            "summary": summary,
+            "facts": facts[:settings.INTERVIEW_MEMORY_MAX_FACTS],
+            "covered_turns": memory["covered_turns"] + len(batch),
+            "updated_at": datetime.utcnow(),
+        }
+
+    def _load(self, session_id: str) -> Optional[dict]:
+        return self.collection.find_one({"_id": ObjectId(session_id)}, {"turns": 1, "memory": 1, "role": 1, "company": 1})
+
+    def _store(self, session_id: str, covered_before: int, memory: Dict[str, Any]) -> bool:
+        # Conditional on the coverage we started from, so concurrent refreshes (other workers) can't regress it
+        covered = {"memory.covered_turns": covered_before} if covered_before else {"memory.covered_turns": {"$in": [None, 0]}}
+        result = self.collection.update_one({"_id": ObjectId(session_id), **covered}, {"$set": {"memory": memory}})
+        return result.modified_count == 1
+
+
+interview_memory = InterviewMemory()
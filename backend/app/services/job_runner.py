@@ -0,0 +1,152 @@
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stage / job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+TERMINAL = {DONE, FAILED}
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    stages: Dict[str, str]
+    status: str = PENDING
+    results: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    _subscribers: Set[asyncio.Queue] = field(default_factory=set, repr=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stages": dict(self.stages),
+            "results": self.results,
+            "error": self.error,
+        }
+
+    def _publish(self, event: Dict[str, Any]):
+        event = {"seq": len(self.events), "job_id": self.id, **event}
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def stage(self, name: str, status: str, result: Any = None, detail: Optional[str] = None):
+        """Records a stage transition; a finished stage's result is published as a partial result."""
+        self.stages[name] = status
+        if result is not None:
+            self.results[name] = result
+        event = {"type": "stage", "stage": name, "status": status}
+        if result is not None:
+            event["result"] = result
+        if detail:
+            event["detail"] = detail
+        self._publish(event)
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        for name, state in self.stages.items():
+            if state == RUNNING:
+                self.stages[name] = FAILED
+            elif state == PENDING:
+                self.stages[name] = SKIPPED
+        self._publish({"type": "job", "status": status, "error": error})
+
+
+# --- Component 5: Background Job Runner ---
+class JobRunner:
+    """
+    Runs long analyses outside the request: submit() returns a Job immediately and the work
+    runs as an asyncio task, at most `max_concurrency` at a time. Progress is kept on the job
+    (so late subscribers get a replay) and pushed to live subscribers.
+    Finished jobs are kept for `ttl_seconds`, and at most `max_jobs` are retained.
+    """
+    def __init__(self, max_concurrency: Optional[int] = None, ttl_seconds: Optional[int] = None,
+                 max_jobs: Optional[int] = None):
+        self.max_concurrency = max_concurrency or settings.JOB_MAX_CONCURRENCY
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.JOB_TTL_SECONDS
+        self.max_jobs = max_jobs or settings.JOB_MAX_RETAINED
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def submit(self, kind: str, stages: List[str], work: Callable[[Job], Awaitable[None]]) -> Job:
+        self._expire()
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        job = Job(id=uuid.uuid4().hex, kind=kind, stages={s: PENDING for s in stages})
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, work))
+        job._publish({"type": "job", "status": PENDING})
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[None]]):
+        try:
+            async with self._semaphore:
+                job.status = RUNNING
+                job._publish({"type": "job", "status": RUNNING})
+                await work(job)
+            job._finish(DONE)
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+            job._finish(FAILED, str(e))
+        finally:
+            self._tasks.pop(job.id, None)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yields every event of the job (history first), ending after the job's final event."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        job._subscribers.add(queue)
+        try:
+            history = list(job.events)
+            for event in history:
+                yield event
+            if job.status in TERMINAL:
+                return
+            last_seq = history[-1]["seq"] if history else -1
+            while True:
+                event = await queue.get()
+                if event["seq"] <= last_seq:
+                    continue
+                yield event
+                if event["type"] == "job" and event["status"] in TERMINAL:
+                    return
+        finally:
+            job._subscribers.discard(queue)
+
+    def _expire(self):
+        now = time.time()
+        for job_id in list(self._jobs.keys()):
+            job = self._jobs[job_id]
+            expired = job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+            if expired or (len(self._jobs) > self.max_jobs and job.status in TERMINAL):
+                self._jobs.pop(job_id)
+
+
+job_runner = JobRunner()
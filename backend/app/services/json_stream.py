@@ -0,0 +1,162 @@
+import json
+import logging
+from bisect import bisect_right
+from typing import Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Path = Tuple[Any, ...]  # Dict keys and list indexes from the document root
+WILDCARD = "*"
+
+
+def path_matches(path: Path, pattern: Path) -> bool:
+    return len(path) == len(pattern) and all(p == WILDCARD or p == k for k, p in zip(path, pattern))
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "start", "expect_key", "key", "index")
+
+    def __init__(self, kind: str, path: Path, start: int):
+        self.kind = kind          # '{' or '['
+        self.path = path
+        self.start = start        # Offset of the opening bracket in the text
+        self.expect_key = kind == '{'
+        self.key: Optional[str] = None
+        self.index = 0
+
+
+class JsonStreamParser:
+    """
+    Incremental scanner for one JSON document arriving in chunks (e.g. streamed LLM output).
+    feed() returns (path, value) for every completed value whose path matches one of `watch`,
+    as soon as its closing character arrives, e.g. watch=[("levels", "*")] yields each element
+    of the top-level "levels" array. Text before the first '{' (markdown fences, chatter) is skipped.
+
+    Only structure is tracked while scanning; a watched value is decoded with json.loads once complete,
+    so the cost is one pass over the text plus decoding what is actually emitted. Chunks are kept as
+    received (never concatenated into one growing string); offsets below are from the document start.
+    Watched values that fail to decode are listed in `skipped`; `text` is the whole input, for callers
+    that fall back to parsing it in one go.
+    """
+    def __init__(self, watch: Iterable[Path]):
+        self.watch = [tuple(p) for p in watch]
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []  # Start offset of each chunk
+        self._length = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._value_start: Optional[int] = None  # Start of the scalar being scanned
+        self._string_is_key = False
+        self.skipped: List[Path] = []
+
+    @property
+    def done(self) -> bool:
+        """True once the root object is closed."""
+        return self._done
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far, including input after the root closed."""
+        return "".join(self._chunks)
+
+    def _child_path(self) -> Path:
+        frame = self._stack[-1]
+        return frame.path + ((frame.key,) if frame.kind == '{' else (frame.index,))
+
+    def _slice(self, start: int, end: int) -> str:
+        """Text between two document offsets, joining only the chunks it spans."""
+        first = bisect_right(self._offsets, start) - 1
+        last = bisect_right(self._offsets, end - 1) - 1
+        if first == last:
+            base = self._offsets[first]
+            return self._chunks[first][start - base:end - base]
+        text = "".join(self._chunks[first:last + 1])
+        base = self._offsets[first]
+        return text[start - base:end - base]
+
+    def _complete(self, path: Path, start: int, end: int, out: List[Tuple[Path, Any]]):
+        if any(path_matches(path, p) for p in self.watch):
+            try:
+                out.append((path, json.loads(self._slice(start, end))))
+            except ValueError as e:
+                logger.warning(f"Skipping undecodable streamed value at {path}: {e}")
+                self.skipped.append(path)
+
+    def _end_scalar(self, end: int, out: List[Tuple[Path, Any]]):
+        if self._value_start is not None:
+            self._complete(self._child_path(), self._value_start, end, out)
+            self._value_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        out: List[Tuple[Path, Any]] = []
+        if not chunk:
+            return out
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+        if self._done:
+            return out
+        text = chunk
+        i = 0
+        n = len(text)
+
+        if not self._started:
+            i = text.find('{')
+            if i == -1:
+                return out
+
+        while i < n:
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        frame = self._stack[-1]
+                        frame.key = json.loads(self._slice(self._value_start, base + i + 1))
+                        self._value_start = None
+                    else:
+                        self._end_scalar(base + i + 1, out)
+                i += 1
+                continue
+
+            if c in ' \t\r\n':
+                if self._value_start is not None:
+                    self._end_scalar(base + i, out)
+            elif c == '"':
+                self._in_string = True
+                self._string_is_key = bool(self._stack) and self._stack[-1].expect_key
+                self._value_start = base + i
+            elif c in '{[':
+                self._stack.append(_Frame(c, self._child_path() if self._stack else (), base + i))
+                self._started = True
+            elif c in '}]':
+                self._end_scalar(base + i, out)
+                frame = self._stack.pop()
+                self._complete(frame.path, frame.start, base + i + 1, out)
+                if not self._stack:
+                    self._done = True
+                    return out
+            elif c == ':':
+                self._stack[-1].expect_key = False
+            elif c == ',':
+                self._end_scalar(base + i, out)
+                frame = self._stack[-1]
+                if frame.kind == '{':
+                    frame.expect_key = True
+                    frame.key = None
+                else:
+                    frame.index += 1
+            elif self._value_start is None:
+                # Start of a number / true / false / null
+                self._value_start = base + i
+            i += 1
+        return out
+
@@ -0,0 +1,205 @@
+import re
+import time
+import json
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.database import db
+from app.services.analysis_store import encode_value, decode_value
+from app.services.llm_scheduler import llm_scheduler
+from app.services.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+# Request options that don't change what the model answers
+_IGNORED_PARAMS = {"stream", "n"}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompts that differ only in indentation/line wrapping/Unicode form get the same key."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', prompt)).strip()
+
+
+def cache_key(llm: Any, prompt: str) -> str:
+    params = {k: v for k, v in getattr(llm, "_default_params", {}).items() if k not in _IGNORED_PARAMS}
+    material = json.dumps({"params": params, "prompt": normalize_prompt(prompt)}, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+# --- LLM Response Cache ---
+class LLMCache:
+    """
+    Two-tier cache in front of chat model calls: an in-process LRU, then a Mongo collection whose
+    TTL index expires entries. Keys hash the model, its sampling params and the normalized prompt;
+    the prompt itself is never stored.
+    Call sites opt in by going through ainvoke() with a site name (LLM_CACHE_DISABLED_SITES turns
+    one off). Only responses that `parse` accepts are cached, so a malformed answer is retried.
+    Misses are sent through the LLM scheduler (rate budgets, retries).
+    """
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else db.llm_cache
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disabled_until = 0.0
+        self._indexed = False
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, site: str, event: str):
+        site_stats = self._stats.setdefault(site, {"memory_hits": 0, "store_hits": 0, "misses": 0, "stored": 0})
+        site_stats[event] += 1
+
+    # --- Mongo tier (sync; called in an executor) ---
+    def _store_available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _store_failed(self, action: str, e: Exception):
+        logger.warning(f"LLM cache {action} failed, disabling Mongo tier for {settings.ANALYSIS_STORE_RETRY_SECONDS}s: {e}")
+        self._disabled_until = time.monotonic() + settings.ANALYSIS_STORE_RETRY_SECONDS
+
+    def _store_get(self, key: str) -> Optional[Tuple[str, float]]:
+        if not self._store_available():
+            return None
+        try:
+            doc = self.collection.find_one({"_id": key})
+        except PyMongoError as e:
+            self._store_failed("read", e)
+            return None
+        # The TTL monitor only runs every minute or so
+        remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds() if doc else 0
+        if remaining <= 0:
+            return None
+        return decode_value(doc["content"]), time.time() + remaining
+
+    def _store_put(self, key: str, site: str, content: str, ttl_seconds: int):
+        if not self._store_available():
+            return
+        now = datetime.utcnow()
+        try:
+            if not self._indexed:
+                self.collection.create_index("expires_at", expireAfterSeconds=0)
+                self._indexed = True
+            self.collection.replace_one(
+                {"_id": key},
+                {"site": site, "content": encode_value(content), "created_at": now,
+                 "expires_at": now + timedelta(seconds=ttl_seconds)},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            self._store_failed("write", e)
+
+    # --- Memory tier ---
+    def _memory_get(self, key: str) -> Optional[str]:
+        found = self._memory.get(key)
+        if found is None:
+            return None
+        if found[1] <= time.time():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return found[0]
+
+    def _memory_put(self, key: str, content: str, expires_at: float):
+        self._memory[key] = (content, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.LLM_CACHE_MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    async def ainvoke(self, llm: Any, prompt: str, site: str, parse: Optional[Callable[[str], Any]] = None,
+                      ttl_seconds: Optional[int] = None) -> Any:
+        """
+        `parse(llm.ainvoke(prompt).content)` (the raw content if `parse` is None), cached per site.
+        Exceptions from the model or from `parse` propagate and nothing is cached.
+        """
+        parse = parse or (lambda content: content)
+        if not settings.LLM_CACHE_ENABLED or site in settings.LLM_CACHE_DISABLED_SITES:
+            return parse((await llm_scheduler.ainvoke(llm, prompt, site)).content)
+
+        lookup = time.perf_counter()
+        key = cache_key(llm, prompt)
+        content = self._memory_get(key)
+        if content is not None:
+            self._count(site, "memory_hits")
+            telemetry.record_cache_hit(site, "memory", time.perf_counter() - lookup)
+            return parse(content)
+
+        found = await asyncio.to_thread(self._store_get, key)
+        if found is not None:
+            self._count(site, "store_hits")
+            telemetry.record_cache_hit(site, "store", time.perf_counter() - lookup)
+            self._memory_put(key, *found)
+            return parse(found[0])
+
+        self._count(site, "misses")
+        content = (await llm_scheduler.ainvoke(llm, prompt, site)).content
+        value = parse(content)
+        ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL_SECONDS
+        self._memory_put(key, content, time.time() + ttl_seconds)
+        await asyncio.to_thread(self._store_put, key, site, content, ttl_seconds)
+        self._count(site, "stored")
+        return value
+
+    async def astream(self, llm: Any, prompt: str, site: str, validate: Optional[Callable[[str], Any]] = None,
+                      ttl_seconds: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Content chunks of `llm.astream(prompt)`; a cached response is replayed as a single chunk.
+        The full content is cached once the stream completes, if `validate` accepts it.
+        """
+        if not settings.LLM_CACHE_ENABLED or site in settings.LLM_CACHE_DISABLED_SITES:
+            async for chunk in llm_scheduler.astream(llm, prompt, site):
+                yield chunk.content
+            return
+
+        lookup = time.perf_counter()
+        key = cache_key(llm, prompt)
+        content = self._memory_get(key)
+        if content is not None:
+            self._count(site, "memory_hits")
+            telemetry.record_cache_hit(site, "memory", time.perf_counter() - lookup)
+            yield content
+            return
+        found = await asyncio.to_thread(self._store_get, key)
+        if found is not None:
+            self._count(site, "store_hits")
+            telemetry.record_cache_hit(site, "store", time.perf_counter() - lookup)
+            self._memory_put(key, *found)
+            yield found[0]
+            return
+
+        self._count(site, "misses")
+        parts = []
+        async for chunk in llm_scheduler.astream(llm, prompt, site):
+            parts.append(chunk.content)
+            yield chunk.content
+        content = "".join(parts)
+        try:
+            if validate:
+                validate(content)
+        except Exception as e:
+            logger.info(f"Not caching {site} response that failed validation: {e}")
+            return
+        ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL_SECONDS
+        self._memory_put(key, content, time.time() + ttl_seconds)
+        await asyncio.to_thread(self._store_put, key, site, content, ttl_seconds)
+        self._count(site, "stored")
+
+    def metrics(self) -> Dict[str, Any]:
+        totals = {"memory_hits": 0, "store_hits": 0, "misses": 0, "stored": 0}
+        for site_stats in self._stats.values():
+            for event, count in site_stats.items():
+                totals[event] += count
+        lookups = totals["memory_hits"] + totals["store_hits"] + totals["misses"]
+        return {
+            **totals,
+            "hit_rate": round((totals["memory_hits"] + totals["store_hits"]) / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "sites": {site: dict(s) for site, s in self._stats.items()},
+        }
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,140 @@
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+from langchain_groq import ChatGroq
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible id for an API key: registry keys and logs never hold the key itself."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+# --- Shared LLM Clients ---
+class LLMClientRegistry:
+    """
+    Reuses `ChatGroq` instances per (API key hash, model, params) instead of building one per call.
+    All of them share one keep-alive HTTP connection pool, so a turn doesn't pay DNS/TLS setup and
+    sockets aren't opened and dropped per request. Entries are LRU-bounded and expire when idle.
+    """
+    def __init__(self):
+        self._clients: "OrderedDict[Tuple, Tuple[ChatGroq, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.Client] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._listeners: List[Callable[[str, httpx.Response], None]] = []
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+        )
+
+    def on_response(self, listener: Callable[[str, httpx.Response], None]):
+        """`listener(key_fingerprint, response)` is called once response headers arrive; it must not block."""
+        self._listeners.append(listener)
+
+    def _notify(self, response: httpx.Response):
+        auth = response.request.headers.get("authorization", "")
+        fingerprint = key_fingerprint(auth[7:]) if auth.startswith("Bearer ") else ""
+        for listener in self._listeners:
+            try:
+                listener(fingerprint, response)
+            except Exception as e:
+                logger.warning(f"LLM response listener failed: {e}")
+
+    async def _anotify(self, response: httpx.Response):
+        self._notify(response)
+
+    def _bind_loop(self):
+        """
+        Async connections belong to the event loop that opened them. If the loop changed
+        (e.g. a script calling asyncio.run twice), start a fresh pool and drop clients built on the old one.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._async_http is None or (loop is not None and loop is not self._loop):
+            if self._async_http is not None:
+                logger.info("Event loop changed, rebuilding LLM connection pool")
+                self._clients.clear()
+            self._async_http = httpx.AsyncClient(limits=self._limits(), timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                                                 event_hooks={"response": [self._anotify]})
+            self._loop = loop
+        if self._http is None:
+            self._http = httpx.Client(limits=self._limits(), timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                                      event_hooks={"response": [self._notify]})
+
+    def _expire(self, now: float):
+        # Oldest-used first: stop at the first entry that is still fresh
+        while self._clients:
+            key, (_, last_used) = next(iter(self._clients.items()))
+            if now - last_used < settings.LLM_CLIENT_IDLE_SECONDS and len(self._clients) <= settings.LLM_CLIENT_MAX_ENTRIES:
+                break
+            self._clients.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, api_key: str, model: Optional[str] = None, **params: Any) -> ChatGroq:
+        """
+        Shared chat model for these settings, e.g. get(api_key, temperature=0.2, max_tokens=2000).
+        `params` are ChatGroq fields; the returned instance must not be mutated.
+        """
+        model = model or settings.LLM_MODEL
+        key = (key_fingerprint(api_key), model, tuple(sorted(params.items())))
+        now = time.monotonic()
+        with self._lock:
+            self._bind_loop()
+            found = self._clients.get(key)
+            if found is not None:
+                self._stats["hits"] += 1
+                self._clients[key] = (found[0], now)
+                self._clients.move_to_end(key)
+                return found[0]
+
+            self._stats["misses"] += 1
+            if settings.LLM_PROVIDER == "fake":
+                from app.services.fake_providers import FakeChatModel
+                llm = FakeChatModel(api_key, model, **params)
+                self._clients[key] = (llm, now)
+                self._expire(now)
+                return llm
+            llm = ChatGroq(
+                groq_api_key=api_key,
+                model_name=model,
+                http_client=self._http,
+                http_async_client=self._async_http,
+                request_timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                max_retries=0,
+                **params,
+            )
+            self._clients[key] = (llm, now)
+            self._expire(now)
+            return llm
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"clients": len(self._clients), **self._stats}
+
+    async def close(self):
+        with self._lock:
+            self._clients.clear()
+            http, async_http = self._http, self._async_http
+            self._http = self._async_http = None
+        if async_http is not None:
+            await async_http.aclose()
+        if http is not None:
+            http.close()
+
+
+llm_registry = LLMClientRegistry()
@@ -0,0 +1,334 @@
+import os
+import re
+import time
+import hashlib
+import random
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+import httpx
+import groq
+from app.core.config import settings
+from app.services.llm_client import llm_registry, key_fingerprint
+from app.services.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+CHARS_PER_TOKEN = 4  # Rough prompt token estimate used to reserve token budget before a call
+# Retried: rate limiting, timeouts, conflicts and server-side failures
+_RETRY_STATUSES = {408, 409, 429}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in Groq's reset headers, e.g. "7.66s", "2m59.56s", "120ms"; None if unparseable."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: httpx.Headers, name: str) -> Optional[int]:
+    try:
+        return int(float(headers[name]))
+    except (KeyError, ValueError):
+        return None
+
+
+class RateLimited(Exception):
+    """Raised when a call can't get its key's rate budget in time; `retry_after` is a hint in seconds."""
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class KeyBudget:
+    """What one API key may still spend, as last reported by the API (x-ratelimit-* headers)."""
+    def __init__(self):
+        self.request_limit: Optional[int] = None
+        self.requests_left: Optional[int] = None
+        self.requests_reset_at = 0.0
+        self.token_limit: Optional[int] = None
+        self.tokens_left: Optional[int] = None
+        self.tokens_reset_at = 0.0
+        self.blocked_until = 0.0  # From Retry-After on a 429
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()  # Calls for one key leave the queue in arrival order
+
+    def observe(self, headers: httpx.Headers, status: int, now: float):
+        requests_left = _header_int(headers, "x-ratelimit-remaining-requests")
+        if requests_left is not None:
+            self.requests_left = requests_left
+            self.request_limit = _header_int(headers, "x-ratelimit-limit-requests") or self.request_limit
+            self.requests_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0.0)
+        tokens_left = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if tokens_left is not None:
+            self.tokens_left = tokens_left
+            self.token_limit = _header_int(headers, "x-ratelimit-limit-tokens") or self.token_limit
+            self.tokens_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+        if status == 429:
+            retry_after = parse_duration(headers.get("retry-after")) or settings.LLM_RETRY_BASE_SECONDS
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a call costing `tokens` fits the budget (0 if it fits now)."""
+        if self.requests_left is not None and now >= self.requests_reset_at:
+            self.requests_left = self.request_limit
+        if self.tokens_left is not None and now >= self.tokens_reset_at:
+            self.tokens_left = self.token_limit
+        wait = self.blocked_until - now
+        if self.requests_left is not None and self.requests_left <= 0:
+            wait = max(wait, self.requests_reset_at - now)
+        if self.tokens_left is not None and self.tokens_left < min(tokens, self.token_limit or tokens):
+            wait = max(wait, self.tokens_reset_at - now)
+        return max(0.0, wait)
+
+    def reserve(self, tokens: int):
+        # Optimistic until the response headers replace it; keeps a burst from overshooting the budget
+        if self.requests_left is not None:
+            self.requests_left -= 1
+        if self.tokens_left is not None:
+            self.tokens_left -= tokens
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "requests_left": self.requests_left,
+            "tokens_left": self.tokens_left,
+            "blocked_for": round(max(0.0, self.blocked_until - now), 2),
+        }
+
+
+# --- LLM Scheduler ---
+class LLMScheduler:
+    """
+    Runs model calls within each API key's rate budget. Budgets are tracked from the rate-limit
+    headers of every response on the shared connection pool; calls that don't fit wait in a FIFO
+    queue per key until the window resets (or fail fast with RateLimited if that's too far off).
+    429s, 5xx and connection errors are retried with full-jitter exponential backoff, honoring
+    Retry-After. Latency-critical calls can be hedged: if the first attempt is slower than
+    `hedge_after`, a duplicate is sent when the budget allows and the first answer wins.
+    """
+    def __init__(self):
+        self._budgets: Dict[str, KeyBudget] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _count(self, site: str, event: str, amount: float = 1):
+        site_stats = self._stats.setdefault(site, {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                                                   "queued": 0, "queue_seconds": 0.0, "rate_limited": 0,
+                                                   "failures": 0})
+        site_stats[event] += amount
+
+    def _budget(self, fingerprint: str) -> KeyBudget:
+        budget = self._budgets.get(fingerprint)
+        if budget is None:
+            now = time.monotonic()
+            for stale in [fp for fp, b in self._budgets.items()
+                          if now - b.last_used > settings.LLM_CLIENT_IDLE_SECONDS and not b.lock.locked()]:
+                del self._budgets[stale]
+            budget = self._budgets[fingerprint] = KeyBudget()
+        budget.last_used = time.monotonic()
+        return budget
+
+    def observe(self, fingerprint: str, response: httpx.Response):
+        """Response listener of the shared LLM connection pool."""
+        if fingerprint:
+            self._budget(fingerprint).observe(response.headers, response.status_code, time.monotonic())
+
+    async def _admit(self, budget: KeyBudget, tokens: int, site: str):
+        started = time.monotonic()
+        async with budget.lock:
+            while True:
+                now = time.monotonic()
+                wait = budget.wait_time(tokens, now)
+                if wait <= 0:
+                    budget.reserve(tokens)
+                    break
+                if now + wait - started > settings.LLM_QUEUE_MAX_WAIT_SECONDS:
+                    self._count(site, "rate_limited")
+                    raise RateLimited(f"Rate limit of this API key is exhausted for another {wait:.0f}s",
+                                      retry_after=int(wait) + 1)
+                await asyncio.sleep(wait)
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                self._count(site, "queued")
+                self._count(site, "queue_seconds", waited)
+
+    def _retry_delay(self, e: Exception, attempt: int) -> Optional[float]:
+        """Backoff before retrying after `e`, or None if `e` is not worth retrying."""
+        status = getattr(e, "status_code", None)
+        transient = isinstance(e, (httpx.TransportError, asyncio.TimeoutError, groq.APIConnectionError))
+        if not transient and not (status in _RETRY_STATUSES or (status or 0) >= 500):
+            return None
+        delay = random.uniform(0, min(settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+        response = getattr(e, "response", None)
+        retry_after = parse_duration(response.headers.get("retry-after")) if response is not None else None
+        return max(delay, retry_after or 0.0)
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]], budget: KeyBudget, tokens: int, site: str,
+                      hedge_after: Optional[float], discard: Optional[Callable[[Any], Any]] = None) -> Any:
+        first = asyncio.ensure_future(attempt())
+        if not hedge_after:
+            return await first
+        tasks, winner = [first], None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done and budget.wait_time(tokens, time.monotonic()) <= 0:
+                budget.reserve(tokens)
+                self._count(site, "hedges")
+                tasks.append(asyncio.ensure_future(attempt()))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not first:
+                            self._count(site, "hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif discard and not task.cancelled() and task.exception() is None:
+                    # Both attempts finished together: release the loser (e.g. close its stream)
+                    discard(task.result())
+
+    async def _run(self, llm: Any, prompt: str, site: str, attempt: Callable[[], Awaitable[Any]],
+                   hedge_after: Optional[float], call: Dict[str, int],
+                   discard: Optional[Callable[[Any], Any]] = None) -> Any:
+        api_key = getattr(llm, "groq_api_key", None)
+        api_key = api_key.get_secret_value() if hasattr(api_key, "get_secret_value") else (api_key or "")
+        budget = self._budget(key_fingerprint(api_key))
+        tokens = len(prompt) // CHARS_PER_TOKEN
+        self._count(site, "calls")
+        for n in range(settings.LLM_MAX_RETRIES + 1):
+            await self._admit(budget, tokens, site)
+            try:
+                return await self._hedged(attempt, budget, tokens, site, hedge_after, discard)
+            except Exception as e:
+                delay = self._retry_delay(e, n)
+                if delay is None or n == settings.LLM_MAX_RETRIES:
+                    self._count(site, "failures")
+                    raise
+                self._count(site, "retries")
+                call["retries"] += 1
+                logger.warning(f"LLM call for {site} failed ({e}), retry {n + 1}/{settings.LLM_MAX_RETRIES} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _record(self, site: str, content: str):
+        """
+        With LLM_RECORD_DIR set, raw outputs are kept as a replay corpus (see benchmarks/replay.py).
+        The write happens in an executor and the call doesn't wait for it.
+        """
+        asyncio.get_running_loop().run_in_executor(None, self._write_record, site, content)
+
+    def _write_record(self, site: str, content: str):
+        try:
+            os.makedirs(settings.LLM_RECORD_DIR, exist_ok=True)
+            name = f"{site}-{hashlib.sha256(content.encode()).hexdigest()[:16]}.txt"
+            with open(os.path.join(settings.LLM_RECORD_DIR, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+        except OSError as e:
+            logger.warning(f"Could not record {site} output: {e}")
+
+    def _instrument(self, llm: Any, prompt: str, site: str, started: float, call: Dict[str, int], outcome: str,
+                    usage: Optional[Dict[str, int]] = None, completion_chars: int = 0, ttft: Optional[float] = None):
+        """Reports one logical call (queueing, retries and hedges included) to telemetry."""
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        elif outcome == "ok" or completion_chars:
+            # No usage reported (e.g. a stream closed before its last chunk): estimate from text length
+            prompt_tokens, completion_tokens = len(prompt) // CHARS_PER_TOKEN, completion_chars // CHARS_PER_TOKEN
+        else:
+            prompt_tokens = completion_tokens = 0
+        telemetry.record_llm(site, getattr(llm, "model_name", None) or "unknown", time.perf_counter() - started,
+                             outcome, ttft=ttft, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                             retries=call["retries"], estimated=not usage)
+
+    async def ainvoke(self, llm: Any, prompt: str, site: str, hedge_after: Optional[float] = None) -> Any:
+        """`llm.ainvoke(prompt)` within the key's rate budget, retried on transient failures."""
+        started, call = time.perf_counter(), {"retries": 0}
+        try:
+            message = await self._run(llm, prompt, site, lambda: llm.ainvoke(prompt), hedge_after, call)
+        except RateLimited:
+            self._instrument(llm, prompt, site, started, call, "rate_limited")
+            raise
+        except Exception:
+            self._instrument(llm, prompt, site, started, call, "error")
+            raise
+        self._instrument(llm, prompt, site, started, call, "ok", usage=getattr(message, "usage_metadata", None),
+                         completion_chars=len(message.content))
+        if settings.LLM_RECORD_DIR:
+            self._record(site, message.content)
+        return message
+
+    async def astream(self, llm: Any, prompt: str, site: str, hedge_after: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        `llm.astream(prompt)` within the key's rate budget. Retries and hedging only apply until the
+        first chunk arrives; once content has been yielded a failure propagates.
+        """
+        async def attempt():
+            stream = llm.astream(prompt)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        started, call = time.perf_counter(), {"retries": 0}
+        try:
+            stream, first = await self._run(llm, prompt, site, attempt, hedge_after, call,
+                                            discard=lambda opened: asyncio.ensure_future(opened[0].aclose()))
+        except RateLimited:
+            self._instrument(llm, prompt, site, started, call, "rate_limited")
+            raise
+        except Exception:
+            self._instrument(llm, prompt, site, started, call, "error")
+            raise
+        ttft = time.perf_counter() - started
+        if first is None:
+            self._instrument(llm, prompt, site, started, call, "ok", ttft=ttft)
+            return
+        parts = [first.content] if settings.LLM_RECORD_DIR else None
+        usage = getattr(first, "usage_metadata", None)
+        chars, outcome = len(first.content), "error"
+        try:
+            yield first
+            async for chunk in stream:
+                if parts is not None:
+                    parts.append(chunk.content)
+                chars += len(chunk.content)
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+            outcome = "ok"
+        except GeneratorExit:
+            outcome = "abandoned"  # Consumer stopped reading (client disconnected)
+            raise
+        finally:
+            await stream.aclose()
+            self._instrument(llm, prompt, site, started, call, outcome, usage=usage, completion_chars=chars, ttft=ttft)
+        if parts is not None:
+            self._record(site, "".join(parts))
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "sites": {site: {k: round(v, 3) for k, v in s.items()} for site, s in self._stats.items()},
+            "keys": {fp: b.snapshot(now) for fp, b in self._budgets.items()},
+        }
+
+
+llm_scheduler = LLMScheduler()
+llm_registry.on_response(llm_scheduler.observe)
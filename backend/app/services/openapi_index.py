@@ -0,0 +1,252 @@
+import os
+import json
+import base64
+import bisect
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import yaml
+
+try:
+    import ijson  # Streams large JSON specs instead of loading them whole (pinned in requirements.txt)
+except ImportError:  # Partial installs still work, loading every spec whole
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+SPEC_FILES = ['openapi.json', 'openapi.yaml', 'openapi.yml', 'swagger.json', 'swagger.yaml',
+              'swagger.yml', 'api-docs.json']
+HTTP_METHODS = ['get', 'post', 'put', 'delete', 'patch', 'options', 'head']
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+MAX_REF_DEPTH = 32
+
+
+def _load_file(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            return yaml.load(f, Loader=YAML_LOADER)
+        return json.load(f)
+
+
+def _looks_like_spec(path: str) -> bool:
+    """Cheap sniff of the first bytes, so non-spec files with spec-like names aren't parsed in full."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(4096)
+    except OSError:
+        return False
+    return b'openapi' in head or b'swagger' in head
+
+
+class RefResolver:
+    """
+    Resolves `$ref`s (local `#/...` pointers and relative file refs) with memoization:
+    each distinct ref is looked up once, however many operations share it.
+    Specs come from cloned repos, so file refs must stay inside `repo_root` (symlinks included)
+    and remote (URL) refs are never fetched; either kind resolves to None.
+    """
+    def __init__(self, spec_path: str, root: Dict[str, Any], repo_root: Optional[str] = None):
+        self.spec_path = os.path.realpath(spec_path)
+        self.repo_root = os.path.realpath(repo_root or os.path.dirname(spec_path))
+        self._documents: Dict[str, Any] = {self.spec_path: root}
+        self._memo: Dict[Tuple[str, str], Any] = {}
+
+    def _doc_path(self, file_part: str, current: str) -> Optional[str]:
+        if '://' in file_part or file_part.startswith('//'):
+            logger.warning(f"Ignoring remote $ref {file_part}")
+            return None
+        path = os.path.realpath(os.path.join(os.path.dirname(current), file_part))
+        if os.path.commonpath([path, self.repo_root]) != self.repo_root:
+            logger.warning(f"Ignoring $ref outside the repository: {file_part}")
+            return None
+        return path
+
+    def _document(self, path: str) -> Any:
+        if path not in self._documents:
+            try:
+                self._documents[path] = _load_file(path)
+            except Exception as e:
+                logger.warning(f"Unresolvable $ref document {path}: {e}")
+                self._documents[path] = None
+        return self._documents[path]
+
+    def locate(self, node: Any, current: Optional[str] = None) -> Tuple[Any, str]:
+        """(resolved node, path of the document it came from); nested relative refs resolve against the latter."""
+        current = current or self.spec_path
+        depth = 0
+        while isinstance(node, dict) and '$ref' in node and depth < MAX_REF_DEPTH:
+            ref = node['$ref']
+            if not isinstance(ref, str):
+                return None, current
+            file_part, _, pointer = ref.partition('#')
+            doc_path = self._doc_path(file_part, current) if file_part else current
+            if doc_path is None:
+                return None, current
+            key = (doc_path, pointer)
+            if key not in self._memo:
+                target = self._document(doc_path)
+                for token in [t for t in pointer.split('/') if t]:
+                    token = token.replace('~1', '/').replace('~0', '~')
+                    if isinstance(target, dict):
+                        target = target.get(token)
+                    elif isinstance(target, list) and token.isdigit() and int(token) < len(target):
+                        target = target[int(token)]
+                    else:
+                        target = None
+                        break
+                self._memo[key] = (target, doc_path)
+            node, current = self._memo[key]
+            depth += 1
+        return node, current
+
+    def resolve(self, node: Any, current: Optional[str] = None) -> Any:
+        return self.locate(node, current)[0]
+
+
+def _iter_paths(spec_path: str) -> Tuple[Iterator[Tuple[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    (path items, root document or None). JSON specs are streamed with ijson: only the `paths` object
+    is walked, one path item at a time. YAML specs, and JSON ones when ijson is missing, are loaded whole.
+    """
+    if ijson is not None and spec_path.endswith('.json'):
+        def stream():
+            with open(spec_path, 'rb') as f:
+                yield from ijson.kvitems(f, 'paths', use_float=True)
+        return stream(), None
+    root = _load_file(spec_path)
+    if not isinstance(root, dict) or not ("openapi" in root or "swagger" in root):
+        raise ValueError("not an OpenAPI/Swagger document")
+    return iter((root.get("paths") or {}).items()), root
+
+
+class _LazyRoot(dict):
+    """Root document for streamed specs: top-level sections are pulled on first $ref into them."""
+    def __init__(self, spec_path: str):
+        super().__init__()
+        self.spec_path = spec_path
+
+    def get(self, key, default=None):
+        if key not in self:
+            with open(self.spec_path, 'rb') as f:
+                self[key] = next(ijson.items(f, key, use_float=True), default)
+        return super().get(key, default)
+
+
+def parse_spec(spec_path: str, display_name: str, repo_root: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    All operations of a spec file as route dicts (method, url, summary, file, tags, operation_id, parameters).
+    File `$ref`s may only point inside `repo_root` (default: the spec's directory).
+    """
+    items, root = _iter_paths(spec_path)
+    resolver = RefResolver(spec_path, root if root is not None else _LazyRoot(spec_path), repo_root)
+    routes = []
+    for path, path_item in items:
+        path_item, item_doc = resolver.locate(path_item)
+        if not isinstance(path_item, dict):
+            continue
+        shared_params = [(p, item_doc) for p in path_item.get("parameters") or []]
+        for method, details in path_item.items():
+            if not isinstance(method, str) or method.lower() not in HTTP_METHODS:
+                continue
+            details, details_doc = resolver.locate(details, item_doc)
+            if not isinstance(details, dict):
+                details = {}
+            params = []
+            own_params = [(p, details_doc) for p in details.get("parameters") or []]
+            for param, doc in shared_params + own_params:
+                param = resolver.resolve(param, doc)
+                if isinstance(param, dict) and param.get("name"):
+                    params.append(param["name"])
+            routes.append({
+                "method": method.upper(),
+                "url": path,
+                "summary": details.get("summary", ""),
+                "file": display_name,
+                "tags": details.get("tags") or [],
+                "operation_id": details.get("operationId"),
+                "parameters": sorted(set(params)),
+            })
+    return routes
+
+
+class RouteIndex:
+    """
+    Route table sorted by (url, method), with tag and method indexes and path-prefix lookups by
+    binary search. query() pages through matches with an opaque cursor.
+    """
+    def __init__(self, routes: List[Dict[str, Any]]):
+        order = {m.upper(): i for i, m in enumerate(HTTP_METHODS)}
+        self.routes = sorted(routes, key=lambda r: (r["url"], order.get(r["method"], len(order))))
+        self._urls = [r["url"] for r in self.routes]
+        self._by_tag: Dict[str, List[int]] = {}
+        self._by_method: Dict[str, List[int]] = {}
+        for i, route in enumerate(self.routes):
+            for tag in route.get("tags") or []:
+                self._by_tag.setdefault(tag.lower(), []).append(i)
+            self._by_method.setdefault(route["method"], []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    @property
+    def tags(self) -> List[str]:
+        return sorted(self._by_tag)
+
+    @staticmethod
+    def encode_cursor(position: int) -> str:
+        return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        try:
+            return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def query(self, tag: Optional[str] = None, method: Optional[str] = None, prefix: Optional[str] = None,
+              cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        lo, hi = 0, len(self.routes)
+        if prefix:
+            lo = bisect.bisect_left(self._urls, prefix)
+            hi = bisect.bisect_left(self._urls, prefix + '\uffff')
+
+        candidates: Optional[List[int]] = None  # Sorted positions, None = the whole [lo, hi) range
+        for positions in ([self._by_tag.get(tag.lower(), [])] if tag else []) + \
+                         ([self._by_method.get(method.upper(), [])] if method else []):
+            if candidates is None:
+                candidates = positions
+            else:
+                allowed = set(positions)
+                candidates = [p for p in candidates if p in allowed]
+
+        start = self.decode_cursor(cursor) + 1 if cursor else lo
+        start = max(start, lo)
+        if candidates is None:
+            positions = range(start, hi)
+            total = hi - lo
+        else:
+            i = bisect.bisect_left(candidates, lo)
+            j = bisect.bisect_left(candidates, hi)
+            positions = candidates[max(i, bisect.bisect_left(candidates, start)):j]
+            total = j - i
+
+        page = [self.routes[p] for p in positions[:limit]]
+        next_cursor = None
+        if len(positions) > limit:
+            next_cursor = self.encode_cursor(positions[limit - 1])
+        return {"routes": page, "total": total, "next_cursor": next_cursor}
+
+
+def find_and_index(root: str, candidates: List[str]) -> Optional[Tuple[str, RouteIndex]]:
+    """Parses the first candidate (relative path) that is a valid spec; returns (relative path, index)."""
+    for rel_path in candidates:
+        full = os.path.join(root, *rel_path.split('/'))
+        if not _looks_like_spec(full):
+            continue
+        try:
+            routes = parse_spec(full, os.path.basename(rel_path), repo_root=root)
+        except Exception as e:
+            logger.warning(f"Failed to parse potential OpenAPI file {full}: {e}")
+            continue
+        logger.info(f"OpenAPI Spec found: {full} ({len(routes)} operations)")
+        return rel_path, RouteIndex(routes)
+    return None
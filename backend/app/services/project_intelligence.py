@@ -1,43 +1,39 @@
 import os
-import shutil
-import uuid
+import asyncio
 import logging
 import json
-import re
-from typing import Dict, Any, List, Optional
-from git import Repo
-from langchain_groq import ChatGroq
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Set, Tuple
+from app.services.llm_client import llm_registry, key_fingerprint
+from app.services.llm_cache import llm_cache
+from app.services.single_flight import single_flight, flight_key
+from app.core.config import settings
+from app.services.repo_loader import RepoLoader, CloneError
+from app.services.repo_cache import RepoCache, normalize_repo_url
+from app.services.file_index import FileIndex, FileRecord, TEST_DIRS
+from app.services.import_graph import ImportGraphEngine
+from app.services.incremental import IncrementalAnalyzer
+from app.services.route_extractor import RouteExtractor, build_openapi_spec
+from app.services.job_runner import Job, RUNNING, DONE
+from app.services.context_packer import ContextPacker
+from app.services.arch_graph import build_graph, cluster_view, render_mermaid
+from app.services.openapi_index import RouteIndex, SPEC_FILES, find_and_index
+from app.services.analysis_store import analysis_store
 
 logger = logging.getLogger(__name__)
 
-# --- Component 1: Repo Loader ---
-class RepoLoader:
-    def __init__(self, base_dir="temp_repos"):
-        self.base_dir = base_dir
-        os.makedirs(self.base_dir, exist_ok=True)
-
-    def clone_repo(self, repo_url: str) -> str:
-        job_id = str(uuid.uuid4())
-        repo_path = os.path.join(self.base_dir, job_id)
-        try:
-            logger.info(f"Cloning {repo_url} to {repo_path}")
-            Repo.clone_from(repo_url, repo_path)
-            return repo_path
-        except Exception as e:
-            logger.error(f"Clone failed: {e}")
-            if os.path.exists(repo_path):
-                shutil.rmtree(repo_path, ignore_errors=True)
-            raise e
-
-    def cleanup(self, path: str):
-        if os.path.exists(path):
-            shutil.rmtree(path, ignore_errors=True)
+INDEX_CACHE_SIZE = 32
+ROUTE_PAGE_SIZE = 200
+PIPELINE_STAGES = ["clone", "index", "graph", "readme", "spec"]
 
 # --- Component 2: API Contract Service (OpenAPI First) ---
 class ApiContractService:
-    def detect_framework(self, path: str) -> str:
+    def detect_framework(self, index: FileIndex) -> str:
+        path = index.root
         # Check Node.js
-        if os.path.exists(os.path.join(path, "package.json")):
+        if index.exists("package.json"):
             try:
                 with open(os.path.join(path, "package.json"), 'r', encoding='utf-8') as f:
                     content = f.read().lower()
@@ -47,7 +43,7 @@ class ApiContractService:
             except: pass
         
         # Check Python
-        if os.path.exists(os.path.join(path, "requirements.txt")):
+        if index.exists("requirements.txt"):
             try:
                 with open(os.path.join(path, "requirements.txt"), 'r', encoding='utf-8') as f:
                     content = f.read().lower()
@@ -57,34 +53,27 @@ class ApiContractService:
             except: pass
 
         # Check Java
-        if os.path.exists(os.path.join(path, "pom.xml")) or os.path.exists(os.path.join(path, "build.gradle")):
+        if index.exists("pom.xml") or index.exists("build.gradle"):
              return "Spring Boot"
              
         return "Unknown"
 
-    def get_api_specs(self, path: str) -> Dict[str, Any]:
+    def build_route_index(self, index: FileIndex) -> Optional[Tuple[str, RouteIndex]]:
+        """ (spec file, indexed route table) for the first valid OpenAPI/Swagger file (JSON or YAML), shallowest first. """
+        candidates = [r for name in SPEC_FILES for r in index.find(name)]
+        candidates.sort(key=lambda r: r.depth)
+        return find_and_index(index.root, [r.path for r in candidates])
+
+    def get_api_specs(self, index: FileIndex) -> Dict[str, Any]:
         """
-        STRICT: Only returns specs if OpenAPI/Swagger file is found.
-        Does NOT use regex/AST for routes.
+        STRICT: Only returns specs if an OpenAPI/Swagger file is found.
+        Routes come from the spec file alone; source-code extraction (ast/regex, see RouteExtractor)
+        is the separate generate_ai_openapi_for_repo() path.
         """
-        search_files = ['openapi.json', 'swagger.json', 'api-docs.json']
-        ignored_dirs = {'node_modules', 'venv', 'dist', 'build', '.git', '__pycache__'}
-        
-        for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
-            
-            for target in search_files:
-                if target in files:
-                    filepath = os.path.join(root, target)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            spec = json.load(f)
-                            # Basic validation it's an OpenAPI spec
-                            if "openapi" in spec or "swagger" in spec:
-                                logger.info(f"OpenAPI Spec found: {filepath}")
-                                return self._parse_openapi(spec, target)
-                    except Exception as e:
-                        logger.warning(f"Failed to parse potential OpenAPI file {filepath}: {e}")
+        found = self.build_route_index(index)
+        if found:
+            spec_file, route_index = found
+            return {"routes": route_index.routes, "spec_file": spec_file}
 
         # If we reach here, no spec found.
         # Strict mode: Error out.
@@ -102,136 +91,45 @@ class ApiContractService:
                             "summary": details.get("summary", ""),
                             "file": filename
                         })
-        return {"routes": routes[:100]} # Limit to 100 for safety
+        return {"routes": routes}
 
 # --- Component 3: Architecture Mapper (Static Hints) ---
 class ArchitectureMapper:
-    def map_architecture(self, path: str) -> str:
+    target_ext = {'.js', '.jsx', '.ts', '.tsx', '.py'}
+
+    def source_files(self, index: FileIndex) -> List[FileRecord]:
+        return list(index.query(exts=self.target_ext, exclude_dirs=TEST_DIRS))
+
+    def build_graph(self, index: FileIndex, import_edges: Optional[Set[Tuple[str, str]]] = None) -> Dict[str, Any]:
         """
-        Visualizes imports or directory structure.
+        Structured file graph (integer ids, edge arrays, directory hierarchy); see arch_graph.
+        `import_edges` (file path pairs) may be precomputed, e.g. by the incremental analyzer.
         """
-        nodes = set()
-        edges = set()
-        
-        # Simple Regex for imports (Fallback, robust)
-        js_import_pattern = re.compile(r"""(?:import\s+.*\s+from\s+['"](.*)['"])|(?:require\(['"](.*)['"])""")
-        py_import_pattern = re.compile(r"""(?:from\s+(\S+)\s+import)|(?:import\s+(\S+))""")
-        
-        target_ext = {'.js', '.jsx', '.ts', '.tsx', '.py'}
-        ignored_dirs = {'node_modules', 'venv', 'dist', 'build', '.git', 'test', 'tests', '__pycache__'}
-        file_map = {}
-
-        # 1. Collect Nodes
-        for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
-            for file in files:
-                if os.path.splitext(file)[1] in target_ext:
-                    node_name = os.path.splitext(file)[0]
-                    if node_name in file_map: node_name = f"{node_name}_{os.path.basename(root)}"
-                    file_map[node_name] = file
-                    nodes.add(node_name)
-
-        # 2. Scan Imports (Regex)
-        for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
-            for file in files:
-                ext = os.path.splitext(file)[1]
-                if ext not in target_ext: continue
-                
-                source_node = os.path.splitext(file)[0]
-                if source_node in file_map and file_map[source_node] != file:
-                     source_node = f"{source_node}_{os.path.basename(root)}"
-                
-                try:
-                    with open(os.path.join(root, file), 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                        for line in lines:
-                             target = None
-                             if ext in ['.js', '.jsx', '.ts', '.tsx']:
-                                 m = js_import_pattern.search(line)
-                                 if m: target = m.group(1) or m.group(2)
-                             elif ext == '.py':
-                                 m = py_import_pattern.search(line)
-                                 if m: target = m.group(1) or m.group(2)
-                             
-                             if target:
-                                 # Basic Clean
-                                 target = os.path.basename(target).split('.')[0]
-                                 if target in nodes and target != source_node:
-                                      edges.add(f"    {source_node} --> {target}")
-                except: pass
-
-        # Fallback to Directory Graph if sparse
-        if len(edges) < 3:
-             edges = set()
-             for root, dirs, files in os.walk(path):
-                dirs[:] = [d for d in dirs if d not in ignored_dirs]
-                parent = os.path.basename(root) if root != path else "Root"
-                for d in dirs: edges.add(f"    {parent} --> {d}[/{d}/]")
-                for i, f in enumerate(files):
-                    if i < 5 and os.path.splitext(f)[1] in target_ext:
-                        edges.add(f"    {parent} -.-> {os.path.splitext(f)[0]}")
-
-        if not edges:
-            edges.add("    Root --> src")
-
-        return "graph TD\n    subgraph Architecture\n" + "\n".join(list(edges)[:50]) + "\n    end"
+        source_files = self.source_files(index)
+        if import_edges is None:
+            import_edges = ImportGraphEngine(index).build_edges(source_files)
+        return build_graph((r.path for r in source_files), import_edges)
+
+    def map_architecture(self, index: FileIndex, import_edges: Optional[Set[Tuple[str, str]]] = None) -> str:
+        """
+        Visualizes imports as a Mermaid diagram of package clusters.
+        """
+        return render_mermaid(cluster_view(self.build_graph(index, import_edges)))
 
 # --- Component 4: Docs Generator (LLM) ---
 class DocsGenerator:
-    async def generate_readme(self, path: str, api_key: str) -> str:
+    def __init__(self):
+        self.packer = ContextPacker()
+
+    async def generate_readme(self, index: FileIndex, api_key: str,
+                              import_edges: Optional[Set[Tuple[str, str]]] = None) -> str:
         if not api_key: return "# README\n\nGenerated without API Key."
-        
-        code_context = ""
-        structure = ""
-        deps = ""
-        
-        # Priority patterns for "Actual Functionality"
-        interesting_files = {
-            'main.py', 'app.py', 'index.js', 'server.js', 'app.js', 
-            'routes.py', 'urls.py', 'api.py', 'schema.graphql', 'docker-compose.yml'
-        }
-        interesting_dirs = {'api', 'routes', 'controllers', 'services', 'models', 'core', 'lib'}
-
-        for root, dirs, files in os.walk(path):
-            if '.git' in root or 'node_modules' in root: continue
-            
-            # 1. Build File Structure
-            level = root.replace(path, '').count(os.sep)
-            if level > 2: continue # Limit depth
-            indent = ' ' * 4 * level
-            structure += f"{indent}{os.path.basename(root)}/\n"
-            
-            dirname = os.path.basename(root).lower()
-
-            for f in files:
-                structure += f"{indent}    {f}\n"
-                
-                # 2. Capture Dependencies
-                if f in ['package.json', 'requirements.txt', 'pom.xml', 'go.mod', 'Cargo.toml']:
-                    try:
-                        with open(os.path.join(root, f), 'r', errors='ignore') as df: 
-                            deps += f"--- {f} ---\n{df.read()[:800]}\n"
-                    except: pass
-                
-                # 3. Capture Code Context (Key Codebase Files)
-                # Check specifics or directory heuristics
-                is_interesting = f.lower() in interesting_files
-                if not is_interesting and dirname in interesting_dirs and f.endswith(('.py', '.js', '.ts', '.java', '.go')):
-                     is_interesting = True
-                
-                if is_interesting and len(code_context) < 12000: # Limit total context
-                    try:
-                        with open(os.path.join(root, f), 'r', errors='ignore') as source:
-                            content = source.read()
-                            # Grab imports and top of file definitions
-                            code_context += f"\n--- File: {os.path.join(os.path.basename(root), f)} ---\n"
-                            code_context += content[:1500] + "\n" # First 1.5k chars likely contain imports & main classes
-                    except: pass
-
-            if len(structure) > 2000: continue # Don't break loop, just stop adding structure
-
-        chat = ChatGroq(temperature=0.2, groq_api_key=api_key, model_name="llama-3.3-70b-versatile")
+
+        # Ranked, token-budgeted context (bounded reads; central files & entry points first)
+        context = await asyncio.to_thread(self.packer.pack, index, import_edges)
+        structure, deps, code_context = context.structure, context.deps, context.code
+
+        chat = llm_registry.get(api_key, temperature=0.2)
         prompt = f"""
        Act as a Principal Software Engineer and Technical Writer.
 
@@ -302,159 +200,402 @@ Important:
 - If something is unclear, describe it conservatively.
         """
         try:
-             res = await chat.ainvoke(prompt)
-             return res.content
+             # Same commit => same packed context => same prompt
+             return await llm_cache.ainvoke(chat, prompt, site="readme", parse=self._non_empty)
         except Exception as e:
              logger.error(f"LLM generation failed: {e}")
              return "# API Error\nFailed to generate README."
 
-    async def generate_openapi_spec(self, path: str, framework: str, api_key: str) -> Optional[str]:
+    @staticmethod
+    def _non_empty(content: str) -> str:
+        if not content.strip():
+            raise ValueError("Empty LLM response")
+        return content
+
+    @staticmethod
+    def _json_object(content: str) -> Dict[str, Any]:
+        content = content.strip()
+        start_idx = content.find('{')
+        end_idx = content.rfind('}')
+        if start_idx != -1 and end_idx != -1:
+            content = content[start_idx : end_idx + 1]
+        return json.loads(content)
+
+    async def enrich_route_summaries(self, routes: List[Dict[str, Any]], api_key: str) -> bool:
         """
-        Bootstrap an OpenAPI spec using LLM if none exists.
+        Optional pass: asks the LLM for one-line summaries of statically extracted routes that have none.
+        Routes are updated in place; returns True if any summary was filled in.
         """
-        if not api_key: return None
-        
-        # 1. Scout for Router Files
-        candidates = []
-        ignored_dirs = {'node_modules', 'venv', 'dist', 'build', '.git', '__pycache__', 'test', 'tests'}
-        
-        # Heuristics
-        patterns = []
-        if framework == "FastAPI":
-            patterns = ["APIRouter", "FastAPI(", "@app.", "@router."]
-        elif framework in ["Express.js", "NestJS", "Fastify"]:
-            patterns = [".get(", ".post(", "Router(", "@Controller", "@Get"]
-        elif framework == "Spring Boot":
-            patterns = ["@RestController", "@RequestMapping", "@GetMapping"]
-        else:
-            # Generic fallback
-            patterns = ["api", "route", "endpoint", "http"]
-
-        for root, dirs, files in os.walk(path):
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
-            for file in files:
-                ext = os.path.splitext(file)[1]
-                if ext not in ['.py', '.js', '.ts', '.java', '.go', '.cs']: continue
-                
-                try:
-                    fpath = os.path.join(root, file)
-                    with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        # If file contains framework keywords
-                        if any(p in content for p in patterns):
-                            # Limit file size context
-                            candidates.append(f"--- File: {file} ---\n{content[:3000]}\n")
-                            if len(candidates) >= 10: break # Token safety
-                except: pass
-            if len(candidates) >= 10: break
-
-        if not candidates: 
-            return None
+        missing = [r for r in routes if not r.get("summary")][:150] # Token safety
+        if not api_key or not missing: return False
 
-        # 2. LLM Gen
-        chat = ChatGroq(temperature=0.1, groq_api_key=api_key, model_name="llama-3.3-70b-versatile")
-        
-        context = "\n".join(candidates)
+        chat = llm_registry.get(api_key, temperature=0.1)
+        listing = "\n".join(f"{r['method']} {r['url']} ({r['file']})" for r in missing)
         prompt = f"""
-        You are an API Architect. Generate a valid OpenAPI 3.0 JSON specification for the following code snippets.
-        
+        You are an API Architect. Write a short (max 10 words) summary for each HTTP endpoint below,
+        inferred from its method, path and source file.
+
         Rules:
-        1. Output ONLY valid JSON. 
-        2. Do NOT output markdown key `json`.
-        3. Do NOT output any conversational text.
-        4. Start immediately with {{ and end with }}.
-        
-        Codebase:
-        {context}
+        1. Output ONLY a valid JSON object mapping "METHOD /path" to its summary.
+        2. Do NOT output markdown or any conversational text.
+
+        Endpoints:
+        {listing}
         """
-        
+
         try:
-            res = await chat.ainvoke(prompt)
-            content = res.content.strip()
-            
-            # Robust JSON Extraction
-            start_idx = content.find('{')
-            end_idx = content.rfind('}')
-            
-            if start_idx != -1 and end_idx != -1:
-                content = content[start_idx : end_idx + 1]
-            
-            # Validation parse
-            json.loads(content) 
-            return content
+            summaries = await llm_cache.ainvoke(chat, prompt, site="route_summaries", parse=self._json_object)
         except Exception as e:
-            logger.error(f"AI OpenAPI Gen failed: {e}")
-            logger.error(f"Raw Content: {res.content[:500] if 'res' in locals() else 'No response'}")
-            return None
+            logger.error(f"AI route summary enrichment failed: {e}")
+            return False
+
+        enriched = False
+        for route in missing:
+            summary = summaries.get(f"{route['method']} {route['url']}")
+            if isinstance(summary, str) and summary.strip():
+                route["summary"] = summary.strip()
+                enriched = True
+        return enriched
 
 # --- Main Facade ---
 class ProjectIntelligenceService:
     def __init__(self):
         self.loader = RepoLoader()
+        self.repo_cache = RepoCache(self.loader)
+        self.incremental = IncrementalAnalyzer()
         self.api_service = ApiContractService()
         self.arch_mapper = ArchitectureMapper()
         self.docs_gen = DocsGenerator()
+        self.route_extractor = RouteExtractor()
+        self.store = analysis_store
+        self._indexes: "OrderedDict[str, FileIndex]" = OrderedDict()
+        self._graphs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._route_indexes: "OrderedDict[str, Optional[RouteIndex]]" = OrderedDict()
+        self._index_builds: Dict[str, "asyncio.Future[FileIndex]"] = {}
+
+    async def sweep_workspace(self):
+        """
+        Janitor pass over temp_repos: idle/over-budget checkouts, orphaned dirs, stale analysis state.
+        Cache bookkeeping happens here on the event loop, where requests lease and touch the same entries;
+        only the deletions run in an executor.
+        """
+        detached = self.repo_cache.sweep()
+        for cache in (self._indexes, self._graphs, self._route_indexes):
+            for key in [k for k in cache if k not in self.repo_cache._entries]:
+                del cache[key]
+        await self.repo_cache.discard(detached)
+        await asyncio.to_thread(self._sweep_files)
+
+    def _sweep_files(self):
+        """ Filesystem-only part of the janitor pass (no in-memory cache state). Runs in an executor. """
+        self.repo_cache.remove_orphans()
+        self.repo_cache.sweep_orphans(self.loader.base_dir, keep=(self.repo_cache.cache_dir, self.incremental.state_dir))
+        self.incremental.prune()
+
+    async def run_janitor(self):
+        """ Startup sweep, then one pass every REPO_JANITOR_INTERVAL_SECONDS. """
+        while True:
+            try:
+                await self.sweep_workspace()
+            except Exception as e:
+                logger.error(f"Workspace janitor failed: {e}")
+            await asyncio.sleep(settings.REPO_JANITOR_INTERVAL_SECONDS)
+
+    async def _get_index(self, entry) -> FileIndex:
+        """
+        One filesystem scan per checkout; cached checkouts are immutable so the index is reused across steps.
+        The walk runs in an executor, and concurrent requests for the same checkout share it.
+        """
+        index = self._indexes.get(entry.key)
+        if index is not None:
+            self._indexes.move_to_end(entry.key)
+            return index
+        building = self._index_builds.get(entry.key)
+        if building is None:
+            building = asyncio.ensure_future(asyncio.to_thread(FileIndex.build, entry.path))
+            self._index_builds[entry.key] = building
+            building.add_done_callback(lambda _: self._index_builds.pop(entry.key, None))
+        # Shielded: one caller giving up must not fail the others waiting on the same walk
+        index = await asyncio.shield(building)
+        if entry.key not in self._indexes:
+            self._remember(self._indexes, entry.key, index)
+        return index
+
+    async def _import_edges(self, entry, index: FileIndex) -> Set[Tuple[str, str]]:
+        # Served from stored state when this commit was already mapped
+        return await self.incremental.import_edges(entry, index, self.arch_mapper.source_files(index))
+
+    # --- Stored results (Mongo, per commit) ---
+    async def _stored(self, key: str, stages: List[str]) -> Dict[str, Any]:
+        found = await asyncio.to_thread(self.store.get, key, stages)
+        return found["stages"] if found else {}
+
+    @asynccontextmanager
+    async def _analyzed_checkout(self, key: str):
+        """
+        Leases the checkout of an analyzed commit. When it was evicted (TTL, disk budget) or lives on
+        another instance, exactly that commit is cloned again from the URL and SHA recorded in the store,
+        so ids handed out from stored results keep working. Yields None if the commit is unknown.
+        """
+        with self.repo_cache.lease(key) as entry:
+            if entry is not None:
+                yield entry
+                return
+        found = await asyncio.to_thread(self.store.get, key, [])
+        if not found or not found.get("repo_url") or not found.get("commit"):
+            yield None
+            return
+        logger.info(f"Checkout {key} is gone; cloning {found['repo_url']}@{found['commit'][:12]} again")
+        async with AsyncExitStack() as stack:
+            try:
+                entry = await stack.enter_async_context(
+                    self.repo_cache.checkout(found["repo_url"], commit=found["commit"]))
+            except CloneError as e:
+                logger.warning(f"Could not restore checkout {key}: {e}")
+                entry = None
+            yield entry
+
+    async def _save(self, entry, stage: str, value: Any):
+        await asyncio.to_thread(self.store.put, entry.key, entry.url, entry.sha, stage, value)
+
+    def _remember(self, cache: "OrderedDict", key: str, value: Any):
+        cache[key] = value
+        while len(cache) > INDEX_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    async def _graph(self, entry, index: FileIndex) -> Dict[str, Any]:
+        graph = self._graphs.get(entry.key)
+        if graph is None:
+            graph = (await self._stored(entry.key, ["graph"])).get("graph")
+            if graph is None:
+                import_edges = await self._import_edges(entry, index)
+                graph = await asyncio.to_thread(self.arch_mapper.build_graph, index, import_edges)
+                await self._save(entry, "graph", graph)
+            self._remember(self._graphs, entry.key, graph)
+        else:
+            self._graphs.move_to_end(entry.key)
+        return graph
+
+    @staticmethod
+    def _render_view(key: str, graph: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+        view = cluster_view(graph, prefix)
+        return {"graph_data": render_mermaid(view), "graph": view, "repo_path_id": key}
+
+    async def _view(self, key: str, graph: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """ Cluster view of the file graph under `prefix`, with its Mermaid rendering (CPU-bound: runs in an executor). """
+        return await asyncio.to_thread(self._render_view, key, graph, prefix)
+
+    async def _map(self, entry, index: FileIndex) -> Dict[str, Any]:
+        overview = await self._view(entry.key, await self._graph(entry, index))
+        await self._save(entry, "overview", overview)
+        return overview
+
+    async def _route_index(self, entry, index: Optional[FileIndex]) -> Optional[RouteIndex]:
+        """ Memory, then the store, then parsing the checkout (skipped when `index` is None). """
+        if entry.key in self._route_indexes:
+            self._route_indexes.move_to_end(entry.key)
+            return self._route_indexes[entry.key]
+        found, route_index = await asyncio.to_thread(self._load_route_index, entry, index)
+        if found:
+            self._remember(self._route_indexes, entry.key, route_index)
+        return route_index
+
+    def _load_route_index(self, entry, index: Optional[FileIndex]) -> Tuple[bool, Optional[RouteIndex]]:
+        """ (found, route index) from the store or the checkout; runs in an executor, so no memory caches here. """
+        found = self.store.get(entry.key, ["routes"])
+        if found and "routes" in found["stages"]:
+            stored = found["stages"]["routes"]
+            return True, RouteIndex(stored["routes"]) if stored.get("spec_file") else None
+        if index is None:
+            return False, None
+        spec = self.api_service.build_route_index(index)
+        self.store.put(entry.key, entry.url, entry.sha, "routes",
+                       {"spec_file": spec[0], "routes": spec[1].routes} if spec else {"spec_file": None})
+        return True, spec[1] if spec else None
+
+    async def _api_specs(self, entry, index: Optional[FileIndex]) -> Dict[str, Any]:
+        """ First page of the spec's routes; the rest is served by query_routes(). """
+        # 1. Try Standard Discovery (OpenAPI First)
+        route_index = await self._route_index(entry, index)
+        if route_index is None:
+            return {"api_specs": [], "api_total": 0, "api_next_cursor": None,
+                    "warnings": ["OpenAPI specification not found. API intelligence unavailable."]}
+        page = route_index.query(limit=ROUTE_PAGE_SIZE)
+        return {"api_specs": page["routes"], "api_total": page["total"], "api_next_cursor": page["next_cursor"],
+                "api_tags": route_index.tags, "warnings": []}
+
+    async def _framework(self, entry, index: FileIndex) -> str:
+        framework = (await self._stored(entry.key, ["framework"])).get("framework")
+        if framework is None:
+            framework = self.api_service.detect_framework(index)
+            await self._save(entry, "framework", framework)
+        return framework
+
+    async def _readme(self, entry, index: FileIndex, api_key: str) -> str:
+        readme = (await self._stored(entry.key, ["readme"])).get("readme")
+        if readme is None:
+            import_edges = await self._import_edges(entry, index) if api_key else None
+            readme = await self.docs_gen.generate_readme(index, api_key, import_edges)
+            # Only real LLM output is worth keeping: placeholders/errors are retried next time
+            if api_key and not readme.startswith("# API Error"):
+                await self._save(entry, "readme", readme)
+        return readme
+
+    async def _stored_docs(self, key: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """ /docs response assembled from the store alone, or None if anything is missing. """
+        stored = await self._stored(key, ["readme", "routes", "framework"])
+        if "routes" not in stored or "framework" not in stored or ("readme" not in stored and api_key):
+            return None
+        entry = SimpleNamespace(key=key)
+        specs = await self._api_specs(entry, None)
+        return {
+            "readme": stored.get("readme") or "# README\n\nGenerated without API Key.",
+            **specs,
+            "detected_framework": stored["framework"],
+            "ai_generated_spec": False
+        }
+
+    async def query_routes(self, job_id: str, tag: Optional[str] = None, method: Optional[str] = None,
+                           prefix: Optional[str] = None, cursor: Optional[str] = None,
+                           limit: int = ROUTE_PAGE_SIZE) -> Dict[str, Any]:
+        """ Filtered, paginated view of an analyzed checkout's OpenAPI routes. """
+        if job_id in self._route_indexes or "routes" in await self._stored(job_id, ["routes"]):
+            route_index = await self._route_index(SimpleNamespace(key=job_id), None)
+        else:
+            async with self._analyzed_checkout(job_id) as entry:
+                if entry is None:
+                     return {"error": "Session expired"}
+                index = await self._get_index(entry)
+                route_index = await self._route_index(entry, index)
+        if route_index is None:
+            return {"routes": [], "total": 0, "next_cursor": None}
+        return route_index.query(tag=tag, method=method, prefix=prefix, cursor=cursor, limit=limit)
 
     async def analyze_project_structure(self, repo_url: str, api_key: str) -> Dict[str, Any]:
-        """ Step 1: Clone & Map """
-        repo_path = self.loader.clone_repo(repo_url)
-        graph = self.arch_mapper.map_architecture(repo_path)
-        job_id = os.path.basename(repo_path)
-        return {"job_id": job_id, "graph_data": graph, "repo_path_id": job_id}
+        """ Step 1: Stored result for this commit, else Clone (or reuse cached checkout) & Map """
+        key = self.repo_cache.make_key(normalize_repo_url(repo_url), await self.repo_cache.resolve_head(repo_url))
+        overview = (await self._stored(key, ["overview"])).get("overview")
+        if overview is None:
+            async with self.repo_cache.checkout(repo_url) as entry:
+                index = await self._get_index(entry)
+                overview = await self._map(entry, index)
+            key = entry.key
+        # The cache key doubles as the job id: it pins the exact commit that was mapped
+        return {"job_id": key, **overview}
+
+    async def drill_down(self, job_id: str, prefix: str) -> Dict[str, Any]:
+        """ Subgraph of an analyzed checkout: the files under `prefix`, clustered to fit one view. """
+        graph = self._graphs.get(job_id) or (await self._stored(job_id, ["graph"])).get("graph")
+        if graph is None:
+            async with self._analyzed_checkout(job_id) as entry:
+                if entry is None:
+                     return {"error": "Session expired"}
+                graph = await self._graph(entry, await self._get_index(entry))
+        return await self._view(job_id, graph, prefix)
 
     async def generate_docs(self, job_id: str, api_key: str) -> Dict[str, Any]:
-        """ Step 2: Docs & API Specs """
-        repo_path = os.path.join(self.loader.base_dir, job_id)
-        if not os.path.exists(repo_path):
-             return {"error": "Session expired"}
+        """ Step 2: Docs & API Specs. Concurrent requests for the same checkout and key share one run. """
+        key = flight_key("docs", job_id=job_id, api_key=key_fingerprint(api_key) if api_key else None)
+        return await single_flight.do(key, lambda: self._generate_docs(job_id, api_key))
 
-        readme = await self.docs_gen.generate_readme(repo_path, api_key)
-        framework = self.api_service.detect_framework(repo_path)
-        
-        # 1. Try Standard Discovery (OpenAPI First)
-        api_data = self.api_service.get_api_specs(repo_path)
-        
-        specs = []
-        warnings = []
-        if "error" in api_data:
-             warnings.append(api_data["error"])
-        else:
-             specs = api_data.get("routes", [])
+    async def _generate_docs(self, job_id: str, api_key: str) -> Dict[str, Any]:
+        stored = await self._stored_docs(job_id, api_key)
+        if stored:
+            return stored
 
-        # Clean up
-        self.loader.cleanup(repo_path)
+        async with self._analyzed_checkout(job_id) as entry:
+            if entry is None:
+                 return {"error": "Session expired"}
+            index = await self._get_index(entry)
+
+            readme = await self._readme(entry, index, api_key)
+            framework = await self._framework(entry, index)
+            specs = await self._api_specs(entry, index)
 
         return {
             "readme": readme,
-            "api_specs": specs,
+            **specs,
             "detected_framework": framework, 
-            "warnings": warnings,
             "ai_generated_spec": False
         }
 
-    async def generate_ai_openapi_for_repo(self, repo_url: str, api_key: str) -> Dict[str, Any]:
+    async def run_pipeline(self, job: Job, repo_url: str, api_key: str):
         """
-        Standalone method to generate OpenAPI spec for a repo URL.
+        Background version of steps 1 & 2 (see JobRunner). Each stage publishes its result as
+        soon as it is ready, so the graph is available before the README is written.
+        Commits that were fully analyzed before are answered from the store without cloning.
         """
-        repo_path = self.loader.clone_repo(repo_url)
-        try:
-            framework = self.api_service.detect_framework(repo_path)
-            ai_spec = await self.docs_gen.generate_openapi_spec(repo_path, framework, api_key)
-            
-            routes = []
-            if ai_spec:
-                 try:
-                     spec = json.loads(ai_spec)
-                     parsed = self.api_service._parse_openapi(spec, "generated_openapi.json")
-                     routes = parsed.get("routes", [])
-                 except: pass
-            
-            return {
-                "spec_json": ai_spec,
-                "routes": routes,
-                "framework": framework
-            }
-        finally:
-            self.loader.cleanup(repo_path)
+        job.stage("clone", RUNNING)
+        key = self.repo_cache.make_key(normalize_repo_url(repo_url), await self.repo_cache.resolve_head(repo_url))
+        overview = (await self._stored(key, ["overview"])).get("overview") if "graph" in job.stages else None
+        docs = await self._stored_docs(key, api_key) if {"readme", "spec"} & set(job.stages) else None
+        if ("graph" not in job.stages or overview) and (not {"readme", "spec"} & set(job.stages) or docs):
+            job.stage("clone", DONE, {"repo_path_id": key, "commit": key.rpartition('-')[2]}, detail="stored")
+            job.stage("index", DONE, detail="stored")
+            if overview:
+                job.stage("graph", DONE, overview, detail="stored")
+            if "readme" in job.stages:
+                job.stage("readme", DONE, {"readme": docs["readme"]}, detail="stored")
+            if "spec" in job.stages:
+                job.stage("spec", DONE, {k: v for k, v in docs.items() if k != "readme"}, detail="stored")
+            return
+
+        async with self.repo_cache.checkout(repo_url) as entry:
+            job.stage("clone", DONE, {"repo_path_id": entry.key, "commit": entry.sha})
+
+            job.stage("index", RUNNING)
+            index = await self._get_index(entry)
+            job.stage("index", DONE, {"files": len(index.files)})
+
+            if "graph" in job.stages:
+                job.stage("graph", RUNNING)
+                job.stage("graph", DONE, await self._map(entry, index))
+
+            if "readme" in job.stages:
+                job.stage("readme", RUNNING)
+                job.stage("readme", DONE, {"readme": await self._readme(entry, index, api_key)})
+
+            if "spec" in job.stages:
+                job.stage("spec", RUNNING)
+                specs = await self._api_specs(entry, index)
+                job.stage("spec", DONE, {
+                    **specs,
+                    "detected_framework": await self._framework(entry, index),
+                    "ai_generated_spec": False
+                })
+
+    async def generate_ai_openapi_for_repo(self, repo_url: str, api_key: str, enrich: bool = True) -> Dict[str, Any]:
+        """
+        Standalone method to generate an OpenAPI spec for a repo URL.
+        Routes come from static analysis of the source; the LLM (if a key is given) only fills in summaries.
+        """
+        async with self.repo_cache.checkout(repo_url) as entry:
+            index = await self._get_index(entry)
+            framework = self.api_service.detect_framework(index)
+            routes = await asyncio.to_thread(self.route_extractor.extract, index)
+
+        ai_enriched = False
+        if enrich and api_key:
+            ai_enriched = await self.docs_gen.enrich_route_summaries(routes, api_key)
+
+        spec_json = None
+        if routes:
+            title = repo_url.rstrip('/').split('/')[-1].removesuffix('.git') or "API"
+            spec_json = json.dumps(build_openapi_spec(routes, title), indent=2)
+
+        return {
+            "spec_json": spec_json,
+            "routes": routes,
+            "framework": framework,
+            "ai_enriched": ai_enriched
+        }
+
+    def _agent_api_scanner(self, path: str) -> Dict[str, Any]:
+        """ Static route scan of a local directory (no clone, no LLM). """
+        index = FileIndex.build(path)
+        return {
+            "framework": self.api_service.detect_framework(index),
+            "routes": self.route_extractor.extract(index)
+        }
 
 project_intelligence_service = ProjectIntelligenceService()
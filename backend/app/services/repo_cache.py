@@ -0,0 +1,467 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import hashlib
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.services.repo_loader import RepoLoader, CloneError, run_git, dir_size
+
+logger = logging.getLogger(__name__)
+
+WELL_KNOWN_HOSTS = {"github.com", "gitlab.com", "bitbucket.org"}
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def normalize_repo_url(repo_url: str) -> str:
+    """
+    Canonical form used for cache keys: credentials, `.git` suffix and trailing slashes are dropped,
+    SSH shorthand is folded into https, and paths on case-insensitive hosts are lowercased.
+    """
+    url = repo_url.strip()
+    if url.startswith("git@") and ":" in url:
+        host, _, path = url[4:].partition(":")
+        url = f"https://{host}/{path}"
+
+    parsed = urlsplit(url)
+    scheme = (parsed.scheme or "https").lower()
+    if scheme == "file":
+        return "file://" + os.path.normpath(parsed.path)
+
+    host = (parsed.hostname or "").lower()
+    if parsed.port:
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip("/")
+    if path.endswith(".git"):
+        path = path[:-4]
+    if host in WELL_KNOWN_HOSTS:
+        path = path.lower()
+    if scheme in ("http", "git"):
+        scheme = "https"
+    return f"{scheme}://{host}{path}"
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    sha: str
+    path: str
+    size: int
+    last_used: float
+    leases: int = 0
+
+
+# --- Component 1b: Repo Cache ---
+class RepoCache:
+    """
+    Content-addressed checkout cache keyed by (normalized URL, HEAD commit SHA).
+    A checkout is immutable once cached, so every analysis of the same commit reuses it.
+    Entries are evicted least-recently-used first once the disk budget is exceeded (room for
+    an incoming clone is made before it starts), and idle entries expire after a TTL;
+    checkouts that are currently leased are never evicted. Workers sharing the cache dir see each
+    other's leases through `<key>.lease-<worker>` marker files, refreshed on every janitor pass.
+    """
+    def __init__(self, loader: RepoLoader, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.loader = loader
+        self.cache_dir = cache_dir or settings.REPO_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.REPO_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refs: Dict[Tuple[str, Optional[str]], Tuple[str, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "orphans_removed": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def make_key(normalized_url: str, sha: str) -> str:
+        url_hash = hashlib.sha256(normalized_url.encode()).hexdigest()[:16]
+        return f"{url_hash}-{sha}"
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e.size for e in self._entries.values())
+
+    def _orphans(self) -> List[str]:
+        """
+        Leftover detached checkouts and stale lease markers, plus half-written clones and checkouts without
+        a sidecar once older than REPO_ORPHAN_GRACE_SECONDS: younger ones may be another worker's clone still in progress.
+        """
+        orphans = []
+        names = os.listdir(self.cache_dir)
+        for name in names:
+            full = os.path.join(self.cache_dir, name)
+            if name.startswith(".trash-"):
+                orphans.append(full)  # Detached by _detach; nothing reads it any more
+                continue
+            if ".lease-" in name:
+                if not self._lease_live(full):
+                    orphans.append(full)  # Left behind by a worker that died mid-lease
+                continue
+            if not (name.startswith(".tmp-") or (os.path.isdir(full) and f"{name}.json" not in names)):
+                continue
+            try:
+                age = time.time() - os.path.getmtime(full)
+            except OSError:
+                continue
+            if age > settings.REPO_ORPHAN_GRACE_SECONDS:
+                orphans.append(full)
+        return orphans
+
+    def remove_orphans(self) -> int:
+        """Deletes the cache dir's stale orphans (see _orphans). Filesystem only, so it may run in an executor."""
+        orphans = self._orphans()
+        for full in orphans:
+            if not os.path.isdir(full):
+                try:
+                    os.remove(full)  # Stale lease marker
+                except OSError:
+                    pass
+                continue
+            logger.info(f"Removing orphaned cache checkout {full}")
+            self.loader.cleanup(full)
+        self._stats["orphans_removed"] += len(orphans)
+        return len(orphans)
+
+    def _load(self):
+        """Rebuilds the index from sidecar files; stale orphans are removed."""
+        self.remove_orphans()
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                entry = self._read_sidecar(os.path.join(self.cache_dir, name))
+                if entry:
+                    found.append(entry)
+        for entry in sorted(found, key=lambda e: e.last_used):
+            self._entries[entry.key] = entry
+
+    def _sidecar(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _read_sidecar(path: str) -> Optional[CacheEntry]:
+        """Entry described by a sidecar file; a sidecar whose checkout is gone is removed."""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            data["last_used"] = os.path.getmtime(path)
+            entry = CacheEntry(**{**data, "leases": 0})
+            if os.path.isdir(entry.path):
+                return entry
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache sidecar {path}: {e}")
+        return None
+
+    def _adopt(self, key: str) -> Optional[CacheEntry]:
+        """Indexes a checkout another worker sharing the cache dir has cached since we started."""
+        entry = self._read_sidecar(self._sidecar(key))
+        if entry:
+            self._entries[key] = entry
+            self._touch(entry)
+        return entry
+
+    def _marker(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.lease-{WORKER_ID}")
+
+    @staticmethod
+    def _lease_live(marker: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(marker) < settings.REPO_LEASE_STALE_SECONDS
+        except OSError:
+            return False
+
+    def _leased_elsewhere(self, key: str) -> bool:
+        """True if another worker holds a lease on the checkout (a fresh marker file that isn't ours)."""
+        prefix, own = f"{key}.lease-", os.path.basename(self._marker(key))
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return False
+        return any(name.startswith(prefix) and name != own and self._lease_live(os.path.join(self.cache_dir, name))
+                   for name in names)
+
+    def _acquire(self, entry: CacheEntry):
+        entry.leases += 1
+        if entry.leases == 1:
+            self._write_marker(entry)
+
+    def _write_marker(self, entry: CacheEntry):
+        try:
+            open(self._marker(entry.key), 'w').close()
+        except OSError as e:
+            logger.warning(f"Could not write lease marker for {entry.key}: {e}")
+
+    def _release(self, entry: CacheEntry):
+        entry.leases -= 1
+        if entry.leases == 0:
+            try:
+                os.remove(self._marker(entry.key))
+            except OSError:
+                pass
+
+    def _heartbeat(self, entry: CacheEntry):
+        """Keeps our marker fresh while a long analysis holds the lease."""
+        try:
+            os.utime(self._marker(entry.key))
+        except OSError:
+            self._write_marker(entry)
+
+    def _evictable(self, entry: CacheEntry) -> bool:
+        return entry.leases == 0 and not self._leased_elsewhere(entry.key)
+
+    def _touch(self, entry: CacheEntry):
+        entry.last_used = time.time()
+        self._entries.move_to_end(entry.key)
+        try:
+            os.utime(self._sidecar(entry.key))
+        except OSError:
+            pass
+
+    async def resolve_head(self, repo_url: str, branch: Optional[str] = None) -> str:
+        """
+        Resolves the remote commit with `git ls-remote` (no objects are transferred).
+        Results are memoized briefly so bursts of requests for one repo hit the network once.
+        """
+        ref_key = (normalize_repo_url(repo_url), branch)
+        cached = self._refs.get(ref_key)
+        if cached and time.time() - cached[1] < settings.REPO_CACHE_REF_TTL_SECONDS:
+            return cached[0]
+
+        loop = asyncio.get_running_loop()
+        ref = f"refs/heads/{branch}" if branch else "HEAD"
+        out = await run_git(["ls-remote", "--", repo_url, ref],
+                            deadline=loop.time() + settings.CLONE_TIMEOUT_SECONDS)
+        line = out.strip().splitlines()[0] if out.strip() else ""
+        if not line:
+            raise CloneError(f"Could not resolve {ref} for {repo_url}")
+        sha = line.split()[0]
+        self._refs[ref_key] = (sha, time.time())
+        return sha
+
+    async def _get_or_clone(self, repo_url: str, branch: Optional[str], commit: Optional[str] = None) -> CacheEntry:
+        normalized = normalize_repo_url(repo_url)
+        sha = commit or await self.resolve_head(repo_url, branch)
+        key = self.make_key(normalized, sha)
+
+        entry = self._entries.get(key)
+        if entry and os.path.isdir(entry.path):
+            logger.info(f"Repo cache hit: {normalized}@{sha[:12]}")
+            self._stats["hits"] += 1
+            self._touch(entry)
+            return entry
+
+        lock = self._locks.setdefault(normalized, asyncio.Lock())
+        try:
+            async with lock:
+                return await self._clone_locked(repo_url, branch, normalized, sha, pinned=commit is not None)
+        finally:
+            # Locks only matter while a clone is in flight; don't keep one per URL ever seen
+            if not lock.locked() and self._locks.get(normalized) is lock:
+                del self._locks[normalized]
+
+    async def _clone_locked(self, repo_url: str, branch: Optional[str], normalized: str, sha: str,
+                            pinned: bool) -> CacheEntry:
+        key = self.make_key(normalized, sha)
+        # Another request may have cloned it while we waited
+        entry = self._entries.get(key)
+        if entry and os.path.isdir(entry.path):
+            self._touch(entry)
+            return entry
+        entry = self._adopt(key)
+        if entry:
+            return entry
+
+        logger.info(f"Repo cache miss: {normalized}@{sha[:12]}")
+        self._stats["misses"] += 1
+        # Make room up front so the clone itself never runs the disk out
+        await self.discard(self._evict(incoming=settings.CLONE_MAX_BYTES))
+        tmp_path = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4()}")
+        try:
+            await self.loader.clone_into(repo_url, tmp_path, branch=branch, commit=sha if pinned else None)
+            # HEAD may have moved since ls-remote; key by what we actually got
+            actual_sha = (await run_git(["rev-parse", "HEAD"], cwd=tmp_path)).strip()
+            key = self.make_key(normalized, actual_sha)
+            entry = self._entries.get(key)
+            if not (entry and os.path.isdir(entry.path)):
+                entry = self._adopt(key)
+            if entry:
+                self._touch(entry)
+                await self.discard([tmp_path])
+                return entry
+
+            final_path = os.path.join(self.cache_dir, key)
+            if os.path.exists(final_path):
+                await self.discard([self._trash(final_path)])
+            os.rename(tmp_path, final_path)
+            size = await asyncio.to_thread(dir_size, final_path)
+        except Exception:
+            await self.discard([tmp_path])
+            raise
+
+        entry = CacheEntry(key=key, url=normalized, sha=actual_sha, path=final_path,
+                           size=size, last_used=time.time())
+        with open(self._sidecar(key), 'w') as f:
+            json.dump({k: v for k, v in asdict(entry).items() if k != "leases"}, f)
+        self._entries[key] = entry
+        if not pinned:
+            self._refs[(normalized, branch)] = (actual_sha, time.time())
+        return entry
+
+    @asynccontextmanager
+    async def checkout(self, repo_url: str, branch: Optional[str] = None, commit: Optional[str] = None):
+        """Yields a leased cache entry for the repo's current HEAD (or exactly `commit`), cloning on a miss."""
+        entry = await self._get_or_clone(repo_url, branch, commit)
+        self._acquire(entry)
+        try:
+            await self.discard(self._evict())
+            yield entry
+        finally:
+            self._release(entry)
+
+    @contextmanager
+    def lease(self, key: str):
+        """Leases an already-cached checkout by key. Yields None if it is unknown or was evicted."""
+        entry = self._entries.get(key)
+        if not entry or not os.path.isdir(entry.path):
+            entry = self._adopt(key)
+        if not entry:
+            yield None
+            return
+        self._touch(entry)
+        self._acquire(entry)
+        try:
+            yield entry
+        finally:
+            self._release(entry)
+
+    def _free_bytes(self) -> Optional[int]:
+        try:
+            return shutil.disk_usage(self.cache_dir).free
+        except OSError:
+            return None
+
+    def _trash(self, path: str) -> str:
+        """Moves a checkout aside (one rename) so its key path is free at once; returns the path to delete."""
+        trash = os.path.join(self.cache_dir, f".trash-{uuid.uuid4()}")
+        try:
+            os.rename(path, trash)
+            return trash
+        except OSError:
+            return path
+
+    def _detach(self, entry: CacheEntry) -> str:
+        """Drops an entry from the index. Returns its (moved) checkout for discard; nothing is deleted here."""
+        self._entries.pop(entry.key, None)
+        try:
+            os.remove(self._sidecar(entry.key))
+        except OSError:
+            pass
+        lock = self._locks.get(entry.url)
+        if lock is not None and not lock.locked():
+            del self._locks[entry.url]
+        return self._trash(entry.path)
+
+    def _delete(self, paths: List[str]):
+        for path in paths:
+            self.loader.cleanup(path)
+
+    async def discard(self, paths: List[str]):
+        """Deletes detached checkouts (from _evict/sweep) in an executor: rmtree of a large checkout would stall the event loop."""
+        if paths:
+            await asyncio.to_thread(self._delete, paths)
+
+    def _evict(self, incoming: int = 0) -> List[str]:
+        """
+        LRU eviction until the budget (plus `incoming` bytes) fits and the disk keeps REPO_MIN_FREE_BYTES free.
+        Evicted entries are detached; returns their checkouts, which the caller passes to discard.
+        """
+        total = self.total_bytes
+        free = self._free_bytes()
+        evicted = []
+        for key in list(self._entries.keys()):
+            over_budget = total + incoming > self.max_bytes
+            low_disk = free is not None and free - incoming < settings.REPO_MIN_FREE_BYTES
+            if not over_budget and not low_disk:
+                break
+            entry = self._entries[key]
+            if not self._evictable(entry):
+                continue
+            logger.info(f"Evicting cached repo {entry.url}@{entry.sha[:12]} ({entry.size} bytes)")
+            evicted.append(self._detach(entry))
+            self._stats["evictions"] += 1
+            total -= entry.size
+            if free is not None:
+                free += entry.size
+        return evicted
+
+    def sweep(self, ttl_seconds: Optional[int] = None) -> List[str]:
+        """
+        Janitor pass: expires idle checkouts, then enforces the byte budget. Index bookkeeping only, so it
+        must run on the event loop like every other user of the entries; returns the checkouts to discard().
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else settings.REPO_CACHE_TTL_SECONDS
+        now = time.time()
+        removed = []
+        for entry in list(self._entries.values()):
+            if entry.leases > 0:
+                self._heartbeat(entry)
+                continue
+            try:
+                # Other workers touch the sidecar when they use the checkout
+                entry.last_used = max(entry.last_used, os.path.getmtime(self._sidecar(entry.key)))
+            except OSError:
+                pass
+            if now - entry.last_used > ttl and self._evictable(entry):
+                logger.info(f"Expiring idle cached repo {entry.url}@{entry.sha[:12]}")
+                removed.append(self._detach(entry))
+                self._stats["expired"] += 1
+        return removed + self._evict()
+
+    def sweep_orphans(self, base_dir: str, keep: Tuple[str, ...], grace_seconds: Optional[int] = None) -> int:
+        """
+        Removes unmanaged checkouts left under `base_dir` (e.g. per-job clones from older versions).
+        Anything in `keep` (the cache and state dirs) is left alone; younger than the grace period too,
+        since another worker process may still be cloning into it.
+        """
+        grace = grace_seconds if grace_seconds is not None else settings.REPO_ORPHAN_GRACE_SECONDS
+        keep_abs = {os.path.abspath(k) for k in keep}
+        removed = 0
+        try:
+            names = os.listdir(base_dir)
+        except OSError:
+            return 0
+        for name in names:
+            full = os.path.join(base_dir, name)
+            if os.path.abspath(full) in keep_abs or not os.path.isdir(full):
+                continue
+            try:
+                age = time.time() - os.path.getmtime(full)
+            except OSError:
+                continue
+            if age > grace:
+                logger.info(f"Removing orphaned checkout {full}")
+                self.loader.cleanup(full)
+                removed += 1
+        self._stats["orphans_removed"] += removed
+        return removed
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "leased": sum(1 for e in self._entries.values() if e.leases > 0),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_free_bytes": self._free_bytes(),
+            **self._stats,
+        }
@@ -0,0 +1,170 @@
+import os
+import shutil
+import uuid
+import asyncio
+import logging
+from typing import List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CloneError(Exception):
+    """Raised when a clone fails, times out or exceeds the size budget."""
+    pass
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(root, f)).st_size
+            except OSError:
+                pass
+    return total
+
+
+async def run_git(args: List[str], cwd: Optional[str] = None, deadline: Optional[float] = None,
+                   watch_path: Optional[str] = None, max_bytes: Optional[int] = None,
+                   stdin: Optional[str] = None) -> str:
+    """
+    Runs a git command as a subprocess without blocking the event loop.
+    Kills the process if the deadline passes or `watch_path` grows beyond `max_bytes`.
+    """
+    loop = asyncio.get_running_loop()
+    env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}  # Never hang on a credentials prompt
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=cwd,
+        env=env,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    comm = asyncio.ensure_future(proc.communicate(stdin.encode() if stdin is not None else None))
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({comm}, timeout=settings.CLONE_POLL_SECONDS)
+            if done:
+                break
+            if deadline is not None and loop.time() > deadline:
+                raise CloneError(f"git {args[0]} timed out after {settings.CLONE_TIMEOUT_SECONDS}s")
+            if watch_path and max_bytes and os.path.exists(watch_path):
+                size = await asyncio.to_thread(dir_size, watch_path)
+                if size > max_bytes:
+                    raise CloneError(f"Repository exceeds size limit ({max_bytes // (1024 * 1024)} MB)")
+    except BaseException:
+        # Timeout, size limit or request cancellation: don't leave git running
+        if proc.returncode is None:
+            proc.kill()
+        comm.cancel()
+        await proc.wait()
+        raise
+
+    stdout, stderr = comm.result()
+    if proc.returncode != 0:
+        raise CloneError(f"git {args[0]} failed: {stderr.decode(errors='ignore').strip()[:500]}")
+    return stdout.decode(errors="ignore")
+
+
+def _escape_pattern(path: str) -> str:
+    # Sparse-checkout patterns use gitignore syntax; file names are matched literally
+    for ch in ("\\", "*", "?", "[", "!", "#"):
+        path = path.replace(ch, "\\" + ch)
+    return path
+
+
+# --- Component 1: Repo Loader ---
+class RepoLoader:
+    """
+    Shallow, non-blocking clone engine.
+    Defaults to depth-1 single-branch clones with a blob size filter, so history and
+    large binary assets are never downloaded. Time and size limits are hard: the git
+    process is killed and the checkout removed when either is exceeded.
+    """
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or settings.REPO_BASE_DIR
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    async def clone_repo(self, repo_url: str, branch: Optional[str] = None,
+                         sparse_paths: Optional[List[str]] = None) -> str:
+        job_id = str(uuid.uuid4())
+        repo_path = os.path.join(self.base_dir, job_id)
+        try:
+            logger.info(f"Cloning {repo_url} to {repo_path}")
+            await self.clone_into(repo_url, repo_path, branch=branch, sparse_paths=sparse_paths)
+            return repo_path
+        except Exception as e:
+            logger.error(f"Clone failed: {e}")
+            self.cleanup(repo_path)
+            raise e
+
+    async def clone_into(self, repo_url: str, repo_path: str, branch: Optional[str] = None,
+                         sparse_paths: Optional[List[str]] = None, commit: Optional[str] = None):
+        """Clones the branch head, or exactly `commit` when given (re-creating an evicted checkout)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CLONE_TIMEOUT_SECONDS
+        max_bytes = settings.CLONE_MAX_BYTES
+
+        # 1. Fetch a single commit; blobs above the limit stay on the server
+        shallow = ["--no-tags", "--depth", str(settings.CLONE_DEPTH)]
+        if settings.CLONE_BLOB_LIMIT:
+            shallow.append(f"--filter=blob:limit={settings.CLONE_BLOB_LIMIT}")
+        if commit:
+            # Fetch by SHA (allowed by GitHub/GitLab and protocol v2 servers) into an empty repo
+            await run_git(["init", "-q", "--", repo_path], deadline=deadline)
+            await run_git(["remote", "add", "origin", repo_url], cwd=repo_path, deadline=deadline)
+            await run_git(["fetch", *shallow, "origin", commit], cwd=repo_path, deadline=deadline,
+                          watch_path=repo_path, max_bytes=max_bytes)
+            await run_git(["update-ref", "HEAD", "FETCH_HEAD"], cwd=repo_path, deadline=deadline)
+        else:
+            args = ["clone", "--no-checkout", "--single-branch", *shallow]
+            if branch:
+                args += ["--branch", branch]
+            args += ["--", repo_url, repo_path]
+            await run_git(args, deadline=deadline, watch_path=repo_path, max_bytes=max_bytes)
+
+        # 2. Checkout, skipping filtered blobs so git doesn't lazily fetch them back
+        patterns = await self._sparse_patterns(repo_path, sparse_paths, deadline)
+        if patterns:
+            await run_git(["sparse-checkout", "set", "--no-cone", "--stdin"], cwd=repo_path,
+                           deadline=deadline, stdin="\n".join(patterns) + "\n")
+        await run_git(["read-tree", "-mu", "HEAD"], cwd=repo_path, deadline=deadline,
+                       watch_path=repo_path, max_bytes=max_bytes)
+
+        size = await asyncio.to_thread(dir_size, repo_path)
+        if size > max_bytes:
+            raise CloneError(f"Repository exceeds size limit ({max_bytes // (1024 * 1024)} MB)")
+
+    async def _sparse_patterns(self, repo_path: str, sparse_paths: Optional[List[str]],
+                               deadline: float) -> List[str]:
+        """
+        Builds non-cone sparse-checkout patterns: the requested directories (or everything),
+        minus files whose blobs were dropped by the clone filter.
+        """
+        missing_paths = []
+        if settings.CLONE_BLOB_LIMIT:
+            missing_out = await run_git(["rev-list", "--objects", "--missing=print", "HEAD"],
+                                         cwd=repo_path, deadline=deadline)
+            missing = {line[1:].strip() for line in missing_out.splitlines() if line.startswith("?")}
+            if missing:
+                tree_out = await run_git(["ls-tree", "-r", "-z", "HEAD"], cwd=repo_path, deadline=deadline)
+                for entry in tree_out.split("\0"):
+                    if not entry: continue
+                    meta, _, file_path = entry.partition("\t")
+                    if meta.split()[-1] in missing:
+                        missing_paths.append(file_path)
+                logger.info(f"Skipping {len(missing_paths)} large files in {repo_path}")
+
+        if not sparse_paths and not missing_paths:
+            return []
+
+        patterns = [f"/{p.strip('/')}/" for p in sparse_paths] if sparse_paths else ["/*"]
+        patterns += [f"!/{_escape_pattern(p)}" for p in missing_paths]
+        return patterns
+
+    def cleanup(self, path: str):
+        if os.path.exists(path):
+            shutil.rmtree(path, ignore_errors=True)
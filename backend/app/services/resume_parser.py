@@ -1,7 +1,9 @@
 import json
 import logging
 from typing import Dict, Any
-from langchain_groq import ChatGroq
+from app.services.llm_client import llm_registry, key_fingerprint
+from app.services.llm_cache import llm_cache, normalize_prompt
+from app.services.single_flight import single_flight, flight_key
 from langchain_core.prompts import PromptTemplate
 
 logger = logging.getLogger(__name__)
@@ -13,11 +15,15 @@ class ResumeParserService:
     async def parse_resume(self, resume_text: str, api_key: str) -> Dict[str, Any]:
         """
         Extracts structured data (Skills, Projects, Experience) from raw resume text.
+        The same resume uploaded again while its extraction is in flight shares that extraction.
         """
-        llm = ChatGroq(
+        key = flight_key("resume", text=normalize_prompt(resume_text), api_key=key_fingerprint(api_key))
+        return await single_flight.do(key, lambda: self._parse_resume(resume_text, api_key))
+
+    async def _parse_resume(self, resume_text: str, api_key: str) -> Dict[str, Any]:
+        llm = llm_registry.get(
+            api_key,
             temperature=0.0, # Strict extraction
-            groq_api_key=api_key,
-            model_name="llama-3.3-70b-versatile",
             max_tokens=4000
         )
         
@@ -45,11 +51,10 @@ class ResumeParserService:
             input_variables=["resume_text"]
         )
         
-        chain = prompt | llm
-        
         try:
-            response = await chain.ainvoke({"resume_text": resume_text})
-            return self._clean_json(response.content)
+            # Same resume text (e.g. a retried /interview/start) is answered from cache
+            return await llm_cache.ainvoke(llm, prompt.format(resume_text=resume_text), site="resume",
+                                           parse=self._clean_json)
         except Exception as e:
             logger.error(f"Failed to parse resume: {e}")
             raise e
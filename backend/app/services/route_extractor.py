@@ -0,0 +1,464 @@
+import os
+import re
+import ast
+import logging
+import posixpath
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.services.file_index import FileIndex, FileRecord, TEST_DIRS
+from app.services.import_graph import ImportResolver, JS_EXTS
+
+logger = logging.getLogger(__name__)
+
+HTTP_METHODS = ['get', 'post', 'put', 'delete', 'patch', 'options', 'head']
+PY_ROUTER_FACTORIES = {'FastAPI': 'prefix', 'APIRouter': 'prefix', 'Flask': None, 'Blueprint': 'url_prefix'}
+PY_INCLUDE_CALLS = {'include_router': 'prefix', 'register_blueprint': 'url_prefix'}
+PY_HINTS = (b'FastAPI', b'APIRouter', b'Flask', b'Blueprint')
+JS_HINTS = (b'express', b'Router', b'@Controller')
+JAVA_HINTS = (b'Controller', b'Mapping')
+
+RouterId = Tuple[str, str]  # (file path, variable name)
+
+
+def join_paths(prefix: str, path: str) -> str:
+    if not path:
+        return prefix
+    if not prefix:
+        return path
+    return prefix.rstrip('/') + '/' + path.lstrip('/')
+
+
+def _route(method: str, url: str, summary: str, file: str) -> Dict[str, Any]:
+    # Same shape as ApiContractService._parse_openapi
+    return {"method": method.upper(), "url": url or "/", "summary": summary, "file": file}
+
+
+# --- Python (FastAPI / Flask) ---
+class _PyModule:
+    def __init__(self, path: str, tree: ast.Module):
+        self.path = path
+        self.tree = tree
+        self.consts: Dict[str, str] = {}
+        self.imports: Dict[str, Tuple[str, int, str]] = {}  # alias -> (module, level, name or '')
+        self.routers: Dict[str, str] = {}                    # var -> own prefix
+        self.factories: Dict[str, str] = {}                  # var -> FastAPI / APIRouter / Flask / Blueprint
+        self.routes: List[Tuple[str, str, str, str]] = []    # (var, method, path, summary)
+        self.includes: List[Tuple[str, ast.expr, Optional[str]]] = []  # (parent var, child expr, prefix)
+
+
+class _PythonRoutes:
+    def __init__(self, index: FileIndex, resolver: ImportResolver):
+        self.index = index
+        self.resolver = resolver
+        self._modules: Dict[str, Optional[_PyModule]] = {}
+
+    def _module(self, path: str) -> Optional[_PyModule]:
+        if path in self._modules:
+            return self._modules[path]
+        module = None
+        try:
+            with open(os.path.join(self.index.root, *path.split('/')), 'rb') as f:
+                tree = ast.parse(f.read(), filename=path)
+            module = _PyModule(path, tree)
+            self._collect_consts(module)
+        except (SyntaxError, ValueError, OSError) as e:
+            logger.debug(f"Route scan skipped {path}: {e}")
+        self._modules[path] = module
+        return module
+
+    def _collect_consts(self, module: _PyModule):
+        for node in module.tree.body:
+            bodies = [node]
+            if isinstance(node, ast.ClassDef):
+                bodies = node.body  # e.g. pydantic Settings: API_V1_STR: str = "/api/v1"
+            for stmt in bodies:
+                if isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Constant) \
+                        and isinstance(stmt.value.value, str):
+                    for target in stmt.targets:
+                        if isinstance(target, ast.Name):
+                            module.consts[target.id] = stmt.value.value
+                elif isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name) \
+                        and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
+                    module.consts[stmt.target.id] = stmt.value.value
+            if isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    module.imports[alias.asname or alias.name] = (node.module or '', node.level, alias.name)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        module.imports[alias.asname] = (alias.name, 0, '')
+                    else:
+                        module.imports[alias.name.split('.')[0]] = (alias.name.split('.')[0], 0, '')
+
+    def _imported_file(self, module: _PyModule, alias: str) -> Tuple[Optional[str], Optional[str]]:
+        """Resolves an imported alias to (file, attribute within that file or None if the alias is a module)."""
+        if alias not in module.imports:
+            return None, None
+        mod, level, name = module.imports[alias]
+        if name:
+            # `from pkg import name`: name is either a submodule or an attribute of pkg
+            sub = self.resolver.resolve_python(module.path, (f"{mod}.{name}" if mod else name, level, ()))
+            if sub:
+                return sub[0], None
+            files = self.resolver.resolve_python(module.path, (mod, level, ()))
+            return (files[0], name) if files else (None, None)
+        files = self.resolver.resolve_python(module.path, (mod, level, ()))
+        return (files[0], None) if files else (None, None)
+
+    def _const(self, module: _PyModule, node: ast.expr, depth: int = 0) -> Optional[str]:
+        if depth > 4:
+            return None
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                part = self._const(module, value.value if isinstance(value, ast.FormattedValue) else value, depth + 1)
+                if part is None:
+                    return None
+                parts.append(part)
+            return ''.join(parts)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left, right = self._const(module, node.left, depth + 1), self._const(module, node.right, depth + 1)
+            return left + right if left is not None and right is not None else None
+        if isinstance(node, ast.Name):
+            if node.id in module.consts:
+                return module.consts[node.id]
+            path, attr = self._imported_file(module, node.id)
+            other = self._module(path) if path else None
+            return other.consts.get(attr or node.id) if other else None
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            # settings.API_V1_STR: look the attribute up in the module that defines `settings`
+            base = node.value.id
+            if base in module.imports:
+                path, _ = self._imported_file(module, base)
+                other = self._module(path) if path else None
+                return other.consts.get(node.attr) if other else None
+            return module.consts.get(node.attr)
+        return None
+
+    def _str_arg(self, module: _PyModule, call: ast.Call, keywords: Tuple[str, ...]) -> Tuple[Optional[ast.expr], str]:
+        node = call.args[0] if call.args else next((k.value for k in call.keywords if k.arg in keywords), None)
+        if node is None:
+            return None, ''
+        value = self._const(module, node)
+        return node, value if value is not None else '{' + ast.unparse(node) + '}'
+
+    def _scan(self, module: _PyModule):
+        for node in ast.walk(module.tree):
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+                func = node.value.func
+                factory = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+                if factory in PY_ROUTER_FACTORIES:
+                    prefix = ''
+                    kw = PY_ROUTER_FACTORIES[factory]
+                    for k in node.value.keywords:
+                        if k.arg == kw:
+                            prefix = self._const(module, k.value) or ''
+                    for target in node.targets:
+                        if isinstance(target, ast.Name):
+                            module.routers[target.id] = prefix
+                            module.factories[target.id] = factory
+
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for dec in node.decorator_list:
+                    if not (isinstance(dec, ast.Call) and isinstance(dec.func, ast.Attribute)
+                            and isinstance(dec.func.value, ast.Name)):
+                        continue
+                    attr = dec.func.attr
+                    if attr in HTTP_METHODS:
+                        methods = [attr]
+                    elif attr in ('route', 'api_route'):
+                        methods = ['get']
+                        for k in dec.keywords:
+                            if k.arg == 'methods' and isinstance(k.value, (ast.List, ast.Tuple, ast.Set)):
+                                methods = [e.value.lower() for e in k.value.elts
+                                           if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+                    else:
+                        continue
+                    _, path = self._str_arg(module, dec, ('path', 'rule'))
+                    summary = next((k.value.value for k in dec.keywords if k.arg == 'summary'
+                                    and isinstance(k.value, ast.Constant)), None)
+                    if summary is None:
+                        doc = ast.get_docstring(node) or ''
+                        summary = doc.strip().splitlines()[0] if doc.strip() else ''
+                    for method in methods:
+                        module.routes.append((dec.func.value.id, method, path, summary))
+
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                    and node.func.attr in PY_INCLUDE_CALLS and isinstance(node.func.value, ast.Name) and node.args:
+                prefix = None
+                for k in node.keywords:
+                    if k.arg == PY_INCLUDE_CALLS[node.func.attr]:
+                        prefix = self._const(module, k.value) or '{' + ast.unparse(k.value) + '}'
+                module.includes.append((node.func.value.id, node.args[0], prefix))
+
+    def _router_id(self, module: _PyModule, expr: ast.expr) -> Optional[RouterId]:
+        if isinstance(expr, ast.Name):
+            if expr.id in module.routers:
+                return (module.path, expr.id)
+            path, attr = self._imported_file(module, expr.id)
+            return (path, attr or expr.id) if path else None
+        if isinstance(expr, ast.Attribute) and isinstance(expr.value, ast.Name):
+            path, attr = self._imported_file(module, expr.value.id)
+            if path and attr is None:
+                return (path, expr.attr)
+            if path and attr:
+                # `from pkg import mod` where pkg/__init__ re-exports; best effort
+                return (path, expr.attr)
+        return None
+
+    def extract(self, records: List[FileRecord]) -> List[Dict[str, Any]]:
+        scanned = []
+        for record in records:
+            module = self._module(record.path)
+            if module is not None:
+                self._scan(module)
+                scanned.append(module)
+
+        parents: Dict[RouterId, List[Tuple[RouterId, Optional[str]]]] = {}
+        for module in scanned:
+            for parent_var, child_expr, prefix in module.includes:
+                child = self._router_id(module, child_expr)
+                if child:
+                    parents.setdefault(child, []).append(((module.path, parent_var), prefix))
+        replaces = {(m.path, var) for m in scanned for var, factory in m.factories.items() if factory == 'Blueprint'}
+
+        own_prefix = {(m.path, var): prefix for m in scanned for var, prefix in m.routers.items()}
+        memo: Dict[RouterId, List[str]] = {}
+
+        def full_prefixes(router: RouterId, seen: Set[RouterId]) -> List[str]:
+            if router in memo:
+                return memo[router]
+            own = own_prefix.get(router, '')
+            result = []
+            for parent, include_prefix in parents.get(router, []):
+                if parent in seen:
+                    continue
+                for base in full_prefixes(parent, seen | {router}):
+                    if include_prefix is not None and router in replaces:
+                        # Flask: register_blueprint(url_prefix=...) overrides the blueprint's own prefix
+                        result.append(join_paths(base, include_prefix))
+                    else:
+                        result.append(join_paths(join_paths(base, include_prefix or ''), own))
+            memo[router] = result or [own]
+            return memo[router]
+
+        routes = []
+        for module in scanned:
+            for var, method, path, summary in module.routes:
+                for prefix in full_prefixes((module.path, var), set()):
+                    routes.append(_route(method, join_paths(prefix, path), summary, module.path))
+        return routes
+
+
+# --- JavaScript / TypeScript (Express, NestJS) ---
+JS_ROUTER_DEF = re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*(?:express\s*\.\s*Router|Router|express)\s*\(')
+JS_ROUTE = re.compile(r'\b(\w+)\s*\.\s*(get|post|put|delete|patch|options|head|all)\s*\(\s*([\'"`])([^\'"`]*)\3\s*,')
+JS_ROUTE_CHAIN = re.compile(r'\b(\w+)\s*\.\s*route\s*\(\s*([\'"`])([^\'"`]*)\2\s*\)')
+JS_CHAIN_METHOD = re.compile(r'^\s*\.\s*(get|post|put|delete|patch|options|head|all)\s*\(')
+JS_USE = re.compile(r'\b(\w+)\s*\.\s*use\s*\(\s*([\'"`])([^\'"`]*)\2\s*,([^;]*?)\)\s*;?\s*$', re.M)
+JS_IMPORT_DEFAULT = re.compile(r'import\s+(\w+)\s*(?:,\s*\{[^}]*\})?\s*from\s*[\'"]([^\'"]+)[\'"]')
+JS_REQUIRE = re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)')
+JS_REQUIRE_INLINE = re.compile(r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)')
+JS_EXPORT = re.compile(r'(?:module\.exports\s*=|export\s+default)\s*(\w+)')
+NEST_CONTROLLER = re.compile(r'@Controller\s*\(\s*(?:([\'"`])([^\'"`]*)\1)?[^)]*\)')
+NEST_ROUTE = re.compile(r'@(Get|Post|Put|Delete|Patch|Options|Head|All)\s*\(\s*(?:([\'"`])([^\'"`]*)\2)?[^)]*\)')
+
+
+class _JsRoutes:
+    def __init__(self, index: FileIndex, resolver: ImportResolver):
+        self.index = index
+        self.resolver = resolver
+
+    def extract(self, records: List[FileRecord]) -> List[Dict[str, Any]]:
+        files: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            try:
+                with open(self.index.abs_path(record), 'r', encoding='utf-8', errors='ignore') as f:
+                    text = f.read()
+            except OSError:
+                continue
+            info = {"routers": set(JS_ROUTER_DEF.findall(text)), "routes": [], "mounts": [], "imports": {}}
+            for var, spec in JS_IMPORT_DEFAULT.findall(text) + JS_REQUIRE.findall(text):
+                info["imports"][var] = spec
+            m = JS_EXPORT.search(text)
+            info["export"] = m.group(1) if m else (next(iter(info["routers"])) if len(info["routers"]) == 1 else None)
+
+            for m in JS_ROUTE.finditer(text):
+                info["routes"].append((m.group(1), m.group(2), m.group(4)))
+            for m in JS_ROUTE_CHAIN.finditer(text):
+                rest = text[m.end():]
+                while True:
+                    cm = JS_CHAIN_METHOD.match(rest)
+                    if not cm:
+                        break
+                    info["routes"].append((m.group(1), cm.group(1), m.group(3)))
+                    # Skip to the end of this handler's argument list
+                    depth, i = 1, cm.end()
+                    while i < len(rest) and depth:
+                        depth += {'(': 1, ')': -1}.get(rest[i], 0)
+                        i += 1
+                    rest = rest[i:]
+            for m in JS_USE.finditer(text):
+                for arg in m.group(4).split(','):
+                    arg = arg.strip()
+                    req = JS_REQUIRE_INLINE.search(arg)
+                    info["mounts"].append((m.group(1), m.group(3), ('require', req.group(1)) if req else ('name', arg)))
+
+            controller = NEST_CONTROLLER.search(text)
+            if controller:
+                prefix = '/' + (controller.group(2) or '').strip('/')
+                for rm in NEST_ROUTE.finditer(text, controller.end()):
+                    info["routes"].append(('@controller', rm.group(1).lower(), join_paths(prefix, rm.group(3) or '')))
+                info["routers"].add('@controller')
+            files[record.path] = info
+
+        def child_router(path: str, kind: str, value: str) -> Optional[RouterId]:
+            info = files[path]
+            if kind == 'name' and value in info["routers"]:
+                return (path, value)
+            spec = value if kind == 'require' else info["imports"].get(value)
+            if not spec:
+                return None
+            targets = self.resolver.resolve_js(path, (spec, 0, ()))
+            if targets and targets[0] in files and files[targets[0]]["export"]:
+                return (targets[0], files[targets[0]]["export"])
+            return None
+
+        parents: Dict[RouterId, List[Tuple[RouterId, str]]] = {}
+        for path, info in files.items():
+            for parent_var, prefix, (kind, value) in info["mounts"]:
+                child = child_router(path, kind, value)
+                if child:
+                    parents.setdefault(child, []).append(((path, parent_var), prefix))
+
+        memo: Dict[RouterId, List[str]] = {}
+
+        def full_prefixes(router: RouterId, seen: Set[RouterId]) -> List[str]:
+            if router in memo:
+                return memo[router]
+            result = []
+            for parent, prefix in parents.get(router, []):
+                if parent not in seen:
+                    result += [join_paths(base, prefix) for base in full_prefixes(parent, seen | {router})]
+            memo[router] = result or ['']
+            return memo[router]
+
+        routes = []
+        for path, info in files.items():
+            for var, method, route_path in info["routes"]:
+                # `x.get('/a', ...)` only counts on known routers/apps or identifiers named like one
+                if var not in info["routers"] and var not in ('app', 'router', 'server', 'api'):
+                    continue
+                for prefix in full_prefixes((path, var), set()):
+                    routes.append(_route('ALL' if method == 'all' else method, join_paths(prefix, route_path), '', path))
+        return routes
+
+
+# --- Java / Kotlin (Spring) ---
+SPRING_ANNOTATION = re.compile(r'@(RequestMapping|GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)'
+                               r'\s*(?:\(((?:[^()]|\([^()]*\))*)\))?')
+SPRING_CLASS = re.compile(r'\b(?:class|interface)\s+\w+')
+SPRING_STRINGS = re.compile(r'"([^"]*)"')
+SPRING_PATH_ATTR = re.compile(r'\b(?:value|path)\s*=\s*(\{[^}]*\}|"[^"]*")')
+SPRING_METHOD_ATTR = re.compile(r'RequestMethod\.(\w+)')
+
+
+def _spring_paths(args: Optional[str]) -> List[str]:
+    if not args:
+        return ['']
+    m = SPRING_PATH_ATTR.search(args)
+    source = m.group(1) if m else (args if args.lstrip().startswith(('"', '{')) else '')
+    return SPRING_STRINGS.findall(source) or ['']
+
+
+def _spring_routes(path: str, text: str) -> List[Dict[str, Any]]:
+    routes = []
+    class_match = SPRING_CLASS.search(text)
+    class_pos = class_match.start() if class_match else -1
+    prefixes = ['']
+    for m in SPRING_ANNOTATION.finditer(text):
+        kind, args = m.group(1), m.group(2)
+        if m.start() < class_pos:
+            if kind == 'RequestMapping':
+                prefixes = _spring_paths(args)
+            continue
+        if kind == 'RequestMapping':
+            methods = [x.lower() for x in SPRING_METHOD_ATTR.findall(args or '')] or ['all']
+        else:
+            methods = [kind[:-len('Mapping')].lower()]
+        for prefix in prefixes:
+            for sub in _spring_paths(args):
+                for method in methods:
+                    routes.append(_route(method, join_paths(prefix, sub), '', path))
+    return routes
+
+
+# --- Component 2b: Static Route Extractor ---
+class RouteExtractor:
+    """
+    Recovers HTTP routes from source without an LLM: Python `ast` for FastAPI/Flask decorators
+    (with include_router/register_blueprint prefixes followed across modules), and pattern scans
+    for Express, NestJS and Spring. Output matches ApiContractService._parse_openapi.
+    """
+    def extract(self, index: FileIndex, resolver: Optional[ImportResolver] = None) -> List[Dict[str, Any]]:
+        resolver = resolver or ImportResolver(index)
+        py_files, js_files, routes = [], [], []
+        for record in index.query(exclude_dirs=TEST_DIRS):
+            if record.ext not in ('.py', '.java', '.kt') and record.ext not in JS_EXTS:
+                continue
+            if record.size > 2 * 1024 * 1024:
+                continue
+            try:
+                with open(index.abs_path(record), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            if record.ext == '.py':
+                if any(h in data for h in PY_HINTS):
+                    py_files.append(record)
+            elif record.ext in JS_EXTS:
+                if any(h in data for h in JS_HINTS):
+                    js_files.append(record)
+            elif any(h in data for h in JAVA_HINTS):
+                routes += _spring_routes(record.path, data.decode('utf-8', errors='ignore'))
+
+        routes += _PythonRoutes(index, resolver).extract(py_files)
+        routes += _JsRoutes(index, resolver).extract(js_files)
+
+        # Deduplicate while keeping discovery order
+        seen, unique = set(), []
+        for route in routes:
+            key = (route["method"], route["url"])
+            if key not in seen:
+                seen.add(key)
+                unique.append(route)
+        return unique
+
+
+def _openapi_path(url: str) -> Tuple[str, List[str]]:
+    # Express/Nest ':id' and Flask '<int:id>' become OpenAPI '{id}'
+    url = re.sub(r'<(?:[^:<>]+:)?([^<>]+)>', r'{\1}', url)
+    url = re.sub(r':(\w+)', r'{\1}', url)
+    return url, re.findall(r'\{(\w+)\}', url)
+
+
+def build_openapi_spec(routes: List[Dict[str, Any]], title: str) -> Dict[str, Any]:
+    """Minimal OpenAPI 3.0 document for statically extracted routes."""
+    paths: Dict[str, Dict[str, Any]] = {}
+    for route in routes:
+        method = route["method"].lower()
+        if method not in HTTP_METHODS:
+            continue
+        url, params = _openapi_path(route["url"])
+        operation = {
+            "summary": route.get("summary", ""),
+            "parameters": [{"name": p, "in": "path", "required": True, "schema": {"type": "string"}} for p in params],
+            "responses": {"200": {"description": "Successful response"}},
+            "x-source-file": route.get("file", ""),
+        }
+        tag = next((seg for seg in url.split('/') if seg and not seg.startswith('{') and seg not in ('api', 'v1', 'v2')), None)
+        if tag:
+            operation["tags"] = [tag]
+        paths.setdefault(url, {})[method] = operation
+    return {"openapi": "3.0.3", "info": {"title": title, "version": "1.0.0"}, "paths": paths}
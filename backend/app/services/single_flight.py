@@ -0,0 +1,273 @@
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from app.core.config import settings
+from app.core.database import db
+from app.services.analysis_store import encode_value, decode_value
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()  # FlightBackend.wait(): no shared result, run the work locally
+_RUNNING = object()
+
+
+def flight_key(site: str, **inputs: Any) -> str:
+    """Key for one unit of AI work; callers pass inputs already normalized (trimmed, case-folded, sorted)."""
+    material = json.dumps({"site": site, "inputs": inputs}, sort_keys=True, default=str)
+    return f"{site}:{hashlib.sha256(material.encode()).hexdigest()}"
+
+
+class FlightBackend:
+    """
+    Cross-process coordination for SingleFlight. Exactly one worker claims a key and publishes
+    its result; the others wait for it. Backends never fail a request: when unsure, they let
+    the caller run the work itself.
+    """
+    async def claim(self, key: str) -> bool:
+        return True
+
+    async def publish(self, key: str, value: Any):
+        pass
+
+    async def abandon(self, key: str):
+        pass
+
+    async def wait(self, key: str) -> Any:
+        return MISSING
+
+
+class MongoFlightBackend(FlightBackend):
+    """
+    Flights shared through the `single_flight` collection: the worker whose insert wins runs the
+    work, the rest poll for its result. A claim whose lease ran out (crashed worker) can be taken
+    over; results stay readable for SINGLE_FLIGHT_RESULT_SECONDS and are then removed by a TTL index.
+    """
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else db.single_flight
+        self._disabled_until = 0.0
+        self._indexed = False
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _failed(self, action: str, e: Exception):
+        logger.warning(f"Single-flight {action} failed, coalescing in-process only for {settings.ANALYSIS_STORE_RETRY_SECONDS}s: {e}")
+        self._disabled_until = time.monotonic() + settings.ANALYSIS_STORE_RETRY_SECONDS
+
+    def _claim(self, key: str) -> bool:
+        if not self._available():
+            return True
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=settings.SINGLE_FLIGHT_LEASE_SECONDS)
+        doc = {"status": "running", "lease_until": lease_until, "expires_at": lease_until}
+        try:
+            if not self._indexed:
+                self.collection.create_index("expires_at", expireAfterSeconds=0)
+                self._indexed = True
+            try:
+                self.collection.insert_one({"_id": key, **doc})
+                return True
+            except DuplicateKeyError:
+                pass
+            # Taken over only if the holder's lease ran out or its result is stale (the TTL monitor lags)
+            taken = self.collection.find_one_and_update(
+                {"_id": key, "$or": [{"status": "running", "lease_until": {"$lt": now}},
+                                     {"status": "done", "expires_at": {"$lt": now}}]},
+                {"$set": doc, "$unset": {"value": ""}},
+            )
+            return taken is not None
+        except PyMongoError as e:
+            self._failed("claim", e)
+            return True
+
+    def _publish(self, key: str, value: Any):
+        if not self._available():
+            return
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.SINGLE_FLIGHT_RESULT_SECONDS)
+        try:
+            self.collection.update_one({"_id": key},
+                                       {"$set": {"status": "done", "value": encode_value(value), "expires_at": expires_at}})
+        except (PyMongoError, TypeError, ValueError) as e:
+            # Unserializable values just aren't shared; waiters then run the work themselves
+            logger.warning(f"Could not publish single-flight result {key}: {e}")
+            self._abandon(key)
+
+    def _abandon(self, key: str):
+        if not self._available():
+            return
+        try:
+            self.collection.delete_one({"_id": key, "status": "running"})
+        except PyMongoError as e:
+            self._failed("release", e)
+
+    def _poll(self, key: str) -> Any:
+        if not self._available():
+            return MISSING
+        try:
+            doc = self.collection.find_one({"_id": key})
+        except PyMongoError as e:
+            self._failed("read", e)
+            return MISSING
+        if doc is None or (doc["status"] == "running" and doc["lease_until"] < datetime.utcnow()):
+            return MISSING
+        if doc["status"] == "done":
+            return decode_value(doc["value"])
+        return _RUNNING
+
+    async def claim(self, key: str) -> bool:
+        return await asyncio.to_thread(self._claim, key)
+
+    async def publish(self, key: str, value: Any):
+        await asyncio.to_thread(self._publish, key, value)
+
+    async def abandon(self, key: str):
+        await asyncio.to_thread(self._abandon, key)
+
+    async def wait(self, key: str) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SINGLE_FLIGHT_LEASE_SECONDS
+        while loop.time() < deadline:
+            found = await asyncio.to_thread(self._poll, key)
+            if found is not _RUNNING:
+                return found
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_SECONDS)
+        return MISSING
+
+
+class _Broadcast:
+    """Events of one streamed flight; late subscribers replay what they missed, then follow live."""
+    def __init__(self):
+        self.events: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def push(self, event: Any):
+        self.events.append(event)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None):
+        self.finished = True
+        self.error = error
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        i = 0
+        while True:
+            while i < len(self.events):
+                yield copy.deepcopy(self.events[i])
+                i += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+# --- Single-flight AI Requests ---
+class SingleFlight:
+    """
+    Coalesces concurrent identical AI requests (double clicks, several tabs): the first caller for a
+    key runs the work, callers arriving while it is in flight await the same result instead of
+    starting their own generation. Nothing is kept once the flight lands, that is the LLM cache's job.
+    Every caller gets its own deep copy, so endpoints can annotate results freely.
+    With a backend (SINGLE_FLIGHT_BACKEND=mongo) plain results are also shared across worker
+    processes; streams are coalesced in-process only.
+    """
+    def __init__(self, backend: Optional[FlightBackend] = None):
+        self.backend = backend or FlightBackend()
+        self._flights: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self._stats = {"flights": 0, "coalesced": 0, "shared_hits": 0, "streams": 0, "stream_joins": 0}
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not await self.backend.claim(key):
+            value = await self.backend.wait(key)
+            if value is not MISSING:
+                self._stats["shared_hits"] += 1
+                return value
+            return await fn()
+        try:
+            value = await fn()
+        except BaseException:
+            await self.backend.abandon(key)
+            raise
+        await self.backend.publish(key, value)
+        return value
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of `fn()`, shared with every concurrent call for the same key. Errors are shared too."""
+        task = self._flights.get(key)
+        if task is None:
+            self._stats["flights"] += 1
+            task = asyncio.create_task(self._lead(key, fn))
+            self._flights[key] = task
+            task.add_done_callback(lambda t: self._flights.pop(key, None) if self._flights.get(key) is t else None)
+        else:
+            self._stats["coalesced"] += 1
+            logger.info(f"Coalesced duplicate request into in-flight {key[:24]}")
+        # A caller that goes away (client disconnect) doesn't cancel the work the others are waiting for
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _pump(self, key: str, source: AsyncIterator[Any], broadcast: _Broadcast):
+        try:
+            async for event in source:
+                broadcast.push(event)
+            broadcast.close()
+        except asyncio.CancelledError:
+            broadcast.close(ConnectionAbortedError("Stream abandoned by all subscribers"))
+            raise
+        except Exception as e:
+            broadcast.close(e)
+        finally:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Events of `factory()`, shared with every concurrent stream for the same key; a joiner first
+        receives the events it missed. The source is cancelled once its last subscriber leaves.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self._stats["streams"] += 1
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.create_task(self._pump(key, factory(), broadcast))
+        else:
+            self._stats["stream_joins"] += 1
+            logger.info(f"Joined in-flight stream {key[:24]}")
+        broadcast.subscribers += 1
+        try:
+            async for event in broadcast.follow():
+                yield event
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.finished:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                broadcast.task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._flights), "streams_in_flight": len(self._streams), **self._stats}
+
+
+def _make_backend() -> FlightBackend:
+    if settings.SINGLE_FLIGHT_BACKEND == "mongo":
+        return MongoFlightBackend()
+    return FlightBackend()
+
+
+single_flight = SingleFlight(_make_backend())
@@ -0,0 +1,217 @@
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from pymongo import monitoring
+from app.core.config import settings
+
+# Seconds; model calls run from ~100ms (cached prompt, short answer) to minutes (8k-token roadmaps)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0)
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # Mongo commands
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus layout) with sum and count."""
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None past the last finite bucket)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return None
+
+
+class RequestBreakdown:
+    """Time spent per kind of dependency call during one HTTP request, for the Server-Timing header."""
+    def __init__(self):
+        self.spans: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()  # Mongo commands are reported from worker threads
+
+    def add(self, kind: str, name: str, seconds: float, **counts: float):
+        with self._lock:
+            span = self.spans.setdefault((kind, name), {"seconds": 0.0, "calls": 0})
+            span["seconds"] += seconds
+            span["calls"] += 1
+            for key, value in counts.items():
+                span[key] = span.get(key, 0) + value
+
+    def server_timing(self) -> str:
+        """e.g. `llm-roadmap;dur=2140.2;desc="1 call, 1830+2950 tok, ttft 410ms"`. Concurrent calls add up."""
+        entries = []
+        with self._lock:
+            for (kind, name), span in sorted(self.spans.items()):
+                desc = [f"{span['calls']} call{'s' if span['calls'] != 1 else ''}"]
+                if span.get("prompt_tokens") or span.get("completion_tokens"):
+                    desc.append(f"{int(span.get('prompt_tokens', 0))}+{int(span.get('completion_tokens', 0))} tok")
+                if span.get("ttft"):
+                    desc.append(f"ttft {span['ttft'] * 1000:.0f}ms")
+                if span.get("retries"):
+                    desc.append(f"{int(span['retries'])} retries")
+                token = f"{kind}-{name}" if name else kind
+                entries.append(f'{token};dur={span["seconds"] * 1000:.1f};desc="{", ".join(desc)}"')
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestBreakdown]] = ContextVar("request_breakdown", default=None)
+
+
+# --- Call Instrumentation ---
+class Telemetry:
+    """
+    Counters and histograms for every LLM, web search and Mongo call, labelled by call site.
+    Exported in Prometheus text format (/metrics) and as JSON (/project/metrics); calls made while
+    serving a request are also summed into that request's Server-Timing header.
+    """
+    def __init__(self):
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    # --- Per-request breakdown ---
+    def begin_request(self) -> Tuple[RequestBreakdown, Any]:
+        breakdown = RequestBreakdown()
+        return breakdown, _current.set(breakdown)
+
+    def end_request(self, token: Any):
+        _current.reset(token)
+
+    def _span(self, kind: str, name: str, seconds: float, **counts: float):
+        breakdown = _current.get()
+        if breakdown is not None:
+            breakdown.add(kind, name, seconds, **counts)
+
+    # --- Recorders ---
+    def record_llm(self, site: str, model: str, seconds: float, outcome: str, ttft: Optional[float] = None,
+                   prompt_tokens: int = 0, completion_tokens: int = 0, retries: int = 0, estimated: bool = False):
+        self.inc("llm_calls_total", site=site, model=model, outcome=outcome)
+        self.observe("llm_call_seconds", seconds, site=site)
+        if ttft is not None:
+            self.observe("llm_ttft_seconds", ttft, site=site)
+        source = "estimated" if estimated else "reported"
+        self.inc("llm_tokens_total", prompt_tokens, site=site, model=model, direction="prompt", source=source)
+        self.inc("llm_tokens_total", completion_tokens, site=site, model=model, direction="completion", source=source)
+        if retries:
+            self.inc("llm_retries_total", retries, site=site)
+        price = settings.LLM_PRICES_PER_MILLION.get(model)
+        if price:
+            self.inc("llm_cost_usd_total", (prompt_tokens * price[0] + completion_tokens * price[1]) / 1e6,
+                     site=site, model=model)
+        self._span("llm", site, seconds, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                   ttft=ttft or 0.0, retries=retries)
+
+    def record_cache_hit(self, site: str, tier: str, seconds: float):
+        self.inc("llm_cache_hits_total", site=site, tier=tier)
+        self._span("cache", site, seconds)
+
+    def record_search(self, site: str, seconds: float, outcome: str):
+        self.inc("search_calls_total", site=site, outcome=outcome)
+        self.observe("search_seconds", seconds, site=site)
+        self._span("search", site, seconds)
+
+    def record_mongo(self, command: str, seconds: float, outcome: str):
+        self.inc("mongo_commands_total", command=command, outcome=outcome)
+        self.observe("mongo_command_seconds", seconds, buckets=FAST_BUCKETS, command=command)
+        self._span("mongo", "", seconds)
+
+    async def track_search(self, site: str, call: Awaitable[Any]) -> Any:
+        """Awaits a web search, recording its latency and outcome."""
+        start = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            self.record_search(site, time.perf_counter() - start, "error")
+            raise
+        self.record_search(site, time.perf_counter() - start, "ok")
+        return result
+
+    # --- Export ---
+    @staticmethod
+    def _labels(labels: Labels, extra: str = "") -> str:
+        parts = [f'{k}="{v}"' for k, v in labels] + ([extra] if extra else [])
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            typed = set()
+            for (name, labels), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{self._labels(labels)} {value:g}")
+            for (name, labels), h in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    le = 'le="%g"' % bound
+                    lines.append(f"{name}_bucket{self._labels(labels, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{name}_bucket{self._labels(labels, le)} {h.count}")
+                lines.append(f"{name}_sum{self._labels(labels)} {h.sum:.6f}")
+                lines.append(f"{name}_count{self._labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus count/mean/p50/p95/p99 (bucket upper bounds) per histogram."""
+        with self._lock:
+            counters: Dict[str, Dict[str, float]] = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels)] = round(value, 6)
+            histograms: Dict[str, Dict[str, Any]] = {}
+            for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0]):
+                histograms.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels)] = {
+                    "count": h.count,
+                    "mean": round(h.sum / h.count, 4) if h.count else None,
+                    "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+                }
+        return {"counters": counters, "histograms": histograms}
+
+
+telemetry = Telemetry()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command sent by the shared MongoClient (durations come from the driver)."""
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        telemetry.record_mongo(event.command_name, event.duration_micros / 1e6, "ok")
+
+    def failed(self, event):
+        telemetry.record_mongo(event.command_name, event.duration_micros / 1e6, "error")
@@ -0,0 +1,225 @@
+"""
+End-to-end load test of the API with offline model and search providers.
+
+    cd backend
+    LLM_PROVIDER=fake SEARCH_PROVIDER=fake LLM_CACHE_ENABLED=false uvicorn app.main:app --workers 4
+    python -m benchmarks.load                                   # 1, 4, 16, 64 concurrent users
+    python -m benchmarks.load --concurrency 8,32 --duration 30 --mix roadmap=1,interview=4
+
+Each level runs a closed loop: every virtual user sends its next request as soon as the previous
+one completes. Reports throughput, latency percentiles (and time to first event for streams) per
+operation, and the knee: the highest concurrency whose p99 stays under --slo while throughput
+still grows. Needs a reachable MongoDB; fake latency/error knobs are the FAKE_* settings of the server.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import httpx
+
+DEFAULT_URL = "http://localhost:8000/api/v1"
+DEFAULT_CONCURRENCY = "1,4,16,64"
+DEFAULT_MIX = "roadmap=1,roadmap_stream=1,interview=4,interview_stream=4"
+DEFAULT_OUTPUT = os.path.join("benchmarks", "load-latest.json")
+FAKE_KEY = "fake-load-test-key"  # Any key switches the services to their (fake) model path
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def parse_mix(text: str) -> List[str]:
+    """"a=2,b=1" -> ["a", "a", "b"]: a weighted round-robin schedule."""
+    schedule = []
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        schedule += [name] * int(weight or 1)
+    return schedule
+
+
+class VirtualUser:
+    """One signed-up user with its own interview session, issuing operations back to back."""
+    def __init__(self, client: httpx.AsyncClient, n: int):
+        self.client = client
+        self.n = n
+        self.calls = 0
+        self.headers: Dict[str, str] = {"x-groq-api-key": FAKE_KEY}
+        self.session_id: Optional[str] = None
+
+    async def setup(self):
+        email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        password = uuid.uuid4().hex
+        r = await self.client.post("/auth/signup", json={"email": email, "password": password, "full_name": "Load Test"})
+        r.raise_for_status()
+        r = await self.client.post("/auth/login/access-token", data={"username": email, "password": password})
+        r.raise_for_status()
+        self.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+        r = await self.client.post("/interview/start", headers=self.headers,
+                                   json={"role": "Backend Developer", "company": "Product-based", "type": "DSA"})
+        r.raise_for_status()
+        self.session_id = r.json()["session_id"]
+
+    def _roadmap_body(self) -> Dict[str, Any]:
+        # Unique per call, so single-flight coalescing and the LLM cache don't short-circuit the model
+        self.calls += 1
+        return {"target_role": f"Backend {self.n}-{self.calls}", "days_remaining": 45,
+                "weak_patterns": ["Graphs"], "force_regenerate": True}
+
+    def _answer(self) -> Dict[str, Any]:
+        self.calls += 1
+        return {"answer": f"I would use a hash map to get O(n) time (attempt {self.calls})."}
+
+    async def _stream(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        first = None
+        start = time.perf_counter()
+        async with self.client.stream("POST", path, headers=self.headers, json=body) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                first = first or time.perf_counter() - start
+                event = json.loads(line[6:])
+                if event.get("type") == "error":
+                    raise RuntimeError(event.get("detail"))
+        return {"ttfe": first}
+
+    async def run(self, op: str) -> Dict[str, Any]:
+        if op == "roadmap":
+            r = await self.client.post("/roadmap/generate", headers=self.headers, json=self._roadmap_body())
+            r.raise_for_status()
+            return {}
+        if op == "roadmap_stream":
+            return await self._stream("/roadmap/generate/stream", self._roadmap_body())
+        if op == "interview":
+            r = await self.client.post(f"/interview/{self.session_id}/reply", headers=self.headers, json=self._answer())
+            r.raise_for_status()
+            return {}
+        if op == "interview_stream":
+            return await self._stream(f"/interview/{self.session_id}/reply/stream", self._answer())
+        raise ValueError(f"Unknown operation {op}")
+
+
+async def run_level(url: str, users: int, duration: float, schedule: List[str], timeout: float) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        vus = [VirtualUser(client, n) for n in range(users)]
+        await asyncio.gather(*(vu.setup() for vu in vus))
+
+        samples: Dict[str, Dict[str, List[float]]] = {}
+        errors: Dict[str, Dict[str, int]] = {}
+        deadline = time.perf_counter() + duration
+
+        async def loop(vu: VirtualUser):
+            i = vu.n
+            while time.perf_counter() < deadline:
+                op = schedule[i % len(schedule)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    extra = await vu.run(op)
+                except Exception as e:
+                    kind = f"http_{e.response.status_code}" if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+                    errors.setdefault(op, {}).setdefault(kind, 0)
+                    errors[op][kind] += 1
+                    continue
+                s = samples.setdefault(op, {"latency": [], "ttfe": []})
+                s["latency"].append(time.perf_counter() - start)
+                if extra.get("ttfe") is not None:
+                    s["ttfe"].append(extra["ttfe"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(loop(vu) for vu in vus))
+        elapsed = time.perf_counter() - started
+
+    ops = {}
+    for op in sorted(set(schedule)):
+        s = samples.get(op, {"latency": [], "ttfe": []})
+        failed = sum(errors.get(op, {}).values())
+        ops[op] = {
+            "completed": len(s["latency"]),
+            "failed": failed,
+            "errors": errors.get(op, {}),
+            "throughput": round(len(s["latency"]) / elapsed, 3),
+            **{f"p{p}": _round(percentile(s["latency"], p)) for p in PERCENTILES},
+            **({f"ttfe_p{p}": _round(percentile(s["ttfe"], p)) for p in PERCENTILES} if s["ttfe"] else {}),
+        }
+    everything = [v for s in samples.values() for v in s["latency"]]
+    completed = len(everything)
+    failed = sum(sum(e.values()) for e in errors.values())
+    return {
+        "users": users,
+        "seconds": round(elapsed, 2),
+        "throughput": round(completed / elapsed, 3),
+        "error_rate": round(failed / (completed + failed), 4) if completed + failed else 0.0,
+        **{f"p{p}": _round(percentile(everything, p)) for p in PERCENTILES},
+        "operations": ops,
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def find_knee(levels: List[Dict[str, Any]], slo: float) -> Optional[int]:
+    """Highest concurrency within the p99 SLO whose throughput still grew by at least 10%."""
+    knee, best = None, 0.0
+    for level in levels:
+        if level["p99"] is None or level["p99"] > slo or level["throughput"] < best * 1.1:
+            break
+        knee, best = level["users"], level["throughput"]
+    return knee
+
+
+def print_table(levels: List[Dict[str, Any]]):
+    header = f"{'users':>5} {'operation':<17} {'req/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'ttfe p99':>9} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    fmt = lambda v: f"{v:.3f}" if v is not None else "-"
+    for level in levels:
+        for op, r in level["operations"].items():
+            print(f"{level['users']:>5} {op:<17} {r['throughput']:>8.2f} {fmt(r['p50']):>7} {fmt(r['p95']):>7} "
+                  f"{fmt(r['p99']):>7} {fmt(r.get('ttfe_p99')):>9} {r['failed']:>7}")
+        print(f"{level['users']:>5} {'all':<17} {level['throughput']:>8.2f} {fmt(level['p50']):>7} {fmt(level['p95']):>7} "
+              f"{fmt(level['p99']):>7} {'':>9} {level['error_rate']:>7.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API (run the server with LLM_PROVIDER=fake SEARCH_PROVIDER=fake).")
+    parser.add_argument("--url", default=DEFAULT_URL, help="API base URL")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="Comma-separated concurrent user counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted operations: roadmap, roadmap_stream, interview, interview_stream")
+    parser.add_argument("--slo", type=float, default=10.0, help="p99 latency (s) a level must stay under to count for the knee")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON report path")
+    args = parser.parse_args(argv)
+
+    schedule = parse_mix(args.mix)
+    levels = []
+    for users in (int(c) for c in args.concurrency.split(",") if c.strip()):
+        print(f"[{users} users] running for {args.duration:.0f}s...", file=sys.stderr)
+        levels.append(asyncio.run(run_level(args.url, users, args.duration, schedule, args.timeout)))
+    print_table(levels)
+
+    knee = find_knee(levels, args.slo)
+    print(f"\nConcurrency knee (p99 <= {args.slo}s, throughput still growing): {knee if knee else 'none'}")
+    report = {"created_at": datetime.utcnow().isoformat() + "Z", "url": args.url, "mix": args.mix,
+              "duration": args.duration, "slo": args.slo, "knee": knee, "levels": levels}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Scaling benchmark for the project-intelligence pipeline on synthetic repositories.
+
+    cd backend
+    python -m benchmarks.pipeline                                  # 1k, 10k, 100k files
+    python -m benchmarks.pipeline --sizes 1k,10k --repeat 3
+    python -m benchmarks.pipeline --output benchmarks/baseline.json  # record a baseline
+    python -m benchmarks.pipeline --baseline benchmarks/baseline.json  # exits 1 on regressions
+
+Every (size, repetition) runs in a fresh interpreter, so parse caches and peak RSS never leak
+between runs. Stage times are the best of the repetitions; peak RSS is the worst.
+Baselines are only comparable across runs on the same machine and IMPORT_WORKERS setting.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_VERSION = 1
+STAGES = ["walk", "import_scan", "graph_build", "context_pack", "spec_parse"]
+DEFAULT_SIZES = "1k,10k,100k"
+DEFAULT_OUTPUT = os.path.join("benchmarks", "latest.json")
+MIN_REGRESSION_SECONDS = 0.05  # Ignore slowdowns below timer noise
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    return int(float(text[:-1]) * 1000) if text.endswith('k') else int(text)
+
+
+def _peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_stages(root: str) -> Dict[str, Any]:
+    """Runs each stage once against `root` in this process; returns timings, peak RSS and sizes."""
+    from app.services.file_index import FileIndex
+    from app.services.import_graph import ImportGraphEngine
+    from app.services.arch_graph import cluster_view, render_mermaid
+    from app.services.context_packer import ContextPacker
+    from app.services.project_intelligence import ArchitectureMapper, ApiContractService
+
+    stages: Dict[str, Dict[str, float]] = {}
+    counts: Dict[str, int] = {}
+
+    def timed(name: str, fn):
+        start = time.perf_counter()
+        result = fn()
+        stages[name] = {"seconds": round(time.perf_counter() - start, 4), "rss_peak_mb": _peak_rss_mb()}
+        return result
+
+    mapper = ArchitectureMapper()
+    index = timed("walk", lambda: FileIndex.build(root))
+    records = mapper.source_files(index)
+    _, edges = timed("import_scan", lambda: ImportGraphEngine(index).scan(records))
+
+    def graph_build():
+        graph = mapper.build_graph(index, edges)
+        render_mermaid(cluster_view(graph))
+        return graph
+    graph = timed("graph_build", graph_build)
+
+    packed = timed("context_pack", lambda: ContextPacker().pack(index, edges))
+
+    def spec_parse():
+        found = ApiContractService().build_route_index(index)
+        if found:
+            found[1].query(limit=200)
+        return found
+    spec = timed("spec_parse", spec_parse)
+
+    counts.update(files=len(index.files), source_files=len(records), edges=len(graph["edges"]),
+                  dirs=len(graph["dirs"]["path"]), packed_files=len(packed.files), packed_tokens=packed.tokens,
+                  routes=len(spec[1]) if spec else 0)
+    return {
+        "stages": stages,
+        "counts": counts,
+        "peak_rss_mb": _peak_rss_mb(),
+        # Import-scan pool workers, if the scan ran in parallel
+        "children_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def _run_isolated(root: str) -> Dict[str, Any]:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.pipeline", "--run-stages", root],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed for {root}:\n{out.stderr[-4000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _merge(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = {
+        "stages": {},
+        "counts": runs[0]["counts"],
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "children_peak_rss_mb": max(r["children_peak_rss_mb"] for r in runs),
+    }
+    for stage in STAGES:
+        merged["stages"][stage] = {
+            "seconds": min(r["stages"][stage]["seconds"] for r in runs),
+            "rss_peak_mb": max(r["stages"][stage]["rss_peak_mb"] for r in runs),
+        }
+    merged["total_seconds"] = round(sum(s["seconds"] for s in merged["stages"].values()), 4)
+    return merged
+
+
+def run_benchmark(sizes: List[str], repeat: int, workdir: str, seed: int) -> Dict[str, Any]:
+    from benchmarks.synthetic_repo import generate, GENERATOR_VERSION
+    from app.core.config import settings
+
+    results = {}
+    for label in sizes:
+        files = parse_size(label)
+        start = time.perf_counter()
+        root = generate(os.path.join(workdir, f"repo-{files}-s{seed}"), files, seed)
+        print(f"[{label}] repo ready in {time.perf_counter() - start:.1f}s: {root}", file=sys.stderr)
+        runs = []
+        for i in range(repeat):
+            runs.append(_run_isolated(root))
+            print(f"[{label}] run {i + 1}/{repeat}: {runs[-1]['stages']}", file=sys.stderr)
+        results[label] = _merge(runs)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "import_workers": settings.IMPORT_WORKERS or os.cpu_count(),
+        },
+        "config": {"seed": seed, "repeat": repeat, "generator_version": GENERATOR_VERSION},
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions: stages (or peak RSS) more than `tolerance` worse than the baseline."""
+    regressions = []
+    for label, result in current["results"].items():
+        base = baseline.get("results", {}).get(label)
+        if not base:
+            continue
+        for stage, now in result["stages"].items():
+            before = base["stages"].get(stage)
+            if not before:
+                continue
+            slower = now["seconds"] - before["seconds"]
+            if now["seconds"] > before["seconds"] * (1 + tolerance) and slower > MIN_REGRESSION_SECONDS:
+                regressions.append(f"{label} {stage}: {before['seconds']:.3f}s -> {now['seconds']:.3f}s")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{label} peak RSS: {base['peak_rss_mb']}MB -> {result['peak_rss_mb']}MB")
+    return regressions
+
+
+def print_table(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    header = f"{'size':>6} {'stage':<14} {'seconds':>9} {'baseline':>9} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for label, result in report["results"].items():
+        base = (baseline or {}).get("results", {}).get(label, {}).get("stages", {})
+        for stage in STAGES:
+            now = result["stages"][stage]
+            before = f"{base[stage]['seconds']:.3f}" if stage in base else "-"
+            print(f"{label:>6} {stage:<14} {now['seconds']:>9.3f} {before:>9} {now['rss_peak_mb']:>8.1f}")
+        print(f"{label:>6} {'total':<14} {result['total_seconds']:>9.3f} {'':>9} {result['peak_rss_mb']:>8.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the project-intelligence pipeline on synthetic repos.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated file counts, e.g. 1k,10k,100k")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "codeatlas-bench"),
+                        help="Where synthetic repos are generated (and cached between runs)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON report path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; regressions exit with status 1")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown ratio before flagging")
+    parser.add_argument("--run-stages", metavar="ROOT", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_stages:
+        # Child mode: one isolated run, result as the last stdout line
+        print(json.dumps(run_stages(args.run_stages)))
+        return 0
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    report = run_benchmark(sizes, max(1, args.repeat), args.workdir, args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if baseline:
+        if baseline.get("schema") != SCHEMA_VERSION:
+            print("Baseline schema differs; not comparing.")
+            return 0
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+"""
+Replay benchmark for the code that runs after the model answers: JSON extraction, resource
+enrichment, skill ID enforcement and Mongo persistence, fed with recorded LLM outputs instead of
+live calls, so no tokens are spent.
+
+    cd backend
+    python -m benchmarks.replay                                  # built-in corpus
+    python -m benchmarks.replay --corpus recordings/ --repeat 5  # outputs saved with LLM_RECORD_DIR
+    python -m benchmarks.replay --output benchmarks/replay-baseline.json
+    python -m benchmarks.replay --baseline benchmarks/replay-baseline.json  # exits 1 on regressions
+    python -m benchmarks.replay --mongo                          # persist into MONGO_URI instead of in memory
+
+The built-in corpus is generated deterministically: typical and ~8k-token roadmaps, fenced and
+chatty answers, truncated and trailing-comma JSON, resumes and interview turns. Recorded files are
+named <site>-*.txt (roadmap, resume, interview_turn), as LLM_RECORD_DIR writes them.
+Stage times are the best of the repetitions; allocations (tracemalloc) come from a separate pass.
+"""
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import asyncio
+import platform
+import argparse
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import bson
+
+SCHEMA_VERSION = 1
+STAGES = ["roadmap_extract", "roadmap_stream_parse", "enrich", "skill_ids", "roadmap_persist",
+          "resume_extract", "turn_extract", "turn_persist"]
+DEFAULT_OUTPUT = os.path.join("benchmarks", "replay-latest.json")
+MIN_REGRESSION_SECONDS = 0.002  # Ignore slowdowns below timer noise
+STREAM_CHUNK_CHARS = 32  # Roughly one streamed token batch
+LARGE_ROADMAP_TOKENS = 8000
+
+
+# --- Corpus ---
+def _large_roadmap(base: Dict[str, Any], tokens: int) -> Dict[str, Any]:
+    """`base` with skills repeated until the JSON is about `tokens` tokens long."""
+    roadmap = copy.deepcopy(base)
+    tracks = [t for level in roadmap["levels"] for t in level["tracks"]]
+    i = 0
+    while len(json.dumps(roadmap, indent=2)) < tokens * 4:
+        track = tracks[i % len(tracks)]
+        skill = copy.deepcopy(track["skills"][0])
+        skill["id"] = f"{skill['id']}-{i}"
+        skill["name"] = f"{skill['name']} {i}"
+        track["skills"].append(skill)
+        i += 1
+    return roadmap
+
+
+def _trailing_comma(text: str) -> str:
+    """A comma after the last level, a classic model mistake that json.loads rejects."""
+    end = text.rfind("]")
+    close = text.rfind("}", 0, end)
+    return text[:close + 1] + "," + text[close + 1:]
+
+
+def build_corpus(seed: int) -> Dict[str, List[Tuple[str, str]]]:
+    """Deterministic stand-ins for recorded outputs: {site: [(name, raw model output)]}."""
+    from app.core.config import settings
+    from app.services.fake_providers import fake_completion
+    from app.services.ai_roadmap import ai_service
+    from app.services.ai_interview import TURN_JSON_FORMAT, TURN_STREAM_FORMAT, META_MARKER
+
+    settings.FAKE_SEED = seed
+    corpus: Dict[str, List[Tuple[str, str]]] = {"roadmap": [], "resume": [], "interview_turn": []}
+
+    fenced = fake_completion(ai_service._build_prompt("Backend Developer", ["Graphs", "DP"]))
+    body = fenced.removeprefix("```json\n").removesuffix("\n```")
+    large = json.dumps(_large_roadmap(json.loads(body), LARGE_ROADMAP_TOKENS), indent=2)
+    corpus["roadmap"] += [
+        ("typical-fenced", fenced),
+        ("typical-chatty", f"Sure! Here is your roadmap:\n\n{fenced}\n\nLet me know if you want changes."),
+        ("large-8k", f"```json\n{large}\n```"),
+        ("large-8k-compact", json.dumps(json.loads(large))),
+        ("malformed-trailing-comma", _trailing_comma(body)),
+        ("malformed-truncated", large[:int(len(large) * 0.7)]),
+    ]
+    resume = fake_completion("RESUME TEXT:\nJane Doe, backend engineer")
+    corpus["resume"] += [
+        ("plain", resume),
+        ("fenced", f"```json\n{resume}\n```"),
+        ("chatty", f"Here is the extracted data:\n{resume}\nHope this helps."),
+    ]
+    for i in range(4):
+        corpus["interview_turn"].append((f"json-{i}", fake_completion(f"{TURN_JSON_FORMAT} {i}")))
+        corpus["interview_turn"].append((f"stream-{i}", fake_completion(f"{TURN_STREAM_FORMAT} {i}")))
+    corpus["interview_turn"].append(("fenced-json", f"```json\n{fake_completion(TURN_JSON_FORMAT)}\n```"))
+    corpus["interview_turn"].append(("stream-missing-meta", fake_completion(TURN_STREAM_FORMAT).split(META_MARKER)[0]))
+    return corpus
+
+
+def load_corpus(directory: str) -> Dict[str, List[Tuple[str, str]]]:
+    corpus: Dict[str, List[Tuple[str, str]]] = {"roadmap": [], "resume": [], "interview_turn": []}
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        name = os.path.basename(path)[:-4]
+        site = next((s for s in corpus if name.startswith(f"{s}-")), None)
+        if site:
+            with open(path, 'r', encoding='utf-8') as f:
+                corpus[site].append((name, f.read()))
+    return corpus
+
+
+# --- Persistence targets ---
+class _MemoryCollection:
+    """Stands in for a pymongo collection: documents are BSON-encoded as the driver would on the wire."""
+    def __init__(self):
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+
+    def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        bson.encode({"q": query, "u": update})
+        key = json.dumps(query, sort_keys=True, default=str)
+        doc = self.docs.setdefault(key, {"_id": bson.ObjectId(), **query})
+        doc.update(update.get("$set", {}))
+        for field, push in update.get("$push", {}).items():
+            doc.setdefault(field, []).extend(push["$each"])
+
+    def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        doc = self.docs.get(json.dumps(query, sort_keys=True, default=str))
+        return bson.decode(bson.encode(doc)) if doc else None
+
+
+class _MemoryDB:
+    def __init__(self):
+        self.roadmaps = _MemoryCollection()
+        self.interview_sessions = _MemoryCollection()
+
+
+# --- Stages ---
+def _stages(corpus: Dict[str, List[Tuple[str, str]]], db: Any) -> Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]]:
+    """{stage: (prepare, run)}: `prepare` builds fresh inputs outside the timed region, `run(inputs)` is timed."""
+    from bson import ObjectId
+    from app.services.ai_roadmap import ai_service, ROADMAP_STREAM_PATHS
+    from app.services.ai_interview import ai_interview_service, TurnStreamParser
+    from app.services.resume_parser import resume_parser_service
+    from app.services.json_stream import JsonStreamParser
+    from app.api.v1.endpoints.roadmap import _save_roadmap
+    from app.api.v1.endpoints.interview import _save_turn
+
+    def parse_or_none(content: str):
+        try:
+            return ai_service._parse_roadmap(content)
+        except ValueError:
+            return None  # Production falls back to the streamed levels or a simulation
+
+    parsed = [r for r in (parse_or_none(c) for _, c in corpus["roadmap"]) if r and "levels" in r]
+
+    def roadmap_extract(_):
+        return [parse_or_none(content) for _, content in corpus["roadmap"]]
+
+    def roadmap_stream_parse(_):
+        completed = 0
+        for _, content in corpus["roadmap"]:
+            parser = JsonStreamParser(ROADMAP_STREAM_PATHS)
+            for i in range(0, len(content), STREAM_CHUNK_CHARS):
+                completed += len(parser.feed(content[i:i + STREAM_CHUNK_CHARS]))
+        return completed
+
+    def enrich(roadmaps):
+        async def run():
+            return await asyncio.gather(*(ai_service._enrich_resources(r) for r in roadmaps))
+        return asyncio.run(run())
+
+    def without_ids():
+        roadmaps = copy.deepcopy(parsed)
+        for r in roadmaps:
+            for level in r["levels"]:
+                for track in level.get("tracks", []):
+                    for skill in track.get("skills", []):
+                        skill.pop("id", None)
+        return roadmaps
+
+    def skill_ids(roadmaps):
+        for r in roadmaps:
+            ai_service._ensure_skill_ids(r["levels"])
+
+    def roadmap_persist(roadmaps):
+        for i, r in enumerate(roadmaps):
+            _save_roadmap(db, "bench-user", f"Role {i}", 45, r)
+
+    def resume_extract(_):
+        out = []
+        for _, content in corpus["resume"]:
+            try:
+                out.append(resume_parser_service._clean_json(content))
+            except ValueError:
+                out.append(None)
+        return out
+
+    def turn_extract(_):
+        turns = []
+        for _, content in corpus["interview_turn"]:
+            try:
+                if content.lstrip().startswith(("{", "`")):
+                    turns.append(json.loads(ai_interview_service._clean_json(content)))
+                else:
+                    parser = TurnStreamParser()
+                    for i in range(0, len(content), STREAM_CHUNK_CHARS):
+                        parser.feed(content[i:i + STREAM_CHUNK_CHARS])
+                    turns.append(parser.finish()[1])
+            except ValueError:
+                turns.append(None)
+        return turns
+
+    turns = [t for t in turn_extract(None) if t and t.get("next_question")]
+    session_id = str(ObjectId())
+
+    def turn_persist(_):
+        for i, turn in enumerate(turns):
+            _save_turn(db, session_id, f"Answer {i}", turn)
+
+    fresh = lambda: copy.deepcopy(parsed)
+    none = lambda: None
+    return {
+        "roadmap_extract": (none, roadmap_extract),
+        "roadmap_stream_parse": (none, roadmap_stream_parse),
+        "enrich": (fresh, enrich),
+        "skill_ids": (without_ids, skill_ids),
+        "roadmap_persist": (fresh, roadmap_persist),
+        "resume_extract": (none, resume_extract),
+        "turn_extract": (none, turn_extract),
+        "turn_persist": (none, turn_persist),
+    }
+
+
+def run_benchmark(corpus: Dict[str, List[Tuple[str, str]]], repeat: int, use_mongo: bool) -> Dict[str, Any]:
+    from app.core.config import settings
+    import app.services.ai_roadmap as ai_roadmap
+
+    # Enrichment is measured without the network: instant fake search, and no per-resource debug prints
+    settings.SEARCH_PROVIDER = "fake"
+    settings.FAKE_SEARCH_MEDIAN_SECONDS = 0.0
+    settings.FAKE_SEARCH_ERROR_RATE = 0.0
+    ai_roadmap.print = lambda *args, **kwargs: None
+
+    if use_mongo:
+        from app.core.database import client
+        db = client[f"{settings.DB_NAME}_replay_bench"]
+    else:
+        db = _MemoryDB()
+
+    stages = _stages(corpus, db)
+    results: Dict[str, Dict[str, float]] = {}
+    for name in STAGES:
+        prepare, run = stages[name]
+        best = None
+        for _ in range(repeat):
+            inputs = prepare()
+            start = time.perf_counter()
+            run(inputs)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        inputs = prepare()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        run(inputs)
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {"seconds": round(best, 5), "alloc_peak_kb": round((peak - before) / 1024, 1),
+                         "retained_kb": round((after - before) / 1024, 1)}
+        print(f"[{name}] {results[name]}", file=sys.stderr)
+
+    if use_mongo:
+        client.drop_database(db.name)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {"repeat": repeat, "mongo": use_mongo},
+        "corpus": {site: {"items": len(items), "chars": sum(len(c) for _, c in items)} for site, items in corpus.items()},
+        "stages": results,
+        "total_seconds": round(sum(r["seconds"] for r in results.values()), 5),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Human-readable regressions: stage time or peak allocation more than `tolerance` worse than the baseline."""
+    regressions = []
+    for stage, now in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        slower = now["seconds"] - before["seconds"]
+        if now["seconds"] > before["seconds"] * (1 + tolerance) and slower > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{stage}: {before['seconds']:.4f}s -> {now['seconds']:.4f}s")
+        if now["alloc_peak_kb"] > before["alloc_peak_kb"] * (1 + tolerance) and now["alloc_peak_kb"] - before["alloc_peak_kb"] > 64:
+            regressions.append(f"{stage} peak allocation: {before['alloc_peak_kb']}KB -> {now['alloc_peak_kb']}KB")
+    return regressions
+
+
+def print_table(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    header = f"{'stage':<22} {'seconds':>9} {'baseline':>9} {'peak KB':>9} {'kept KB':>9}"
+    print(header)
+    print("-" * len(header))
+    base = (baseline or {}).get("stages", {})
+    for stage in STAGES:
+        now = report["stages"][stage]
+        before = f"{base[stage]['seconds']:.4f}" if stage in base else "-"
+        print(f"{stage:<22} {now['seconds']:>9.4f} {before:>9} {now['alloc_peak_kb']:>9.1f} {now['retained_kb']:>9.1f}")
+    print(f"{'total':<22} {report['total_seconds']:>9.4f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded LLM outputs through the post-processing stages.")
+    parser.add_argument("--corpus", help="Directory of recorded outputs (<site>-*.txt); default: built-in corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the built-in corpus")
+    parser.add_argument("--mongo", action="store_true", help="Persist into a scratch database on MONGO_URI")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON report path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; regressions exit with status 1")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown ratio before flagging")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus) if args.corpus else build_corpus(args.seed)
+    if not any(corpus.values()):
+        print(f"No <site>-*.txt recordings found in {args.corpus}", file=sys.stderr)
+        return 2
+    report = run_benchmark(corpus, max(1, args.repeat), args.mongo)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if baseline:
+        if baseline.get("schema") != SCHEMA_VERSION or baseline.get("corpus") != report["corpus"]:
+            print("Baseline schema or corpus differs; not comparing.")
+            return 0
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import os
+import json
+import random
+import shutil
+from itertools import accumulate
+from typing import List
+
+# Bump when the generated layout changes, so cached trees are regenerated
+GENERATOR_VERSION = 1
+MARKER = ".bench-repo"
+
+FILES_PER_DIR = 24
+PY_SHARE = 0.6
+STDLIB = ["os", "sys", "json", "logging", "re", "typing", "datetime", "functools", "itertools", "collections"]
+PY_THIRD_PARTY = ["requests", "pydantic", "sqlalchemy", "fastapi", "numpy"]
+JS_THIRD_PARTY = ["react", "axios", "lodash", "express", "zod"]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    # A few "core" modules are imported everywhere, most are imported rarely: the usual shape of real repos
+    return [1.0 / (i + 1) ** s for i in range(n)]
+
+
+def _fan_out(rng: random.Random) -> int:
+    # Mostly 2-6 internal imports, with a long tail of wide "hub" files
+    return min(40, int(rng.paretovariate(1.6) * 2))
+
+
+def _layout(count: int, top: str, packages: int, ext: str) -> List[str]:
+    """`count` module paths under `top`, FILES_PER_DIR to a directory, spread over packages/subpackages."""
+    paths = []
+    dirs = max(1, -(-count // FILES_PER_DIR))
+    for d in range(dirs):
+        pkg, sub = d % packages, d // packages
+        base = f"{top}/pkg_{pkg}/sub_{sub}" if sub else f"{top}/pkg_{pkg}"
+        for k in range(min(FILES_PER_DIR, count - d * FILES_PER_DIR)):
+            paths.append(f"{base}/mod_{k}{ext}")
+    return paths
+
+
+def _py_module(rng: random.Random, path: str, targets: List[str]) -> str:
+    lines = [f"import {m}" for m in rng.sample(STDLIB, 2)]
+    lines.append(f"import {rng.choice(PY_THIRD_PARTY)}")
+    importer_dir = path.rpartition('/')[0]
+    for target in targets:
+        module = target[:-3].replace('/', '.')
+        target_dir, _, name = target[:-3].rpartition('/')
+        style = rng.random()
+        if target_dir == importer_dir and style < 0.4:
+            lines.append(f"from .{name} import Model{name.split('_')[1]}")
+        elif style < 0.8:
+            lines.append(f"from {module.rpartition('.')[0]} import {name}")
+        else:
+            lines.append(f"import {module}")
+    stem = path.rpartition('/')[2][:-3]
+    body = [
+        "",
+        "",
+        f"class Model{stem.split('_')[1]}:",
+        f'    """Synthetic model for {path}."""',
+        "    def __init__(self, value=None):",
+        "        self.value = value",
+        "",
+        "    def to_dict(self):",
+        "        return {'value': self.value}",
+    ]
+    for i in range(rng.randint(2, 8)):
+        body += ["", "", f"def handler_{i}(payload, retries=3):",
+                 "    result = []",
+                 "    for item in payload:",
+                 "        if item is not None:",
+                 f"            result.append(str(item) + '{i}')",
+                 "    return result"]
+    return "\n".join(lines + body) + "\n"
+
+
+def _js_module(rng: random.Random, path: str, targets: List[str]) -> str:
+    lines = [f"import {rng.choice(JS_THIRD_PARTY)} from '{rng.choice(JS_THIRD_PARTY)}';"]
+    importer_dir = path.rpartition('/')[0]
+    for target in targets:
+        rel = os.path.relpath(target[:-3], importer_dir).replace(os.sep, '/')
+        rel = rel if rel.startswith('.') else f"./{rel}"
+        name = target.rpartition('/')[2][:-3].replace('mod_', 'Mod')
+        if rng.random() < 0.8:
+            lines.append(f"import {{ {name} }} from '{rel}';")
+        else:
+            lines.append(f"const {name} = require('{rel}');")
+    stem = path.rpartition('/')[2][:-3].replace('mod_', 'Mod')
+    body = ["", f"export class {stem} {{", "  constructor(props) {", "    this.props = props;", "  }", "}"]
+    for i in range(rng.randint(2, 8)):
+        body += ["", f"export function handle{i}(items) {{",
+                 "  return items.filter(Boolean).map((item) => `${item}-" + str(i) + "`);", "}"]
+    return "\n".join(lines + body) + "\n"
+
+
+def _openapi(rng: random.Random, operations: int) -> dict:
+    """Spec with shared parameters/schemas behind $refs, like generated specs of large services."""
+    paths = {}
+    resources = max(1, operations // 4)
+    for r in range(resources):
+        base = f"/api/v1/resource{r}"
+        tag = f"group{r % 25}"
+        paths[base] = {
+            "get": {"summary": f"List resource {r}", "tags": [tag], "operationId": f"list{r}",
+                    "parameters": [{"$ref": "#/components/parameters/Limit"}]},
+            "post": {"summary": f"Create resource {r}", "tags": [tag], "operationId": f"create{r}",
+                     "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}},
+        }
+        paths[f"{base}/{{id}}"] = {
+            "parameters": [{"$ref": "#/components/parameters/Id"}],
+            "get": {"summary": f"Get resource {r}", "tags": [tag], "operationId": f"get{r}"},
+            "delete": {"summary": f"Delete resource {r}", "tags": [tag], "operationId": f"delete{r}"},
+        }
+    return {
+        "openapi": "3.0.3",
+        "info": {"title": "Synthetic API", "version": "1.0.0"},
+        "paths": paths,
+        "components": {
+            "parameters": {
+                "Id": {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}},
+                "Limit": {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+            },
+            "schemas": {"Item": {"type": "object", "properties": {"name": {"type": "string"}}}},
+        },
+    }
+
+
+def generate(root: str, files: int, seed: int = 0) -> str:
+    """
+    Writes a deterministic Python + JS repository of roughly `files` files under `root` and returns it.
+    Trees are cached: an existing tree generated with the same (files, seed, version) is reused.
+    """
+    marker = os.path.join(root, MARKER)
+    signature = {"files": files, "seed": seed, "version": GENERATOR_VERSION}
+    if os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f) == signature:
+                return root
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+
+    rng = random.Random(seed)
+    py_count = int(files * PY_SHARE)
+    packages = max(4, int((files / FILES_PER_DIR) ** 0.5))
+    py_paths = _layout(py_count, "app", packages, ".py")
+    js_paths = _layout(files - py_count, "web/src", packages, ".js")
+
+    for paths, render in ((py_paths, _py_module), (js_paths, _js_module)):
+        cum_weights = list(accumulate(_zipf_weights(len(paths))))
+        for path in paths:
+            targets = {t for t in rng.choices(paths, cum_weights=cum_weights, k=_fan_out(rng)) if t != path}
+            abs_path = os.path.join(root, *path.split('/'))
+            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+            with open(abs_path, 'w', encoding='utf-8') as f:
+                f.write(render(rng, path, sorted(targets)))
+
+    for path in py_paths:
+        init = os.path.join(root, *path.split('/')[:-1], "__init__.py")
+        if not os.path.exists(init):
+            open(init, 'w').close()
+
+    with open(os.path.join(root, "main.py"), 'w', encoding='utf-8') as f:
+        f.write("from fastapi import FastAPI\nfrom app.pkg_0 import mod_0\n\napp = FastAPI()\n")
+    with open(os.path.join(root, "requirements.txt"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(PY_THIRD_PARTY) + "\n")
+    with open(os.path.join(root, "package.json"), 'w', encoding='utf-8') as f:
+        json.dump({"name": "synthetic", "dependencies": {name: "*" for name in JS_THIRD_PARTY}}, f, indent=2)
+    with open(os.path.join(root, "README.md"), 'w', encoding='utf-8') as f:
+        f.write(f"# Synthetic repo\n\n{files} files, seed {seed}.\n")
+    with open(os.path.join(root, "openapi.json"), 'w', encoding='utf-8') as f:
+        json.dump(_openapi(rng, max(40, files // 10)), f)
+
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(signature, f)
+    return root
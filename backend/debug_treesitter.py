@@ -5,7 +5,7 @@ import sys
 # Add backend to path
 sys.path.append(os.getcwd())
 
-from app.services.project_intelligence import project_intelligence_service
+from app.services.import_graph import extract_imports
 
 def test():
     print("Testing Tree-sitter...")
@@ -14,7 +14,7 @@ def test():
         print(f"File {test_file} not found")
         return
 
-    imports = project_intelligence_service._get_imports_with_treesitter(test_file, ".py")
+    imports = extract_imports(test_file, ".py")
     print(f"Imports found in {test_file}:")
     for i in imports:
         print(f" - {i}")
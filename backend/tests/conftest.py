@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend as `app`, the same way uvicorn runs it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Service singletons create their workspace at import time; keep it out of the source tree
+_workspace = tempfile.mkdtemp(prefix="codeatlas-tests-")
+os.environ.setdefault("REPO_BASE_DIR", _workspace)
+os.environ.setdefault("REPO_CACHE_DIR", os.path.join(_workspace, "cache"))
+os.environ.setdefault("ANALYSIS_STATE_DIR", os.path.join(_workspace, "state"))
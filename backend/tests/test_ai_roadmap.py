@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import ai_roadmap
+from app.services.ai_roadmap import AIRoadmapService
+
+
+def _level(name, skills=1):
+    return {"name": name, "description": f"{name} level", "tracks": [{"category": "DSA", "skills": [
+        {"id": f"{name}-{i}", "name": f"{name} {i}", "resources": [{"title": "Docs", "url": "https://docs.example"}]}
+        for i in range(skills)]}]}
+
+
+ROADMAP = {"title": "T", "is_simulated": False, "description": "D", "levels": [_level("b"), _level("i"), _level("a")]}
+
+
+def _events(monkeypatch, response):
+    async def astream(llm, prompt, site, validate=None, ttl_seconds=None):
+        for i in range(0, len(response), 7):
+            yield response[i:i + 7]
+
+    monkeypatch.setattr(ai_roadmap.llm_registry, "get", lambda *args, **kwargs: object())
+    monkeypatch.setattr(ai_roadmap.llm_cache, "astream", astream)
+
+    async def collect():
+        return [e async for e in AIRoadmapService()._stream_roadmap("Backend", 30, [], "key")]
+    return asyncio.run(collect())
+
+
+def _check(events):
+    assert all(e["type"] != "reset" for e in events)
+    done = events[-1]
+    assert done["type"] == "done"
+    assert [level["name"] for level in done["roadmap"]["levels"]] == ["b", "i", "a"]
+    assert not done["roadmap"].get("is_simulated")
+    sent = sorted(e["index"] for e in events if e["type"] == "level")
+    assert sent == [0, 1, 2]
+
+
+def test_well_formed_response_streams_every_level(monkeypatch):
+    events = _events(monkeypatch, "```json\n" + json.dumps(ROADMAP) + "\n```")
+    _check(events)
+    assert [e["index"] for e in events if e["type"] == "level"] == [0, 1, 2]
+
+
+def test_trailing_comma_inside_a_level_falls_back_to_the_whole_response(monkeypatch):
+    text = json.dumps(ROADMAP)
+    # The middle level can't be decoded on its own; the others stream as usual
+    broken = text.replace('"https://docs.example"}]}]}]}, {"name": "a"',
+                          '"https://docs.example"},]}]}]}, {"name": "a"')
+    assert broken != text
+    _check(_events(monkeypatch, broken))
+
+
+def test_trailing_commas_everywhere(monkeypatch):
+    text = json.dumps(ROADMAP).replace("}]", "},]")
+    _check(_events(monkeypatch, text))
+
+
+def test_unparseable_response_falls_back_to_simulation(monkeypatch):
+    events = _events(monkeypatch, "Sorry, I can't help with that.")
+    assert events[-1]["type"] == "done"
+    assert events[-1]["roadmap"]["is_simulated"]
@@ -0,0 +1,50 @@
+from app.services.arch_graph import build_graph, cluster_view, render_mermaid
+
+
+def _view(paths, edges=(), prefix="", max_clusters=10):
+    return cluster_view(build_graph(paths, edges), prefix, max_clusters)
+
+
+def test_packages_are_clustered_as_deep_as_fits():
+    paths = [f"app/{pkg}/m{i}.py" for pkg in ("api", "core", "db") for i in range(5)] + ["main.py"]
+    view = _view(paths, [("main.py", "app/api/m0.py"), ("app/api/m0.py", "app/db/m1.py")])
+    keys = {c["key"]: c for c in view["clusters"]}
+    assert set(keys) == {"app/api/", "app/core/", "app/db/", "main.py"}
+    assert keys["app/api/"]["size"] == 5
+    assert view["total_edges"] == 2
+
+
+def test_flat_directory_is_bucketed_by_extension():
+    paths = [f"f{i:05}.py" for i in range(10000)] + [f"s{i}.sql" for i in range(50)] + ["pkg/a.py"]
+    view = _view(paths, [("f00001.py", "pkg/a.py"), ("f00002.py", "s1.sql")])
+    keys = {c["key"]: c for c in view["clusters"]}
+    assert set(keys) == {"*.py", "*.sql", "pkg/"}
+    assert keys["*.py"]["size"] == 10000
+    assert view["total_nodes"] == 10051
+    assert view["total_edges"] == 2
+    assert '[["*.py (10000)"]]' in render_mermaid(view)
+
+
+def test_many_extensions_fall_back_to_name_ranges():
+    paths = [f"src/file{i:03}.e{i}" for i in range(100)]
+    view = _view(paths, prefix="src")
+    assert len(view["clusters"]) == 10
+    assert view["clusters"][0]["key"] == "src/file000.e0 … file009.e9"
+    assert sum(c["size"] for c in view["clusters"]) == 100
+
+
+def test_many_directories_are_bucketed():
+    paths = [f"d{i:04}/x.py" for i in range(500)]
+    view = _view(paths)
+    assert len(view["clusters"]) <= 10
+    assert {c["kind"] for c in view["clusters"]} == {"group"}
+
+
+def test_external_clusters_are_capped():
+    paths = [f"inner/m{i}.py" for i in range(3)] + [f"top{i}/x.py" for i in range(50)]
+    edges = [("inner/m0.py", f"top{i}/x.py") for i in range(50)]
+    view = _view(paths, edges, prefix="inner")
+    external = [c for c in view["clusters"] if c["kind"] == "external"]
+    assert len(external) == 10
+    assert external[-1]["key"] == "(other)"
+    assert view["external_edges"] == 50
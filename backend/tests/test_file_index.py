@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from app.services.file_index import FileIndex
+
+
+def _write(root, rel_path, text=""):
+    path = os.path.join(root, *rel_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def index(tmp_path):
+    root = str(tmp_path)
+    _write(root, ".gitignore", "*.log\nsecrets/\n!keep.log\n")
+    _write(root, "main.py", "import app\n")
+    _write(root, "app/__init__.py")
+    _write(root, "app/routes/users.py", "x = 1\n")
+    _write(root, "app/static/logo.png", "\x89PNG")
+    _write(root, "tests/test_users.py")
+    _write(root, "debug.log")
+    _write(root, "keep.log")
+    _write(root, "secrets/key.py")
+    _write(root, "node_modules/lib/index.js")
+    _write(root, "web/.gitignore", "/generated.js\n")
+    _write(root, "web/generated.js")
+    _write(root, "web/src/generated.js")
+    return FileIndex.build(root)
+
+
+def test_records_paths_relative_to_root(index):
+    record = index.find("users.py")[0]
+    assert record.path == "app/routes/users.py"
+    assert record.ext == ".py"
+    assert record.language == "python"
+    assert record.depth == 2
+    assert record.dir == "app/routes"
+    assert index.abs_path(record) == os.path.join(index.root, "app", "routes", "users.py")
+
+
+def test_pruned_and_ignored_dirs_are_not_descended(index):
+    paths = {r.path for r in index.files}
+    assert not any(p.startswith("node_modules/") for p in paths)
+    assert not any(p.startswith("secrets/") for p in paths)
+    assert "secrets" not in index.subdirs[""]
+
+
+def test_gitignore_rules(index):
+    assert index.find("debug.log") == []
+    assert index.find("debug.log", include_ignored=True)[0].ignored
+    assert not index.find("keep.log")[0].ignored
+    # Anchored rule in a nested .gitignore only applies at its own level
+    generated = {r.path for r in index.find("generated.js")}
+    assert generated == {"web/src/generated.js"}
+
+
+def test_query_filters(index):
+    py = {r.path for r in index.query(exts={".py"})}
+    assert py == {"main.py", "app/__init__.py", "app/routes/users.py", "tests/test_users.py"}
+    assert "tests/test_users.py" not in {r.path for r in index.query(exts={".py"}, exclude_dirs={"tests"})}
+    assert "app/static/logo.png" not in {r.path for r in index.query()}
+    assert "app/static/logo.png" in {r.path for r in index.query(include_binary=True)}
+
+
+def test_exists_and_walk(index):
+    assert index.exists("app/routes/users.py")
+    assert index.exists("main.py")
+    assert not index.exists("app/users.py")
+    walked = [rel_dir for rel_dir, _, _ in index.walk(exclude_dirs={"tests"})]
+    assert walked[0] == ""
+    assert "app/routes" in walked
+    assert "tests" not in walked
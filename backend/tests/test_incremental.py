@@ -0,0 +1,73 @@
+import asyncio
+import os
+import subprocess
+
+from app.services.incremental import STATE_VERSION, IncrementalAnalyzer
+
+
+def _record(blob):
+    return {"blob": blob, "imports": [("os", 0, ())]}
+
+
+def test_unchanged_keeps_only_matching_blobs():
+    previous = {"files": {
+        "same.py": _record("a1"),
+        "modified.py": _record("b1"),
+        "removed.py": _record("c1"),
+        "untracked.py": _record(None),
+    }}
+    blobs = {"same.py": "a1", "modified.py": "b2", "added.py": "d1", "untracked.py": "e1"}
+    known = {"same.py", "modified.py", "added.py", "untracked.py"}
+    assert IncrementalAnalyzer.unchanged(previous, blobs, known) == {"same.py": _record("a1")}
+
+
+def test_unchanged_drops_files_no_longer_indexed():
+    # Still in the tree but now excluded from the index (e.g. newly gitignored)
+    previous = {"files": {"gone.py": _record("a1")}}
+    assert IncrementalAnalyzer.unchanged(previous, {"gone.py": "a1"}, set()) == {}
+
+
+def test_state_round_trip(tmp_path):
+    analyzer = IncrementalAnalyzer(state_dir=str(tmp_path))
+    url = "https://github.com/octo/repo"
+    analyzer.save({"version": STATE_VERSION, "url": url, "files": {"a.py": _record("a1")},
+                   "edges": {("a.py", "b.py")}})
+    state = analyzer.load(url)
+    assert state["edges"] == {("a.py", "b.py")}
+    assert state["files"]["a.py"]["imports"] == [("os", 0, ())]
+    assert analyzer.load("https://github.com/octo/other") is None
+
+
+def test_prune_removes_stale_state(tmp_path):
+    analyzer = IncrementalAnalyzer(state_dir=str(tmp_path))
+    analyzer.save({"version": STATE_VERSION, "url": "u", "files": {}, "edges": set()})
+    assert analyzer.prune(ttl_seconds=3600) == 0
+    assert analyzer.prune(ttl_seconds=-1) == 1
+    assert os.listdir(str(tmp_path)) == []
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def test_blob_shas_match_between_commits(tmp_path):
+    repo = str(tmp_path / "repo")
+    os.makedirs(os.path.join(repo, "pkg"))
+    _git(repo, "init", "-q")
+    for rel, text in (("pkg/a.py", "import b\n"), ("pkg/b.py", "x = 1\n")):
+        with open(os.path.join(repo, rel), "w") as f:
+            f.write(text)
+    _git(repo, "add", ".")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "one")
+
+    analyzer = IncrementalAnalyzer(state_dir=str(tmp_path / "state"))
+    before = asyncio.run(analyzer.blob_shas(repo))
+    assert set(before) == {"pkg/a.py", "pkg/b.py"}
+
+    with open(os.path.join(repo, "pkg", "b.py"), "w") as f:
+        f.write("x = 2\n")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qam", "two")
+    after = asyncio.run(analyzer.blob_shas(repo))
+
+    previous = {"files": {path: _record(sha) for path, sha in before.items()}}
+    assert set(IncrementalAnalyzer.unchanged(previous, after, set(after))) == {"pkg/a.py"}
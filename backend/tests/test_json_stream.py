@@ -0,0 +1,88 @@
+import json
+import random
+
+import pytest
+
+from app.services.json_stream import JsonStreamParser, path_matches
+
+DOC = {
+    "title": "Roadmap \"v2\" {draft}",
+    "levels": [
+        {"name": "Basics", "topics": ["a", "b\\c"], "hours": 12, "optional": False},
+        {"name": "Advanced ] [", "topics": [], "hours": 3.5, "notes": None},
+        {"name": "Unicode é ✓", "topics": ["x"], "hours": -1e3},
+    ],
+    "summary": "done",
+}
+TEXT = "Sure! Here is the plan:\n```json\n" + json.dumps(DOC, ensure_ascii=False, indent=2) + "\n```\ntrailing"
+
+
+def _chunks(text, seed):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 9)
+        yield text[i:i + n]
+        i += n
+
+
+def _run(watch, chunks):
+    parser = JsonStreamParser(watch)
+    out = []
+    for chunk in chunks:
+        out += parser.feed(chunk)
+    return parser, out
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_levels_emitted_in_order_for_any_chunking(seed):
+    parser, out = _run([("levels", "*")], _chunks(TEXT, seed))
+    assert out == [(("levels", i), level) for i, level in enumerate(DOC["levels"])]
+    assert parser.done
+
+
+def test_values_emitted_as_soon_as_complete():
+    parser = JsonStreamParser([("levels", "*")])
+    head, _, rest = TEXT.partition('"Advanced')
+    assert [path for path, _ in parser.feed(head)] == [("levels", 0)]
+    assert not parser.done
+    assert [path for path, _ in parser.feed('"Advanced' + rest)] == [("levels", 1), ("levels", 2)]
+
+
+def test_scalars_nested_paths_and_root():
+    watch = [("title",), ("levels", "*", "hours"), ("levels", 0, "topics", 1), ()]
+    _, out = _run(watch, _chunks(TEXT, 1))
+    values = dict(out)
+    assert values[("title",)] == DOC["title"]
+    assert [values[("levels", i, "hours")] for i in range(3)] == [12, 3.5, -1e3]
+    assert values[("levels", 0, "topics", 1)] == "b\\c"
+    assert values[()] == DOC
+
+
+def test_ignores_input_after_the_root_closes():
+    parser = JsonStreamParser([("summary",)])
+    assert parser.feed('{"summary": "x"} {"summary": "y"}') == [(("summary",), "x")]
+    assert parser.done
+    assert parser.feed('{"summary": "z"}') == []
+
+
+def test_text_without_an_object_yields_nothing():
+    parser, out = _run([("levels", "*")], ["no json ", "here"])
+    assert out == []
+    assert not parser.done
+
+
+def test_path_matches():
+    assert path_matches(("levels", 3), ("levels", "*"))
+    assert not path_matches(("levels", 3, "name"), ("levels", "*"))
+    assert not path_matches(("steps", 3), ("levels", "*"))
+
+
+def test_text_and_skipped_values():
+    parser = JsonStreamParser([("levels", "*")])
+    chunks = ['{"levels": [{"a": 1,}, ', '{"b": 2}]}', "\n```"]
+    out = [value for chunk in chunks for _, value in parser.feed(chunk)]
+    assert out == [{"b": 2}]
+    assert parser.skipped == [("levels", 0)]
+    assert parser.done
+    assert parser.text == "".join(chunks)
@@ -0,0 +1,70 @@
+import json
+import os
+
+from app.services.openapi_index import RouteIndex, find_and_index, parse_spec
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _spec(paths):
+    return {"openapi": "3.0.0", "info": {"title": "t", "version": "1"}, "paths": paths}
+
+
+def test_refs_outside_the_repo_are_not_read(tmp_path):
+    _write(str(tmp_path / "secret.json"), {"leak": {"summary": "TOP SECRET VALUE", "name": "TOP SECRET VALUE"}})
+    repo = tmp_path / "repo"
+    _write(str(repo / "api" / "openapi.json"), _spec({
+        "/a": {"get": {"$ref": "../../secret.json#/leak"}},
+        "/b": {"get": {"summary": "b", "parameters": [{"$ref": "../../secret.json#/leak"}]}},
+    }))
+    routes = parse_spec(str(repo / "api" / "openapi.json"), "openapi.json", repo_root=str(repo))
+    assert "TOP SECRET VALUE" not in json.dumps(routes)
+    assert {r["url"]: r["summary"] for r in routes} == {"/a": "", "/b": "b"}
+
+
+def test_symlinks_cannot_escape_the_repo(tmp_path):
+    _write(str(tmp_path / "secret.json"), {"op": {"summary": "TOP SECRET VALUE"}})
+    repo = tmp_path / "repo"
+    _write(str(repo / "openapi.json"), _spec({"/a": {"get": {"$ref": "link.json#/op"}}}))
+    os.symlink(str(tmp_path / "secret.json"), str(repo / "link.json"))
+    routes = parse_spec(str(repo / "openapi.json"), "openapi.json", repo_root=str(repo))
+    assert routes[0]["summary"] == ""
+
+
+def test_remote_refs_are_not_fetched(tmp_path):
+    _write(str(tmp_path / "openapi.json"), _spec({
+        "/a": {"get": {"$ref": "https://example.com/ops.json#/op"}},
+        "/b": {"get": {"$ref": "//example.com/ops.json#/op"}},
+    }))
+    routes = parse_spec(str(tmp_path / "openapi.json"), "openapi.json", repo_root=str(tmp_path))
+    assert [r["summary"] for r in routes] == ["", ""]
+
+
+def test_nested_relative_refs_resolve_against_their_own_document(tmp_path):
+    _write(str(tmp_path / "openapi.json"), _spec({"/users/{id}": {"$ref": "paths/users.json#/item"}}))
+    _write(str(tmp_path / "paths" / "users.json"), {"item": {
+        "parameters": [{"$ref": "../params/common.json#/id"}],
+        "get": {"$ref": "#/getUser"},
+    }, "getUser": {"summary": "Get a user", "parameters": [{"$ref": "../params/common.json#/verbose"}]}})
+    _write(str(tmp_path / "params" / "common.json"), {"id": {"name": "id"}, "verbose": {"name": "verbose"}})
+
+    routes = parse_spec(str(tmp_path / "openapi.json"), "openapi.json", repo_root=str(tmp_path))
+    assert routes == [{"method": "GET", "url": "/users/{id}", "summary": "Get a user", "file": "openapi.json",
+                       "tags": [], "operation_id": None, "parameters": ["id", "verbose"]}]
+
+
+def test_find_and_index_pages_routes(tmp_path):
+    _write(str(tmp_path / "docs" / "openapi.json"), _spec({
+        f"/items/{i}": {"get": {"summary": str(i), "tags": ["items"]}} for i in range(5)
+    }))
+    found = find_and_index(str(tmp_path), ["docs/openapi.json"])
+    assert found[0] == "docs/openapi.json"
+    index: RouteIndex = found[1]
+    page = index.query(tag="items", limit=3)
+    assert page["total"] == 5 and len(page["routes"]) == 3
+    rest = index.query(tag="items", limit=3, cursor=page["next_cursor"])
+    assert len(rest["routes"]) == 2 and rest["next_cursor"] is None
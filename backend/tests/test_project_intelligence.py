@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import subprocess
+
+import pytest
+
+from app.core.config import settings
+from app.services.project_intelligence import ProjectIntelligenceService
+
+
+class FakeStore:
+    """In-memory stand-in for AnalysisStore (same get/put contract)."""
+    def __init__(self):
+        self.docs = {}
+
+    def get(self, cache_key, stages):
+        doc = self.docs.get(cache_key)
+        if doc is None:
+            return None
+        return {"repo_url": doc["repo_url"], "commit": doc["commit"],
+                "stages": {s: doc["stages"][s] for s in stages if s in doc["stages"]}}
+
+    def put(self, cache_key, repo_url, commit, stage, value):
+        doc = self.docs.setdefault(cache_key, {"repo_url": repo_url, "commit": commit, "stages": {}})
+        doc["stages"][stage] = json.loads(json.dumps(value))
+
+
+def _commit(repo, files, message):
+    for rel_path, text in files.items():
+        path = os.path.join(repo, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+    subprocess.run(["git", "add", "."], cwd=repo, check=True)
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", message],
+                   cwd=repo, check=True)
+
+
+SPEC = {"openapi": "3.0.0", "info": {"title": "t", "version": "1"},
+        "paths": {"/users": {"get": {"summary": "List users", "tags": ["users"]}}}}
+
+
+@pytest.fixture
+def repo_url(tmp_path):
+    repo = str(tmp_path / "origin")
+    os.makedirs(repo)
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    _commit(repo, {"app/main.py": "from app import db\n", "app/db.py": "x = 1\n",
+                   "openapi.json": json.dumps(SPEC)}, "one")
+    return "file://" + repo
+
+
+def test_evicted_checkout_is_restored_at_the_analyzed_commit(monkeypatch, repo_url):
+    service = ProjectIntelligenceService()
+    service.store = FakeStore()
+
+    async def scenario():
+        overview = await service.analyze_project_structure(repo_url, "")
+        job_id = overview["job_id"]
+        analyzed = service.store.docs[job_id]["commit"]
+
+        # The checkout is evicted, and the branch moves on before /docs and /routes are called
+        monkeypatch.setattr(settings, "REPO_CACHE_TTL_SECONDS", -1)
+        await service.sweep_workspace()
+        assert not os.path.exists(os.path.join(service.repo_cache.cache_dir, job_id))
+        _commit(repo_url[len("file://"):], {"openapi.json": "{}"}, "two")
+
+        routes = await service.query_routes(job_id)
+        docs = await service.generate_docs(job_id, "")
+        return job_id, analyzed, routes, docs
+
+    job_id, analyzed, routes, docs = asyncio.run(scenario())
+    assert [(r["method"], r["url"]) for r in routes["routes"]] == [("GET", "/users")]
+    assert docs["api_total"] == 1 and "error" not in docs
+    entry = service.repo_cache._entries[job_id]
+    assert entry.sha == analyzed
+
+
+def test_unknown_job_is_still_expired():
+    service = ProjectIntelligenceService()
+    service.store = FakeStore()
+    assert asyncio.run(service.query_routes("nope-0000")) == {"error": "Session expired"}
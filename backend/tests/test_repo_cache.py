@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from app.services import repo_cache as repo_cache_module
+from app.services.repo_cache import RepoCache
+from app.services.repo_loader import RepoLoader
+
+KEY = "abc123-deadbeef"
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    path = str(tmp_path)
+    os.makedirs(os.path.join(path, KEY, "src"))
+    with open(os.path.join(path, f"{KEY}.json"), "w") as f:
+        json.dump({"key": KEY, "url": "https://github.com/octo/repo", "sha": "deadbeef",
+                   "path": os.path.join(path, KEY), "size": 10, "last_used": 0}, f)
+    return path
+
+
+def _worker(monkeypatch, name, cache_dir):
+    monkeypatch.setattr(repo_cache_module, "WORKER_ID", name)
+    return RepoCache(RepoLoader(), cache_dir=cache_dir, max_bytes=1 << 30)
+
+
+def test_lease_held_by_another_worker_blocks_eviction(monkeypatch, cache_dir):
+    a = _worker(monkeypatch, "host-a", cache_dir)
+    b = _worker(monkeypatch, "host-b", cache_dir)
+
+    monkeypatch.setattr(repo_cache_module, "WORKER_ID", "host-a")
+    with a.lease(KEY) as entry:
+        assert os.path.exists(os.path.join(cache_dir, f"{KEY}.lease-host-a"))
+        monkeypatch.setattr(repo_cache_module, "WORKER_ID", "host-b")
+        assert b.sweep(ttl_seconds=-1) == []
+        assert os.path.isdir(entry.path)
+        monkeypatch.setattr(repo_cache_module, "WORKER_ID", "host-a")
+
+    assert not os.path.exists(os.path.join(cache_dir, f"{KEY}.lease-host-a"))
+    monkeypatch.setattr(repo_cache_module, "WORKER_ID", "host-b")
+    detached = b.sweep(ttl_seconds=-1)
+    assert len(detached) == 1
+    asyncio.run(b.discard(detached))
+    assert not os.path.exists(os.path.join(cache_dir, KEY))
+
+
+def test_stale_lease_markers_are_ignored_and_removed(monkeypatch, cache_dir):
+    marker = os.path.join(cache_dir, f"{KEY}.lease-crashed-worker")
+    open(marker, "w").close()
+    os.utime(marker, (0, 0))
+    cache = _worker(monkeypatch, "host-b", cache_dir)
+    assert not os.path.exists(marker)
+    assert len(cache.sweep(ttl_seconds=-1)) == 1
+
+
+def test_lease_adopts_checkout_cached_by_another_worker(monkeypatch, tmp_path, cache_dir):
+    os.rename(os.path.join(cache_dir, f"{KEY}.json"), str(tmp_path / "sidecar"))
+    cache = _worker(monkeypatch, "host-a", cache_dir)
+    with cache.lease(KEY) as entry:
+        assert entry is None
+    os.rename(str(tmp_path / "sidecar"), os.path.join(cache_dir, f"{KEY}.json"))
+    with cache.lease(KEY) as entry:
+        assert entry.sha == "deadbeef"
+
+
+def test_locks_pruned_on_eviction(monkeypatch, cache_dir):
+    cache = _worker(monkeypatch, "host-a", cache_dir)
+    cache._locks["https://github.com/octo/repo"] = asyncio.Lock()
+    cache.sweep(ttl_seconds=-1)
+    assert cache._locks == {}
@@ -0,0 +1,143 @@
+import os
+
+import pytest
+
+from app.services.file_index import FileIndex
+from app.services.route_extractor import RouteExtractor, build_openapi_spec, join_paths
+
+FILES = {
+    "app/__init__.py": "",
+    "app/api/__init__.py": "",
+    "app/main.py": '''
+from fastapi import FastAPI
+from app.api import users
+
+app = FastAPI()
+app.include_router(users.router, prefix="/api/v1")
+
+@app.get("/health")
+def health():
+    """Liveness probe."""
+    return {}
+''',
+    "app/api/users.py": '''
+from fastapi import APIRouter
+
+router = APIRouter(prefix="/users")
+
+@router.get("/{user_id}")
+def get_user(user_id: int):
+    return {}
+
+@router.post("")
+def create_user():
+    return {}
+''',
+    "flask_app.py": '''
+from flask import Flask, Blueprint
+
+app = Flask(__name__)
+bp = Blueprint("items", __name__, url_prefix="/items")
+
+@bp.route("/<int:item_id>", methods=["GET", "DELETE"])
+def item(item_id):
+    pass
+
+app.register_blueprint(bp)
+''',
+    "src/app.js": '''
+const express = require('express');
+const orders = require('./routes/orders');
+const app = express();
+app.use('/orders', orders);
+app.get('/ping', (req, res) => res.send('ok'));
+''',
+    "src/routes/orders.js": '''
+const express = require('express');
+const router = express.Router();
+router.get('/:id', (req, res) => {});
+router.route('/')
+  .get((req, res) => {})
+  .post((req, res) => {});
+module.exports = router;
+''',
+    "src/main/java/com/x/PetController.java": '''
+@RestController
+@RequestMapping("/pets")
+public class PetController {
+    @GetMapping("/{id}")
+    public Pet get() {}
+    @PostMapping
+    public Pet create() {}
+}
+''',
+    "tests/test_api.py": '''
+from fastapi import FastAPI
+app = FastAPI()
+
+@app.get("/from-a-test")
+def x():
+    pass
+''',
+}
+
+
+@pytest.fixture(scope="module")
+def routes(tmp_path_factory):
+    root = tmp_path_factory.mktemp("repo")
+    for rel_path, text in FILES.items():
+        path = os.path.join(str(root), *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+    return RouteExtractor().extract(FileIndex.build(str(root)))
+
+
+def _pairs(routes, file):
+    return {(r["method"], r["url"]) for r in routes if r["file"] == file}
+
+
+def test_fastapi_prefixes_followed_across_modules(routes):
+    assert _pairs(routes, "app/api/users.py") == {("GET", "/api/v1/users/{user_id}"), ("POST", "/api/v1/users")}
+    health = next(r for r in routes if r["url"] == "/health")
+    assert health["method"] == "GET"
+    assert health["summary"] == "Liveness probe."
+
+
+def test_flask_blueprint_methods(routes):
+    assert _pairs(routes, "flask_app.py") == {("GET", "/items/<int:item_id>"), ("DELETE", "/items/<int:item_id>")}
+
+
+def test_express_mounts_and_route_chains(routes):
+    assert _pairs(routes, "src/app.js") == {("GET", "/ping")}
+    assert _pairs(routes, "src/routes/orders.js") == {("GET", "/orders/:id"), ("GET", "/orders/"), ("POST", "/orders/")}
+
+
+def test_spring_class_mapping(routes):
+    assert _pairs(routes, "src/main/java/com/x/PetController.java") == {("GET", "/pets/{id}"), ("POST", "/pets")}
+
+
+def test_test_dirs_skipped_and_no_duplicates(routes):
+    assert not any(r["file"].startswith("tests/") for r in routes)
+    keys = [(r["method"], r["url"]) for r in routes]
+    assert len(keys) == len(set(keys))
+
+
+@pytest.mark.parametrize("prefix,path,expected", [
+    ("", "/users", "/users"),
+    ("/api", "", "/api"),
+    ("/api/", "/users", "/api/users"),
+    ("/api", "users", "/api/users"),
+])
+def test_join_paths(prefix, path, expected):
+    assert join_paths(prefix, path) == expected
+
+
+def test_openapi_spec_converts_path_params(routes):
+    spec = build_openapi_spec(routes, "demo")
+    assert spec["info"]["title"] == "demo"
+    assert set(spec["paths"]["/items/{item_id}"]) == {"get", "delete"}
+    operation = spec["paths"]["/orders/{id}"]["get"]
+    assert operation["parameters"][0]["name"] == "id"
+    assert operation["tags"] == ["orders"]
+    assert operation["x-source-file"] == "src/routes/orders.js"
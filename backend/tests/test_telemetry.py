@@ -0,0 +1,37 @@
+import asyncio
+
+from app.services.single_flight import MongoFlightBackend
+from app.services.telemetry import telemetry
+
+
+class ReportingCollection:
+    """Stands in for a pymongo collection: reports each command the way MongoCommandListener does."""
+    def _command(self, name):
+        telemetry.record_mongo(name, 0.002, "ok")
+
+    def create_index(self, *args, **kwargs):
+        self._command("createIndexes")
+
+    def insert_one(self, doc):
+        self._command("insert")
+
+    def find_one(self, query):
+        self._command("find")
+        return None
+
+
+def test_mongo_commands_in_worker_threads_reach_the_request_breakdown():
+    backend = MongoFlightBackend(ReportingCollection())
+
+    async def request():
+        breakdown, token = telemetry.begin_request()
+        try:
+            assert await backend.claim("k")
+            await backend.wait("k")
+        finally:
+            telemetry.end_request(token)
+        return breakdown
+
+    breakdown = asyncio.run(request())
+    assert breakdown.spans[("mongo", "")]["calls"] == 3
+    assert breakdown.server_timing().startswith('mongo;dur=6.0;desc="3 calls"')
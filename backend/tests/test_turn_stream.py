@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from app.services.ai_interview import META_MARKER, TurnStreamParser
+
+META = {"feedback_snapshot": "Solid answer", "type": "technical", "difficulty": "medium"}
+RESPONSE = f"\n  How would you shard this table?\n{META_MARKER}\n{json.dumps(META)}\n"
+
+
+def _stream(chunks):
+    parser = TurnStreamParser()
+    released = "".join(parser.feed(chunk) for chunk in chunks)
+    tail, turn = parser.finish()
+    return released + tail, turn
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 11, len(RESPONSE)])
+def test_marker_never_leaks_for_any_chunk_size(size):
+    parser = TurnStreamParser()
+    released = ""
+    for i in range(0, len(RESPONSE), size):
+        released += parser.feed(RESPONSE[i:i + size])
+        assert "#" not in released
+    tail, turn = parser.finish()
+    assert (released + tail).strip() == "How would you shard this table?"
+    assert turn == {**META, "next_question": "How would you shard this table?"}
+
+
+def test_partial_marker_is_held_back_until_disambiguated():
+    parser = TurnStreamParser()
+    assert parser.feed("Why ###ME") == "Why "
+    # Not the marker after all: the held-back text is released with the next chunk
+    assert parser.feed("ssage?") == "###MEssage?"
+    tail, turn = parser.finish()
+    assert tail == ""
+    assert turn["next_question"] == "Why ###MEssage?"
+    assert turn["type"] is None
+
+
+def test_held_back_text_is_returned_by_finish():
+    parser = TurnStreamParser()
+    assert parser.feed("Ready? #") == "Ready? "
+    tail, turn = parser.finish()
+    assert tail == "#"
+    assert turn["next_question"] == "Ready? #"
+
+
+def test_unparseable_metadata_keeps_the_question():
+    text, turn = _stream(["Next question?", META_MARKER, "not json {oops"])
+    assert text == "Next question?"
+    assert turn["next_question"] == "Next question?"
+    assert turn["difficulty"] is None
+
+
+def test_json_answers_are_buffered():
+    payload = {"next_question": "Explain CAP.", "type": "theory", "difficulty": "easy"}
+    body = "```json\n" + json.dumps(payload) + "\n```"
+    parser = TurnStreamParser()
+    assert all(parser.feed(body[i:i + 4]) == "" for i in range(0, len(body), 4))
+    tail, turn = parser.finish()
+    assert tail == "Explain CAP."
+    assert turn == payload
+
+
+def test_empty_question_raises():
+    with pytest.raises(ValueError):
+        _stream(["  \n", META_MARKER, json.dumps(META)])
@@ -109,22 +109,57 @@ const MockInterview = () => {
         setCurrentInput('');
         setLoading(true);
 
+        // Streamed reply: the question is shown token by token, feedback arrives with the final event
+        let streaming = false;
+        const updateLast = (fields) => setHistory(prev => {
+            const next = [...prev];
+            next[next.length - 1] = { ...next[next.length - 1], ...fields };
+            return next;
+        });
         try {
             const apiKey = localStorage.getItem('groq_api_key');
-            const res = await api.post(`/interview/${sessionId}/reply`, {
-                answer: userMsg.text
-            }, {
-                headers: apiKey ? { 'x-groq-api-key': apiKey } : {}
+            const token = localStorage.getItem('token');
+            const res = await fetch(`${api.defaults.baseURL}/interview/${sessionId}/reply/stream`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                    ...(apiKey ? { 'x-groq-api-key': apiKey } : {})
+                },
+                body: JSON.stringify({ answer: userMsg.text })
             });
-
-            const aiMsg = {
-                role: 'assistant',
-                text: res.data.next_question,
-                feedback: res.data.feedback_snapshot
-            };
-            setHistory(prev => [...prev, aiMsg]);
+            if (!res.ok || !res.body) throw new Error(`Reply failed with status ${res.status}`);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let text = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const chunks = buffer.split('\n\n');
+                buffer = chunks.pop();
+                for (const chunk of chunks) {
+                    const line = chunk.split('\n').find(l => l.startsWith('data: '));
+                    if (!line) continue;
+                    const event = JSON.parse(line.slice(6));
+                    if (event.type === 'error') throw new Error(event.detail);
+                    const fields = event.type === 'token'
+                        ? { text: (text += event.text) }
+                        : { text: event.next_question, feedback: event.feedback_snapshot };
+                    if (!streaming) {
+                        streaming = true;
+                        setLoading(false);
+                        setHistory(prev => [...prev, { role: 'assistant', ...fields }]);
+                    } else {
+                        updateLast(fields);
+                    }
+                }
+            }
         } catch (error) {
             console.error("Failed to reply", error);
+            if (streaming) setHistory(prev => prev.slice(0, -1));
         } finally {
             setLoading(false);
         }
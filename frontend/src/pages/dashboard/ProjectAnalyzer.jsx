@@ -16,6 +16,7 @@ const ProjectAnalyzer = () => {
     const [docs, setDocs] = useState(null);
     const [copied, setCopied] = useState(false);
     const [isGeneratingSpec, setIsGeneratingSpec] = useState(false);
+    const [isLoadingRoutes, setIsLoadingRoutes] = useState(false);
 
     const handleCopy = async () => {
         if (!docs?.readme) return;
@@ -41,7 +42,11 @@ const ProjectAnalyzer = () => {
                 setDocs(prev => ({
                     ...prev,
                     api_specs: res.data.routes,
-                    warnings: ["⚠️ API Specification was AI-generated from source code. Verify accuracy."] // Overwrite old warning
+                    api_total: res.data.routes.length,
+                    api_next_cursor: null,
+                    warnings: [res.data.ai_enriched
+                        ? "⚠️ API Specification was extracted from source code; summaries are AI-generated. Verify accuracy."
+                        : "⚠️ API Specification was extracted from source code. Verify accuracy."] // Overwrite old warning
                 }));
             }
         } catch (error) {
@@ -53,20 +58,63 @@ const ProjectAnalyzer = () => {
         //new
     };
 
+    // Large specs are paginated: fetch the next page of the route table
+    const handleLoadMoreRoutes = async () => {
+        setIsLoadingRoutes(true);
+        try {
+            const res = await api.get(`/project/routes/${jobId}`, { params: { cursor: docs.api_next_cursor } });
+            setDocs(prev => ({
+                ...prev,
+                api_specs: [...prev.api_specs, ...res.data.routes],
+                api_next_cursor: res.data.next_cursor
+            }));
+        } catch (error) {
+            console.error("Loading routes failed", error);
+        } finally {
+            setIsLoadingRoutes(false);
+        }
+    };
+
+    // Submits a background analysis job and resolves once it finishes.
+    // Each finished stage is handed to onStage as soon as it is streamed (SSE).
+    const runJob = async (stages, onStage) => {
+        const apiKey = localStorage.getItem('groq_api_key');
+        const res = await api.post('/project/jobs', { repo_url: repoUrl, stages }, {
+            headers: apiKey ? { 'x-groq-api-key': apiKey } : {}
+        });
+
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`${api.defaults.baseURL}/project/jobs/${res.data.job_id}/events`);
+            source.onmessage = (message) => {
+                const event = JSON.parse(message.data);
+                if (event.type === 'stage' && event.status === 'done') {
+                    onStage(event.stage, event.result);
+                }
+                if (event.type === 'job' && (event.status === 'done' || event.status === 'failed')) {
+                    source.close();
+                    event.status === 'done' ? resolve() : reject(new Error(event.error));
+                }
+            };
+            source.onerror = () => {
+                source.close();
+                reject(new Error('Lost connection to job progress stream'));
+            };
+        });
+    };
+
     // Step 1: Visualize Architecture
     const handleVisualize = async () => {
         if (!repoUrl) return;
         setStatus('schema_loading');
 
         try {
-            const apiKey = localStorage.getItem('groq_api_key');
-            const res = await api.post('/project/visualize', { repo_url: repoUrl }, {
-                headers: apiKey ? { 'x-groq-api-key': apiKey } : {}
+            await runJob(['graph'], (stage, result) => {
+                if (stage === 'graph') {
+                    setGraphData(result.graph_data);
+                    setJobId(result.repo_path_id);
+                    setStatus('schema_ready');
+                }
             });
-
-            setGraphData(res.data.graph_data);
-            setJobId(res.data.repo_path_id);
-            setStatus('schema_ready');
         } catch (error) {
             console.error("Visualization failed", error);
             setStatus('error');
@@ -74,15 +122,13 @@ const ProjectAnalyzer = () => {
         }
     };
 
-    // Step 2: Generate Docs
+    // Step 2: Generate Docs (the checkout is cached, so clone & index are instant)
     const handleGenerateDocs = async () => {
         setStatus('docs_loading');
         try {
-            const apiKey = localStorage.getItem('groq_api_key');
-            const res = await api.post('/project/docs', { job_id: jobId }, {
-                headers: apiKey ? { 'x-groq-api-key': apiKey } : {}
+            await runJob(['readme', 'spec'], (stage, result) => {
+                setDocs(prev => ({ ...prev, ...result }));
             });
-            setDocs(res.data);
             setStatus('full_complete');
         } catch (e) {
             console.error("Docs generation failed", e);
@@ -172,7 +218,7 @@ const ProjectAnalyzer = () => {
                     {/* API Specs */}
                     <Card className="p-6">
                         <h3 className="font-bold flex items-center gap-2 mb-6">
-                            <Code2 className="h-5 w-5 text-primary" /> API Specification ({docs.api_specs.length} Endpoint detected)
+                            <Code2 className="h-5 w-5 text-primary" /> API Specification ({docs.api_total ?? docs.api_specs.length} Endpoint detected)
                         </h3>
 
                         {docs.warnings && docs.warnings.length > 0 && (
@@ -219,6 +265,12 @@ const ProjectAnalyzer = () => {
                                 <p className="text-text-secondary italic">No explicit API routes detected.</p>
                             )}
                         </div>
+                        {docs.api_next_cursor && (
+                            <Button onClick={handleLoadMoreRoutes} disabled={isLoadingRoutes} size="sm" variant="outline" className="mt-4">
+                                {isLoadingRoutes && <Loader2 className="h-3 w-3 animate-spin mr-2" />}
+                                Load more endpoints
+                            </Button>
+                        )}
                     </Card>
                 </motion.div>
             )}
@@ -88,16 +88,53 @@ const Roadmap = () => {
         setLoading(true);
         try {
             const apiKey = localStorage.getItem('groq_api_key');
-            console.log(apiKey)
-            const res = await api.post('/roadmap/generate', {
-                target_role: role,
-                days_remaining: parseInt(days),
-                weak_patterns: weaknesses.split(',').map(s => s.trim()).filter(Boolean),
-                force_regenerate: true
-            }, {
-                headers: apiKey ? { 'x-groq-api-key': apiKey } : {}
+            const token = localStorage.getItem('token');
+            // Streamed: levels are shown as soon as each one is generated and its resources resolved
+            const res = await fetch(`${api.defaults.baseURL}/roadmap/generate/stream`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                    ...(apiKey ? { 'x-groq-api-key': apiKey } : {})
+                },
+                body: JSON.stringify({
+                    target_role: role,
+                    days_remaining: parseInt(days),
+                    weak_patterns: weaknesses.split(',').map(s => s.trim()).filter(Boolean),
+                    force_regenerate: true
+                })
             });
-            setRoadmap(res.data);
+            if (!res.ok || !res.body) throw new Error(`Roadmap generation failed with status ${res.status}`);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let partial = { title: '', description: '', levels: [] };
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const chunks = buffer.split('\n\n');
+                buffer = chunks.pop();
+                for (const chunk of chunks) {
+                    const line = chunk.split('\n').find(l => l.startsWith('data: '));
+                    if (!line) continue;
+                    const event = JSON.parse(line.slice(6));
+                    if (event.type === 'error') throw new Error(event.detail);
+                    if (event.type === 'reset') {
+                        partial = { title: '', description: '', levels: [] };
+                    } else if (event.type === 'field') {
+                        partial = { ...partial, [event.name]: event.value };
+                    } else if (event.type === 'level') {
+                        partial = { ...partial, levels: [...partial.levels, event.level] };
+                        setLoading(false);
+                        setStep(2);
+                    } else if (event.type === 'done') {
+                        partial = event.roadmap;
+                    }
+                    setRoadmap(partial);
+                }
+            }
             setStep(2);
         } catch (error) {
             console.error("Failed to generate roadmap", error);